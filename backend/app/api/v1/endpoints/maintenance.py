@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+import logging
+
+from app.core.database import get_db
+from app.models.vehicle import VehicleCity, VehicleStatus
+from app.schemas.maintenance import MaintenanceDueResponse, MaintenanceServiceIn, VehicleMaintenanceResponse
+from app.services.maintenance import MaintenanceService
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get(
+    "/due",
+    response_model=MaintenanceDueResponse,
+    summary="Ближайшие ТО",
+    description="Автомобили, которым ТО в ближайшие N км или дней, и просроченные. "
+                "График пересчитывается раз в час"
+)
+async def get_maintenance_due(
+    within_km: int = Query(1000, ge=0, le=100000, description="Осталось не больше км"),
+    within_days: int = Query(30, ge=0, le=366, description="Осталось не больше дней"),
+    city: Optional[VehicleCity] = Query(None, description="Город"),
+    vehicle_status: Optional[VehicleStatus] = Query(None, alias="status", description="Статус"),
+    page: int = Query(1, ge=1, description="Номер страницы"),
+    page_size: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Получить автомобили, которым скоро ТО"""
+    try:
+        items, total = await MaintenanceService(db).get_due(
+            within_km, within_days, city, vehicle_status, page, page_size
+        )
+        return MaintenanceDueResponse(
+            items=items,
+            within_km=within_km,
+            within_days=within_days,
+            page=page,
+            page_size=page_size,
+            total=total
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при получении ближайших ТО: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
+@router.get(
+    "/{vehicle_id}",
+    response_model=VehicleMaintenanceResponse,
+    summary="График ТО автомобиля"
+)
+async def get_vehicle_maintenance(
+    vehicle_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Получить график ТО автомобиля"""
+    try:
+        schedule = await MaintenanceService(db).get_schedule(vehicle_id)
+        
+        if not schedule:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="График ТО автомобиля еще не рассчитан"
+            )
+        
+        return schedule
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при получении графика ТО автомобиля {vehicle_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
+@router.post(
+    "/{vehicle_id}/services",
+    response_model=VehicleMaintenanceResponse,
+    summary="Отметить ТО",
+    description="Записать проведенное ТО; график автомобиля пересчитывается сразу"
+)
+async def record_vehicle_service(
+    vehicle_id: UUID,
+    data: MaintenanceServiceIn,
+    db: AsyncSession = Depends(get_db)
+):
+    """Отметить проведенное ТО"""
+    try:
+        schedule = await MaintenanceService(db).record_service(vehicle_id, data)
+        
+        if not schedule:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Автомобиль не найден"
+            )
+        
+        return schedule
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при отметке ТО автомобиля {vehicle_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException, Query, status
+
+from app.core.idempotency import idempotency_stats
+from app.core.log import logging_stats
+from app.core.ratelimit import load_shedding_stats
+from app.core.tracing import get_trace, recent_traces, tracing_stats
+from app.services.coalescing import vehicle_reads
+
+router = APIRouter()
+
+@router.get("/")
+async def get_metrics():
+    """Метрики текущего воркера"""
+    return {
+        "vehicle_reads": vehicle_reads.stats(),
+        "load_shedding": load_shedding_stats(),
+        "idempotency": idempotency_stats(),
+        "logging": logging_stats(),
+        "tracing": tracing_stats(),
+    }
+
+@router.get("/traces")
+async def get_recent_traces(
+    min_ms: float = Query(0, ge=0, description="Не короче, мс"),
+    limit: int = Query(20, ge=1, le=200, description="Сколько трасс")
+):
+    """Последние записанные запросы текущего воркера, самые долгие первыми"""
+    return {"items": recent_traces(min_ms, limit)}
+
+@router.get("/traces/{trace_id}")
+async def get_trace_spans(trace_id: str):
+    """Спаны трассы из памяти текущего воркера (спаны задач Celery - в файле трасс)"""
+    spans = get_trace(trace_id.lower())
+    if not spans:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Трасса не найдена в памяти воркера"
+        )
+    return {"trace_id": trace_id.lower(), "spans": spans}
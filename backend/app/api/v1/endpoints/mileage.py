@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, timedelta
+from typing import Optional
+from uuid import UUID
+import logging
+
+from app.core.database import get_db
+from app.schemas.mileage import (
+    MileageReadingBatch,
+    MileageIngestResponse,
+    MileageDailyResponse
+)
+from app.services.mileage import MileageService
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/vehicles", tags=["mileage"])
+
+# Максимальный период дневной истории в одном запросе
+MAX_DAILY_RANGE_DAYS = 3 * 366
+
+@router.post(
+    "/mileage-readings",
+    response_model=MileageIngestResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Принять показания одометра",
+    description="Пакетный прием показаний телематики. Повторы и показания неизвестных автомобилей пропускаются"
+)
+async def ingest_mileage_readings(
+    batch: MileageReadingBatch,
+    db: AsyncSession = Depends(get_db)
+):
+    """Принять пакет показаний одометра"""
+    try:
+        inserted = await MileageService(db).ingest(batch.readings)
+        return MileageIngestResponse(received=len(batch.readings), inserted=inserted)
+    except Exception as e:
+        logger.error(f"Ошибка при приеме показаний пробега: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
+@router.get(
+    "/{vehicle_id}/mileage/daily",
+    response_model=MileageDailyResponse,
+    summary="Пробег по дням",
+    description="Дневная история пробега автомобиля из предрассчитанной свертки"
+)
+async def get_mileage_daily(
+    vehicle_id: UUID,
+    date_from: Optional[date] = Query(None, description="Начало периода (по умолчанию 30 дней назад)"),
+    date_to: Optional[date] = Query(None, description="Конец периода (по умолчанию сегодня)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Получить пробег автомобиля по дням"""
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=30)
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Начало периода позже его конца"
+        )
+    if (date_to - date_from).days > MAX_DAILY_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Период не может быть длиннее {MAX_DAILY_RANGE_DAYS} дней"
+        )
+
+    try:
+        items = await MileageService(db).get_daily(vehicle_id, date_from, date_to)
+        return MileageDailyResponse(vehicle_id=vehicle_id, items=items)
+    except Exception as e:
+        logger.error(f"Ошибка при получении пробега автомобиля {vehicle_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+import logging
+
+from app.core.database import get_db
+from app.schemas.penalty import PenaltyImportResponse, PenaltyListResponse
+from app.services.penalties import PenaltyService
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post(
+    "/imports",
+    response_model=PenaltyImportResponse,
+    summary="Импорт файла штрафов",
+    description="CSV (UTF-8, разделитель , или ;) с колонками uin, plate_number, violated_at, amount "
+                "и необязательными article, location. Номера сопоставляются с реестром пачками, "
+                "повторная загрузка файла дублей не создает"
+)
+async def import_penalties(
+    file: UploadFile = File(..., description="Файл штрафов"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Импортировать штрафы из файла"""
+    try:
+        return await PenaltyService(db).import_file(file.file)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при импорте штрафов из {file.filename}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
+@router.get(
+    "/",
+    response_model=PenaltyListResponse,
+    summary="Список штрафов",
+    description="Штрафы автомобиля или несопоставленные (matched=false), новые нарушения первыми"
+)
+async def get_penalties(
+    vehicle_id: Optional[UUID] = Query(None, description="ID автомобиля"),
+    matched: Optional[bool] = Query(None, description="Сопоставлен ли штраф с автомобилем"),
+    page: int = Query(1, ge=1, description="Номер страницы"),
+    page_size: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Получить штрафы"""
+    try:
+        penalties, total = await PenaltyService(db).get_penalties(vehicle_id, matched, page, page_size)
+        return PenaltyListResponse(items=penalties, page=page, page_size=page_size, total=total)
+    except Exception as e:
+        logger.error(f"Ошибка при получении штрафов: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
@@ -0,0 +1,254 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from uuid import UUID
+from zoneinfo import ZoneInfo
+import logging
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.vehicle import VehicleCity
+from app.models.report import DONE, ReportJob
+from app.schemas.report import ReportJobCreate, ReportJobResponse
+from app.schemas.status_history import (
+    FleetUtilizationResponse,
+    StatusHistoryResponse,
+    UtilizationBucket,
+    VehicleUtilizationResponse
+)
+from app.services.reports import MEDIA_TYPES, ReportJobService, download_name, estimate, report_path
+from app.services.status_history import StatusHistoryService, utilization
+from app.tasks.ops import generate_report
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Ограничения периода отчета
+MAX_DAILY_RANGE_DAYS = 3 * 366
+MAX_HOURLY_RANGE_DAYS = 31
+
+def _check_range(date_from: date, date_to: date, max_days: int) -> None:
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Начало периода позже его конца"
+        )
+    if (date_to - date_from).days > max_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Период не может быть длиннее {max_days} дней"
+        )
+
+@router.get(
+    "/utilization",
+    response_model=FleetUtilizationResponse,
+    summary="Загрузка парка",
+    description="Время в статусах и доля времени в аренде по дням или часам из предрассчитанной свертки"
+)
+async def get_fleet_utilization(
+    date_from: date = Query(..., description="Начало периода"),
+    date_to: date = Query(..., description="Конец периода"),
+    city: Optional[VehicleCity] = Query(None, description="Город"),
+    granularity: str = Query("day", pattern="^(day|hour)$", description="day или hour"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Загрузка парка за период"""
+    hourly = granularity == "hour"
+    _check_range(date_from, date_to, MAX_HOURLY_RANGE_DAYS if hourly else MAX_DAILY_RANGE_DAYS)
+
+    try:
+        buckets = await StatusHistoryService(db).get_fleet_utilization(date_from, date_to, city, hourly)
+        tz = ZoneInfo(settings.timezone)
+        totals = {}
+        items = []
+        for start, seconds in buckets:
+            for key, value in seconds.items():
+                totals[key] = totals.get(key, 0.0) + value
+            items.append(UtilizationBucket(
+                start=start if isinstance(start, datetime) else datetime.combine(start, time(), tz),
+                seconds={key.value: value for key, value in seconds.items()},
+                utilization=utilization(seconds)
+            ))
+        return FleetUtilizationResponse(
+            date_from=date_from,
+            date_to=date_to,
+            city=city,
+            granularity=granularity,
+            utilization=utilization(totals),
+            items=items
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при расчете загрузки парка: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
+@router.get(
+    "/vehicles/{vehicle_id}/utilization",
+    response_model=VehicleUtilizationResponse,
+    summary="Загрузка автомобиля",
+    description="Время автомобиля в статусах за период, включая текущий статус"
+)
+async def get_vehicle_utilization(
+    vehicle_id: UUID,
+    date_from: Optional[date] = Query(None, description="Начало периода (по умолчанию 30 дней назад)"),
+    date_to: Optional[date] = Query(None, description="Конец периода (по умолчанию сегодня)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Загрузка автомобиля за период"""
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=30)
+    _check_range(date_from, date_to, MAX_DAILY_RANGE_DAYS)
+
+    try:
+        seconds = await StatusHistoryService(db).get_vehicle_seconds(vehicle_id, date_from, date_to)
+        return VehicleUtilizationResponse(
+            vehicle_id=vehicle_id,
+            date_from=date_from,
+            date_to=date_to,
+            seconds={key.value: value for key, value in seconds.items()},
+            utilization=utilization(seconds)
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при расчете загрузки автомобиля {vehicle_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
+@router.get(
+    "/vehicles/{vehicle_id}/status-history",
+    response_model=StatusHistoryResponse,
+    summary="Журнал смен статуса",
+    description="Смены статуса и города автомобиля от новых к старым; следующая страница по before"
+)
+async def get_vehicle_status_history(
+    vehicle_id: UUID,
+    before: Optional[datetime] = Query(None, description="Смены раньше этого момента"),
+    limit: int = Query(50, ge=1, le=500, description="Количество записей"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Журнал смен статуса автомобиля"""
+    try:
+        items = await StatusHistoryService(db).get_vehicle_transitions(vehicle_id, before, limit)
+        return StatusHistoryResponse(vehicle_id=vehicle_id, items=items)
+    except Exception as e:
+        logger.error(f"Ошибка при получении истории статусов {vehicle_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
+def _job_response(request: Request, job: ReportJob) -> ReportJobResponse:
+    progress, eta_seconds = estimate(job)
+    download_url = None
+    if job.status == DONE:
+        download_url = request.app.url_path_for("download_report_job", job_id=str(job.id))
+    return ReportJobResponse(
+        id=job.id,
+        status=job.status,
+        format=job.format,
+        params=job.params,
+        total_rows=job.total_rows,
+        rows_done=job.rows_done,
+        progress=progress,
+        eta_seconds=eta_seconds,
+        file_size=job.file_size,
+        error=job.error,
+        download_url=download_url,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at
+    )
+
+@router.post(
+    "/jobs",
+    response_model=ReportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Заказать отчет по автопарку",
+    description="Отчет строится в фоне; пока такой же отчет ждет или строится, возвращается его задание"
+)
+async def create_report_job(
+    data: ReportJobCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Создать задание отчета"""
+    try:
+        service = ReportJobService(db)
+        job, created = await service.create(data)
+        if created:
+            try:
+                generate_report.delay(str(job.id))
+            except Exception:
+                # Иначе ждущее задание без задачи держало бы дедупликацию
+                await service.mark_failed(job.id, "Не удалось поставить задание в очередь")
+                raise
+            logger.info("Создано задание отчета: %s", job.id, extra={"report_job_id": str(job.id)})
+        return _job_response(request, job)
+    except Exception as e:
+        logger.error(f"Ошибка при создании задания отчета: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
+async def _get_job(db: AsyncSession, job_id: UUID) -> ReportJob:
+    try:
+        job = await ReportJobService(db).get(job_id)
+    except Exception as e:
+        logger.error(f"Ошибка при получении задания отчета {job_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Задание отчета не найдено"
+        )
+    return job
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=ReportJobResponse,
+    summary="Состояние задания отчета",
+    description="Статус, прогресс по строкам и оценка оставшегося времени"
+)
+async def get_report_job(
+    job_id: UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Получить состояние задания отчета"""
+    return _job_response(request, await _get_job(db, job_id))
+
+@router.get(
+    "/jobs/{job_id}/download",
+    name="download_report_job",
+    summary="Скачать отчет",
+    description="Готовый файл отчета; поддерживаются запросы диапазонов (Range) для докачки"
+)
+async def download_report_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Скачать готовый отчет"""
+    job = await _get_job(db, job_id)
+    if job.status != DONE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Отчет еще не готов"
+        )
+    path = report_path(job)
+    if not path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Файл отчета удален"
+        )
+    # Range и ответ 206 обрабатывает FileResponse (starlette>=0.40, отсюда нижняя граница fastapi)
+    return FileResponse(path, media_type=MEDIA_TYPES[job.format], filename=download_name(job))
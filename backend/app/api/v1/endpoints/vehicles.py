@@ -1,19 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from uuid import UUID
 import logging
 
-from app.core.database import get_db
+from app.core.database import ReadOnlyConnection, get_db, get_read_db
+from app.core.encoding import render
+from app.schemas.location import (
+    VehicleLocationBatch,
+    VehicleLocationIngestResponse,
+    VehicleNearestResponse
+)
 from app.schemas.vehicle import (
     VehicleCreate, 
     VehicleUpdate, 
     VehicleResponse, 
     VehicleListResponse,
     VehicleFilters,
+    VehicleSuggestResponse,
+    VehicleBatchGetRequest,
+    VehicleBatchGetResponse,
     ErrorResponse
 )
-from app.services.vehicle import VehicleService
+from app.services.coalescing import vehicle_reads
+from app.services.location import LocationService
+from app.services.nearest import nearest_vehicles
+from app.services.suggest import plate_suggester
+from app.services.vehicle import VehicleReader, VehicleService
 from app.tasks.ops import vehicle_created_event
 
 logger = logging.getLogger(__name__)
@@ -24,36 +37,48 @@ router = APIRouter(prefix="/vehicles", tags=["vehicles"])
     "/",
     response_model=VehicleListResponse,
     summary="Получить список автомобилей",
-    description="Получить список автомобилей с фильтрацией, поиском и пагинацией"
+    description=(
+        "Получить список автомобилей с фильтрацией, поиском и пагинацией. "
+        "Формат по Accept: application/json (по умолчанию), application/msgpack, "
+        "application/vnd.drivecore.columnar+json (items колонками); сжатие br/gzip по Accept-Encoding"
+    )
 )
 async def get_vehicles(
+    request: Request,
     q: Optional[str] = Query(None, description="Поиск по номеру, VIN, марке, модели"),
-    status: Optional[str] = Query(None, description="Фильтр по статусу"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Фильтр по статусу"),
     city: Optional[str] = Query(None, description="Фильтр по городу"),
     page: int = Query(1, ge=1, description="Номер страницы"),
     page_size: int = Query(10, ge=1, le=100, description="Размер страницы"),
     ordering: str = Query("-created_at", description="Сортировка"),
-    db: AsyncSession = Depends(get_db)
+    facets: Optional[str] = Query(None, description="Фасетные счетчики, например status,city"),
+    conn: ReadOnlyConnection = Depends(get_read_db)
 ):
     """Получить список автомобилей"""
     try:
         filters = VehicleFilters(
             q=q,
-            status=status,
+            status=status_filter,
             city=city,
             page=page,
             page_size=page_size,
-            ordering=ordering
+            ordering=ordering,
+            facets=facets
         )
         
-        service = VehicleService(db)
-        vehicles, total = await service.get_vehicles(filters)
+        vehicles, total, facet_counts = await vehicle_reads.get_vehicles(conn, filters)
         
-        return VehicleListResponse(
+        return render(request, VehicleListResponse(
             items=vehicles,
             page=page,
             page_size=page_size,
-            total=total
+            total=total,
+            facets=facet_counts
+        ), rows_field="items")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     except Exception as e:
         logger.error(f"Ошибка при получении списка автомобилей: {e}")
@@ -62,6 +87,133 @@ async def get_vehicles(
             detail="Внутренняя ошибка сервера"
         )
 
+@router.get(
+    "/suggest",
+    response_model=VehicleSuggestResponse,
+    summary="Подсказки по номеру и VIN",
+    description="Поиск автомобилей по началу номера или VIN из индекса в памяти, без обращения к БД"
+)
+async def suggest_vehicles(
+    prefix: str = Query(..., min_length=1, max_length=20, description="Начало номера или VIN"),
+    limit: int = Query(10, ge=1, le=50, description="Количество подсказок")
+):
+    """Подсказки для ввода номера или VIN"""
+    if not plate_suggester.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Индекс подсказок еще строится"
+        )
+    
+    return VehicleSuggestResponse(items=plate_suggester.suggest(prefix, limit))
+
+@router.get(
+    "/nearest",
+    response_model=VehicleNearestResponse,
+    summary="Ближайшие свободные автомобили",
+    description="Свободные автомобили, ближайшие к точке, из индекса в памяти, без обращения к БД"
+)
+async def nearest_available_vehicles(
+    lat: float = Query(..., ge=-90, le=90, description="Широта точки"),
+    lon: float = Query(..., ge=-180, le=180, description="Долгота точки"),
+    k: int = Query(5, ge=1, le=50, description="Количество автомобилей"),
+    max_km: Optional[float] = Query(None, gt=0, le=500, description="Радиус поиска, км")
+):
+    """Ближайшие к точке автомобили в статусе AVAILABLE"""
+    if not nearest_vehicles.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Индекс ближайших автомобилей еще строится"
+        )
+    
+    return VehicleNearestResponse(items=nearest_vehicles.nearest(lat, lon, k, max_km))
+
+@router.post(
+    "/locations",
+    response_model=VehicleLocationIngestResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Принять координаты автомобилей",
+    description="Пакетный прием координат телематики. Устаревшие координаты и неизвестные автомобили пропускаются"
+)
+async def ingest_vehicle_locations(
+    batch: VehicleLocationBatch,
+    db: AsyncSession = Depends(get_db)
+):
+    """Принять пакет координат"""
+    try:
+        updated = await LocationService(db).ingest(batch.locations)
+        return VehicleLocationIngestResponse(received=len(batch.locations), updated=updated)
+    except Exception as e:
+        logger.error(f"Ошибка при приеме координат: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
+@router.post(
+    "/batch-get",
+    response_model=VehicleBatchGetResponse,
+    summary="Получить автомобили по списку ID",
+    description="Получить до 5000 автомобилей одним запросом к БД; порядок как в запросе, ненайденные ID в missing"
+)
+async def batch_get_vehicles(
+    request: Request,
+    batch: VehicleBatchGetRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Получить автомобили по списку ID"""
+    try:
+        ids = list(dict.fromkeys(batch.ids))
+        found = await VehicleService(db).get_vehicles_by_ids(ids)
+        
+        return render(request, VehicleBatchGetResponse(
+            items=[VehicleResponse.model_validate(found[vehicle_id]) for vehicle_id in ids if vehicle_id in found],
+            missing=[vehicle_id for vehicle_id in ids if vehicle_id not in found]
+        ), rows_field="items")
+    except Exception as e:
+        logger.error(f"Ошибка при получении автомобилей по списку ID: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
+@router.get(
+    "/lookup",
+    response_model=VehicleResponse,
+    summary="Найти автомобиль по номеру или VIN",
+    description="Точный поиск по номеру или VIN; латинские и кириллические буквы-двойники считаются одинаковыми"
+)
+async def lookup_vehicle(
+    request: Request,
+    plate: Optional[str] = Query(None, min_length=1, max_length=20, description="Государственный номер"),
+    vin: Optional[str] = Query(None, min_length=1, max_length=17, description="VIN номер"),
+    conn: ReadOnlyConnection = Depends(get_read_db)
+):
+    """Найти автомобиль по номеру или VIN"""
+    if (plate is None) == (vin is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Укажите номер или VIN"
+        )
+    try:
+        reader = VehicleReader(conn)
+        vehicle = await (reader.get_vehicle_by_plate(plate) if plate else reader.get_vehicle_by_vin(vin))
+        
+        if not vehicle:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Автомобиль не найден"
+            )
+        
+        return render(request, vehicle)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при поиске автомобиля по номеру или VIN: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
 @router.get(
     "/{vehicle_id}",
     response_model=VehicleResponse,
@@ -69,13 +221,13 @@ async def get_vehicles(
     description="Получить детальную информацию об автомобиле"
 )
 async def get_vehicle(
+    request: Request,
     vehicle_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    conn: ReadOnlyConnection = Depends(get_read_db)
 ):
     """Получить автомобиль по ID"""
     try:
-        service = VehicleService(db)
-        vehicle = await service.get_vehicle_by_id(vehicle_id)
+        vehicle = await vehicle_reads.get_vehicle(conn, vehicle_id)
         
         if not vehicle:
             raise HTTPException(
@@ -83,7 +235,7 @@ async def get_vehicle(
                 detail="Автомобиль не найден"
             )
         
-        return vehicle
+        return render(request, vehicle)
     except HTTPException:
         raise
     except Exception as e:
@@ -112,7 +264,7 @@ async def create_vehicle(
         # Отправляем задачу в Celery
         vehicle_created_event.delay(str(vehicle.id))
         
-        logger.info(f"Создан автомобиль: {vehicle.plate_number} (ID: {vehicle.id})")
+        logger.info("Создан автомобиль: %s (ID: %s)", vehicle.plate_number, vehicle.id, extra={"vehicle_id": str(vehicle.id)})
         
         return vehicle
     except ValueError as e:
@@ -149,7 +301,7 @@ async def update_vehicle(
                 detail="Автомобиль не найден"
             )
         
-        logger.info(f"Обновлен автомобиль: {vehicle.plate_number} (ID: {vehicle.id})")
+        logger.info("Обновлен автомобиль: %s (ID: %s)", vehicle.plate_number, vehicle.id, extra={"vehicle_id": str(vehicle.id)})
         
         return vehicle
     except ValueError as e:
@@ -187,7 +339,7 @@ async def delete_vehicle(
                 detail="Автомобиль не найден"
             )
         
-        logger.info(f"Удален автомобиль (ID: {vehicle_id})")
+        logger.info("Удален автомобиль (ID: %s)", vehicle_id, extra={"vehicle_id": str(vehicle_id)})
         
     except HTTPException:
         raise
@@ -1,8 +1,13 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import ping, vehicles
+from app.api.v1.endpoints import maintenance, metrics, mileage, penalties, ping, reports, vehicles
 
 api_router = APIRouter()
 
 # Подключение эндпоинтов
 api_router.include_router(ping.router, prefix="/ping", tags=["ping"])
 api_router.include_router(vehicles.router, tags=["vehicles"])
+api_router.include_router(mileage.router, tags=["mileage"])
+api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
+api_router.include_router(maintenance.router, prefix="/maintenance", tags=["maintenance"])
+api_router.include_router(penalties.router, prefix="/penalties", tags=["penalties"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
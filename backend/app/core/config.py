@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     """Настройки приложения"""
@@ -10,17 +10,110 @@ class Settings(BaseSettings):
     postgres_password: str = "drivecore"
     postgres_host: str = "postgres"
     postgres_port: int = 5432
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_prepared_statement_cache_size: int = 256  # на соединение, 0 - без подготовки
+    # Пул процесса воркера Celery: по умолчанию по соединению на одновременную
+    # задачу (1 в prefork/solo, concurrency в threads/gevent, но не больше
+    # worker_db_pool_max) плюс запас на второе соединение задачи (отчет
+    # читает курсором вне сессии). Сверх пула задачи ждут соединение
+    # worker_db_pool_timeout секунд
+    worker_db_pool_size: Optional[int] = None
+    worker_db_pool_max: int = 20
+    worker_db_pool_timeout: int = 30
+    worker_db_max_overflow: int = 1
+    worker_db_pool_recycle: int = 300  # секунд
     
     # Redis
     redis_url: str = "redis://redis:6379/0"
+    redis_socket_timeout: float = 0.5  # секунд на команду
+    redis_socket_connect_timeout: float = 0.5
     
     # Security
     secret_key: str = "your-secret-key-here"
     debug: bool = True
     
+    # Логирование: запись в очередь, вывод в stdout отдельным потоком
+    log_level: str = "INFO"
+    log_format: str = "json"  # json или text
+    log_queue_size: int = 10000  # записей; при переполнении новые отбрасываются
+    # Правила по префиксу логгера для записей ниже WARNING:
+    # доля сохраняемых (0..1) и записей в секунду
+    log_sample_rates: Dict[str, float] = {}
+    log_rate_limits: Dict[str, float] = {"uvicorn.access": 200, "sqlalchemy.engine": 100}
+    
+    # Трассировка: спаны HTTP, SQL и задач Celery в файл JSON lines на общем диске
+    tracing_enabled: bool = True
+    tracing_sample_rate: float = 0.1  # доля новых трасс; продолженные следуют решению вызывающего
+    tracing_service_name: str = "drivecore"
+    tracing_file: str = "/app/var/traces/spans.jsonl"  # пусто - только буфер процесса
+    tracing_file_max_mb: int = 100  # затем файл переименовывается в .1
+    tracing_queue_size: int = 10000  # спанов; при переполнении в файл не попадают
+    tracing_buffer_spans: int = 10000  # последних спанов в памяти процесса (/metrics/traces)
+    tracing_max_statement_length: int = 1000  # символов SQL в спане
+    
     # Timezone
     timezone: str = "Europe/Moscow"
     
+    # Ограничение нагрузки: частота на клиента (token bucket в Redis)
+    # и одновременные запросы процесса (не больше размера пула БД)
+    rate_limit_enabled: bool = True
+    # X-API-Key интеграций со своим бюджетом; остальные клиенты - по адресу
+    rate_limit_api_keys: List[str] = []
+    rate_limit_read_per_second: float = 20
+    rate_limit_read_burst: int = 60
+    rate_limit_write_per_second: float = 5
+    rate_limit_write_burst: int = 20
+    rate_limit_bulk_per_second: float = 0.5
+    rate_limit_bulk_burst: int = 3
+    concurrency_write_limit: int = 8
+    concurrency_bulk_limit: int = 2
+    
+    # Идемпотентность записей по заголовку Idempotency-Key (ответы в Redis)
+    idempotency_ttl_seconds: int = 86400  # сколько хранится ответ
+    idempotency_lock_seconds: int = 30  # ключ первого запроса освобождается, если воркер упал
+    idempotency_wait_seconds: float = 10  # одновременный повтор ждет первый запрос, затем 409
+    
+    # Сжатие ответов (списки и выгрузки)
+    compression_min_size: int = 1024  # байт, меньшие ответы не сжимаются
+    compression_gzip_level: int = 5
+    compression_brotli_quality: int = 4
+    
+    # Кэширование
+    facets_cache_ttl: int = 30  # секунд, для фасетов без поискового запроса
+    
+    # Пробег
+    mileage_rollup_lag_seconds: int = 30  # свертка не трогает показания моложе этого
+    mileage_max_age_days: int = 365  # более старые показания отклоняются (секции есть на год назад)
+    
+    # Поиск ближайших свободных автомобилей (сетка в памяти воркера)
+    nearest_grid_cell_km: float = 0.5
+    nearest_reference_latitude: float = 57.8  # широта, на которой ячейка квадратная (Псков)
+    nearest_max_radius_km: float = 50.0  # дальше по умолчанию не ищем
+    
+    # ОСАГО: окно ночной проверки и размеры порций
+    osago_notice_days: int = 30  # предупреждать за столько дней до окончания
+    osago_expired_lookback_days: int = 7  # и столько дней после
+    osago_scan_chunk_size: int = 1000
+    osago_notify_batch_size: int = 200
+    
+    # Фоновые отчеты: файлы на общем для API и воркеров диске
+    report_dir: str = "/app/var/reports"
+    report_chunk_size: int = 5000  # строк на порцию курсора и обновление прогресса
+    report_retention_hours: int = 24  # готовые файлы и задания удаляются позже
+    report_stale_seconds: int = 600  # выполняемое задание без прогресса считается упавшим
+    
+    # Плановое ТО: регламент для марок без строки в maintenance_intervals
+    maintenance_default_interval_km: int = 15000
+    maintenance_default_interval_months: int = 12
+    maintenance_chunk_size: int = 20000  # автомобилей на порцию пересчета графика
+    
+    # Импорт штрафов: строк файла на один запрос сопоставления и записи
+    penalty_batch_size: int = 5000
+    
+    # История статусов
+    status_rollup_lag_seconds: int = 30  # свертка не трогает смены статуса моложе этого
+    
     @property
     def database_url(self) -> str:
         """URL для подключения к базе данных"""
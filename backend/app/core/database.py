@@ -1,15 +1,21 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine, async_sessionmaker
+from typing import Any, Optional
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Создаем асинхронный движок
+# Создаем асинхронный движок (SQL при debug пишется через логгер
+# sqlalchemy.engine, см. app.core.log)
 engine = create_async_engine(
     settings.database_url,
-    echo=settings.debug,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
     pool_pre_ping=True,
     pool_recycle=300,
+    # Подготовленные запросы переиспользуются на соединении по тексту SQL
+    # (за PgBouncer в режиме transaction нужно 0)
+    connect_args={"prepared_statement_cache_size": settings.db_prepared_statement_cache_size},
 )
 
 # Создаем фабрику сессий
@@ -31,6 +37,43 @@ async def get_db() -> AsyncSession:
         finally:
             await session.close()
 
+class ReadOnlyConnection:
+    """Соединение для чтения без ORM-сессии.
+
+    Берется из пула при первом запросе (запрос, получивший ответ из
+    объединенного чтения, пула не касается) и работает в транзакции
+    READ ONLY: все запросы видят один снимок, запись отклоняется базой.
+    """
+
+    def __init__(self):
+        self._conn: Optional[AsyncConnection] = None
+
+    async def execute(self, statement: Any, parameters: Optional[dict] = None):
+        if self._conn is None:
+            conn = await engine.connect()
+            try:
+                await conn.execution_options(postgresql_readonly=True)
+                await conn.begin()
+            except Exception:
+                await conn.close()
+                raise
+            self._conn = conn
+        return await self._conn.execute(statement, parameters)
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            # Транзакция только читала, откат завершает ее без фиксации
+            await self._conn.close()
+            self._conn = None
+
+async def get_read_db() -> ReadOnlyConnection:
+    """Получить соединение только для чтения (для GET-запросов)"""
+    conn = ReadOnlyConnection()
+    try:
+        yield conn
+    finally:
+        await conn.close()
+
 async def init_db():
     """Инициализация базы данных"""
     try:
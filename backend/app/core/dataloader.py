@@ -0,0 +1,71 @@
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+import asyncio
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """Объединение поштучных загрузок в пакетные в пределах одного запроса.
+
+    Ключи, запрошенные через load() в одном проходе event loop (например,
+    внутри asyncio.gather), загружаются одним вызовом batch_fn. Результаты
+    кэшируются на время жизни загрузчика, поэтому он создается на запрос.
+    Пакеты выполняются по очереди: сессия БД не допускает параллельных запросов.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]],
+        max_batch_size: int = 1000
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self._cache: Dict[K, asyncio.Future] = {}
+        self._queue: List[K] = []
+        self._lock = asyncio.Lock()
+
+    def load(self, key: K) -> "asyncio.Future[Optional[V]]":
+        """Значение по ключу (None, если не найдено)"""
+        future = self._cache.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._cache[key] = future
+            if not self._queue:
+                asyncio.get_running_loop().call_soon(self._schedule)
+            self._queue.append(key)
+        return future
+
+    async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        """Значения по ключам в исходном порядке"""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: K, value: V) -> None:
+        """Положить в кэш уже известное значение"""
+        if key not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._cache[key] = future
+
+    def _schedule(self) -> None:
+        keys, self._queue = self._queue, []
+        for start in range(0, len(keys), self.max_batch_size):
+            asyncio.ensure_future(self._dispatch(keys[start:start + self.max_batch_size]))
+
+    async def _dispatch(self, keys: List[K]) -> None:
+        async with self._lock:
+            self.batches += 1
+            try:
+                values = await self.batch_fn(keys)
+            except Exception as exc:
+                for key in keys:
+                    # Ошибку не кэшируем: следующий load() попробует снова
+                    future = self._cache.pop(key)
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+            for key in keys:
+                future = self._cache[key]
+                if not future.done():
+                    future.set_result(values.get(key))
@@ -0,0 +1,103 @@
+from typing import Any, Dict, List, Optional, Tuple
+import gzip
+import json
+
+import brotli
+import msgpack
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+COLUMNAR = "application/vnd.drivecore.columnar+json"
+
+# Синонимы типов и порядок предпочтения при равном q
+MEDIA_TYPES = {
+    JSON: JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    COLUMNAR: COLUMNAR,
+}
+ENCODINGS = ("br", "gzip")
+
+
+def _parse_header(value: Optional[str]) -> List[Tuple[str, float]]:
+    """Разбор Accept/Accept-Encoding в список (значение, q)"""
+    result = []
+    for part in (value or "").split(","):
+        token, *params = [item.strip() for item in part.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        result.append((token.lower(), q))
+    return result
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Формат ответа по Accept; при неизвестных типах остается JSON"""
+    best, best_q = JSON, 0.0
+    for token, q in _parse_header(accept):
+        media_type = MEDIA_TYPES.get(token)
+        if media_type and q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Сжатие по Accept-Encoding (br предпочтительнее gzip при равном q)"""
+    offered = dict(_parse_header(accept_encoding))
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = offered.get(encoding, offered.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def to_columns(rows: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Строки в колонки: имена полей один раз, значения массивами"""
+    if not rows:
+        return {}
+    return {name: [row[name] for row in rows] for name in rows[0]}
+
+
+def encode_body(data: Dict[str, Any], media_type: str, rows_field: Optional[str] = None) -> bytes:
+    """Сериализовать JSON-совместимые данные в выбранный формат"""
+    if media_type == COLUMNAR and rows_field:
+        data = {**data, rows_field: to_columns(data[rows_field])}
+    if media_type == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Сжать тело ответа; уровни выбраны под динамические ответы, а не под архив"""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level)
+
+
+def render(request: Request, payload: BaseModel, rows_field: Optional[str] = None) -> Response:
+    """Ответ в формате и сжатии, согласованных с клиентом.
+
+    По умолчанию тело совпадает с обычным JSON-ответом FastAPI. rows_field -
+    поле со списком строк, которое в колоночном формате превращается в колонки.
+    """
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    body = encode_body(payload.model_dump(mode="json"), media_type, rows_field)
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding and len(body) >= settings.compression_min_size:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=media_type, headers=headers)
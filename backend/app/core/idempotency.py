@@ -0,0 +1,259 @@
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.ratelimit import client_id
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+HEADER = b"idempotency-key"
+METHODS = ("POST", "PUT", "PATCH", "DELETE")
+MAX_KEY_LENGTH = 255
+
+# Занять ключ или прочитать его состояние одним вызовом. Пока первый запрос
+# выполняется, в записи есть owner и TTL короткий (lock): если воркер
+# упал, ключ освободится сам. Возвращает {1} - ключ наш, иначе
+# {0, отпечаток запроса, сохраненный ответ или false}.
+BEGIN_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[1], 'owner', ARGV[1], 'fingerprint', ARGV[2])
+    redis.call('PEXPIRE', KEYS[1], ARGV[3])
+    return {1}
+end
+local state = redis.call('HMGET', KEYS[1], 'fingerprint', 'response')
+return {0, state[1], state[2]}
+"""
+
+# Сохранить ответ (ARGV[2] не пустой) или освободить ключ, только если
+# ключ все еще наш: после истечения lock его мог занять другой запрос
+FINISH_LUA = """
+if redis.call('HGET', KEYS[1], 'owner') ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] == '' then
+    redis.call('DEL', KEYS[1])
+else
+    redis.call('HSET', KEYS[1], 'response', ARGV[2])
+    redis.call('HDEL', KEYS[1], 'owner')
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return 1
+"""
+
+
+def _storable(status: int) -> bool:
+    # Ошибки сервера, конфликт и отказы по нагрузке не сохраняются:
+    # повтор с тем же ключом должен выполниться заново
+    return status < 500 and status not in (409, 429)
+
+
+class IdempotencyStore:
+    """Ответы на запросы с Idempotency-Key в Redis (hash на ключ клиента)"""
+
+    def __init__(self, prefix: str = "drivecore:idempotency"):
+        self.prefix = prefix
+        self._begin = redis_client.register_script(BEGIN_LUA)
+        self._finish = redis_client.register_script(FINISH_LUA)
+        self.stored = 0
+        self.replayed = 0
+        self.waited = 0
+        self.mismatched = 0
+        self.in_progress = 0
+
+    def key(self, client: str, idempotency_key: str) -> str:
+        return f"{self.prefix}:{client}:{idempotency_key}"
+
+    async def begin(self, key: str, owner: str, fingerprint: str) -> Optional[Tuple[str, Optional[dict]]]:
+        """None, если ключ занят этим запросом; иначе (отпечаток, ответ или None)"""
+        result = await self._begin(keys=[key], args=[owner, fingerprint, settings.idempotency_lock_seconds * 1000])
+        if result[0] == 1:
+            return None
+        response = json.loads(result[2]) if result[2] else None
+        return result[1], response
+
+    async def complete(self, key: str, owner: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> None:
+        response = json.dumps({
+            "status": status,
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers],
+            "body": base64.b64encode(body).decode(),
+        })
+        if await self._finish(keys=[key], args=[owner, response, settings.idempotency_ttl_seconds]):
+            self.stored += 1
+
+    async def release(self, key: str, owner: str) -> None:
+        await self._finish(keys=[key], args=[owner, "", 0])
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "stored": self.stored,
+            "replayed": self.replayed,
+            "waited": self.waited,
+            "mismatched": self.mismatched,
+            "in_progress": self.in_progress,
+        }
+
+
+idempotency_store = IdempotencyStore()
+
+
+class IdempotencyMiddleware:
+    """ASGI-middleware: повтор записи с тем же Idempotency-Key получает первый ответ.
+
+    Ключ действует в пределах клиента (как у ограничителя частоты) и
+    привязан к методу, пути и телу запроса: тот же ключ с другим запросом -
+    422. Повтор после завершения первого запроса отдается из Redis, до
+    обработчика и БД дело не доходит. Одновременный повтор ждет первый
+    запрос до idempotency_wait_seconds, затем получает 409. При
+    недоступности Redis запрос выполняется без идемпотентности.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.api_keys = frozenset(settings.rate_limit_api_keys)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in METHODS or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = dict(scope["headers"]).get(HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = idempotency_key.decode("latin-1").strip()
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key должен быть непустым и не длиннее {MAX_KEY_LENGTH} символов")
+            return
+
+        body, receive = await _read_body(receive)
+        fingerprint = hashlib.sha256(
+            b"\0".join((scope["method"].encode(), scope["path"].encode(), scope["query_string"], body))
+        ).hexdigest()
+        key = idempotency_store.key(client_id(scope, self.api_keys), idempotency_key)
+        owner = uuid4().hex
+
+        try:
+            record = await self._acquire(key, owner, fingerprint)
+        except RedisError as e:
+            logger.warning(f"Хранилище идемпотентности недоступно, запрос выполняется без него: {e}")
+            await self.app(scope, receive, send)
+            return
+        if record is not None:
+            stored_fingerprint, response = record
+            if stored_fingerprint != fingerprint:
+                idempotency_store.mismatched += 1
+                await _send_json(send, 422, "Idempotency-Key уже использован с другим запросом")
+            elif response is None:
+                await _send_json(send, 409, "Запрос с этим Idempotency-Key еще выполняется", retry_after=1)
+            else:
+                idempotency_store.replayed += 1
+                await _replay(send, response)
+            return
+
+        await self._run(scope, receive, send, key, owner)
+
+    async def _acquire(self, key: str, owner: str, fingerprint: str) -> Optional[Tuple[str, Optional[dict]]]:
+        """Занять ключ или дождаться ответа первого запроса"""
+        deadline = time.monotonic() + settings.idempotency_wait_seconds
+        delay = 0.05
+        waited = False
+        while True:
+            record = await idempotency_store.begin(key, owner, fingerprint)
+            if record is None or record[0] != fingerprint or record[1] is not None:
+                return record
+            if time.monotonic() + delay > deadline:
+                return record
+            if not waited:
+                idempotency_store.waited += 1
+                waited = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _run(self, scope, receive, send, key: str, owner: str) -> None:
+        status = 500
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+
+        async def capture(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status, headers = message["status"], list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        idempotency_store.in_progress += 1
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await self._release(key, owner)
+            raise
+        finally:
+            idempotency_store.in_progress -= 1
+
+        try:
+            if _storable(status):
+                await idempotency_store.complete(key, owner, status, headers, b"".join(chunks))
+            else:
+                await idempotency_store.release(key, owner)
+        except RedisError as e:
+            logger.warning(f"Не удалось сохранить ответ для Idempotency-Key: {e}")
+
+    @staticmethod
+    async def _release(key: str, owner: str) -> None:
+        try:
+            await idempotency_store.release(key, owner)
+        except RedisError as e:
+            logger.warning(f"Не удалось освободить Idempotency-Key: {e}")
+
+
+async def _read_body(receive):
+    """Прочитать тело запроса целиком и вернуть receive, который отдаст его заново"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    body = b"".join(chunks)
+    replayed = False
+
+    async def replay_receive():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return body, replay_receive
+
+
+async def _replay(send, response: dict) -> None:
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in response["headers"]]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": response["status"], "headers": headers})
+    await send({"type": "http.response.body", "body": base64.b64decode(response["body"])})
+
+
+async def _send_json(send, status_code: int, detail: str, retry_after: Optional[int] = None) -> None:
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def idempotency_stats() -> Dict[str, int]:
+    """Счетчики идемпотентности процесса"""
+    return idempotency_store.stats()
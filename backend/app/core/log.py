@@ -0,0 +1,179 @@
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+
+from app.core.config import settings
+
+# Стандартные атрибуты LogRecord; все остальное пришло через extra=
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+# Логгеры библиотек, которые ставят свои обработчики: переводим их в общую очередь
+_ROUTED_LOGGERS = ("uvicorn", "uvicorn.access")
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON; поля из extra= попадают в запись как есть"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Выборка и ограничение частоты записей ниже WARNING по префиксу логгера.
+
+    sample_rates - доля сохраняемых записей (0..1), rate_limits - записей в
+    секунду с запасом на секунду вперед. Для логгера берется правило с самым
+    длинным подходящим префиксом. Предупреждения и ошибки не отбрасываются.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float], rate_limits: Dict[str, float]):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.rate_limits = rate_limits
+        self.dropped: Dict[str, int] = {}
+        self._rules: Dict[str, Tuple[Optional[float], Optional[str]]] = {}
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _match(name: str, prefixes) -> Optional[str]:
+        best = None
+        for prefix in prefixes:
+            if (name == prefix or name.startswith(prefix + ".")) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return best
+
+    def _rule(self, name: str) -> Tuple[Optional[float], Optional[str]]:
+        rule = self._rules.get(name)
+        if rule is None:
+            sample = self._match(name, self.sample_rates)
+            rule = (
+                self.sample_rates[sample] if sample else None,
+                self._match(name, self.rate_limits)
+            )
+            self._rules[name] = rule
+        return rule
+
+    def _take(self, prefix: str) -> bool:
+        rate = self.rate_limits[prefix]
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(prefix, [rate, now])
+            bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        sample_rate, limit_prefix = self._rule(record.name)
+        if sample_rate is not None and random.random() >= sample_rate:
+            self._drop(record.name)
+            return False
+        if limit_prefix is not None and not self._take(limit_prefix):
+            self._drop(record.name)
+            return False
+        return True
+
+    def _drop(self, name: str) -> None:
+        self.dropped[name] = self.dropped.get(name, 0) + 1
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Кладет запись в очередь без форматирования и без ожидания.
+
+    Сообщение собирается из msg и args уже в потоке QueueListener, поэтому
+    запрос не платит за форматирование и запись в stdout. При переполненной
+    очереди запись отбрасывается и учитывается в dropped.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_filter: Optional[SamplingFilter] = None
+
+
+def setup_logging(stream=None) -> None:
+    """Корневой логгер пишет в очередь, вывод в stream делает отдельный поток"""
+    global _handler, _listener, _filter
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if settings.log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    _filter = SamplingFilter(settings.log_sample_rates, settings.log_rate_limits)
+    _handler = NonBlockingQueueHandler(queue.Queue(settings.log_queue_size))
+    _handler.addFilter(_filter)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(settings.log_level.upper())
+
+    for name in _ROUTED_LOGGERS:
+        routed = logging.getLogger(name)
+        routed.handlers.clear()
+        routed.propagate = True
+
+    # SQL при debug идет через тот же конвейер (echo движка добавил бы
+    # собственный синхронный вывод в stdout)
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if settings.debug else logging.WARNING)
+
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Дописать очередь и остановить поток вывода"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> dict:
+    """Отброшенные записи: переполнение очереди и выборка по логгерам"""
+    return {
+        "queue_size": _handler.queue.qsize() if _handler else 0,
+        "queue_dropped": _handler.dropped if _handler else 0,
+        "sampled_out": dict(_filter.dropped) if _filter else {},
+    }
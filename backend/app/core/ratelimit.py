@@ -0,0 +1,233 @@
+from dataclasses import dataclass
+from typing import AbstractSet, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import math
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+READ = "read"
+WRITE = "write"
+BULK = "bulk"
+
+# Пакетные эндпоинты (суффиксы пути) со своим, более строгим бюджетом
+BULK_PATHS = (
+    "/vehicles/mileage-readings",
+    "/vehicles/locations",
+    "/reports/jobs",
+    "/penalties/imports",
+)
+
+# POST-эндпоинты, которые только читают, идут по бюджету чтений
+READ_PATHS = (
+    "/vehicles/batch-get",
+)
+
+# Пути без ограничений
+EXEMPT_PATHS = ("/health", "/api/v1/ping", "/api/v1/metrics")
+
+# Token bucket: токены пополняются со скоростью rate в секунду до burst.
+# Состояние и время берутся в Redis атомарно, так что лимит общий для всех
+# воркеров и не зависит от часов серверов приложения.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = burst
+    ts = now
+end
+
+tokens = math.min(burst, tokens + (now - ts) * rate / 1000)
+local allowed = 0
+local retry_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_ms = math.ceil((1 - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return {allowed, retry_ms}
+"""
+
+
+def client_id(scope, api_keys: AbstractSet[str] = frozenset()) -> str:
+    """Клиент запроса: по X-API-Key из списка известных, иначе по адресу подключения.
+
+    Произвольный ключ не дает своего бюджета: иначе клиент, меняющий ключ
+    в каждом запросе, каждый раз получал бы полный bucket. В Redis
+    попадает хэш ключа, а не сам ключ.
+    """
+    for name, value in scope["headers"]:
+        if name == b"x-api-key":
+            key = value.decode("latin-1")
+            if key in api_keys:
+                return "key:" + hashlib.sha256(key.encode()).hexdigest()[:16]
+            break
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Бюджет класса запросов: скорость на клиента и число одновременных запросов"""
+    rate: float
+    burst: int
+    concurrency: int
+
+
+def get_budgets() -> Dict[str, Budget]:
+    """Бюджеты чтений, записей и пакетных запросов из настроек"""
+    return {
+        READ: Budget(settings.rate_limit_read_per_second, settings.rate_limit_read_burst,
+                     settings.db_pool_size + settings.db_max_overflow),
+        WRITE: Budget(settings.rate_limit_write_per_second, settings.rate_limit_write_burst,
+                      settings.concurrency_write_limit),
+        BULK: Budget(settings.rate_limit_bulk_per_second, settings.rate_limit_bulk_burst,
+                     settings.concurrency_bulk_limit),
+    }
+
+
+def classify(method: str, path: str) -> str:
+    """Класс запроса для выбора бюджета"""
+    if path.rstrip("/").endswith(BULK_PATHS):
+        return BULK
+    if method in ("GET", "HEAD", "OPTIONS") or path.rstrip("/").endswith(READ_PATHS):
+        return READ
+    return WRITE
+
+
+class TokenBucketLimiter:
+    """Ограничение частоты запросов клиента, состояние в Redis"""
+
+    def __init__(self, prefix: str = "drivecore:ratelimit"):
+        self.prefix = prefix
+        self._script = redis_client.register_script(TOKEN_BUCKET_LUA)
+        self.rejected = 0
+
+    async def acquire(self, client_id: str, kind: str, budget: Budget) -> Tuple[bool, float]:
+        """Взять токен; возвращает (разрешено, через сколько секунд повторить).
+
+        При недоступности Redis запрос пропускается: ограничитель не должен
+        становиться причиной отказа всего API. Ожидание Redis ограничено
+        redis_socket_timeout, так что пропуск не зависает при обрыве сети.
+        """
+        try:
+            allowed, retry_ms = await self._script(
+                keys=[f"{self.prefix}:{kind}:{client_id}"],
+                args=[budget.rate, budget.burst]
+            )
+        except RedisError as e:
+            logger.warning(f"Ограничитель частоты недоступен, запрос пропущен: {e}")
+            return True, 0.0
+        if not allowed:
+            self.rejected += 1
+        return bool(allowed), int(retry_ms) / 1000
+
+
+class ConcurrencyLimiter:
+    """Ограничение одновременных запросов процесса размером пула БД.
+
+    Запрос не ждет свободного места: если пул занят, лучше сразу ответить
+    503, чем держать соединение клиента и копить очередь. Записи и пакетные
+    запросы имеют свои потолки внутри общего, чтобы не вытеснять чтения.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.in_flight = 0
+        self.by_kind: Dict[str, int] = {}
+        self.rejected = 0
+
+    def try_acquire(self, kind: str, limit: int) -> bool:
+        if self.in_flight >= self.total or self.by_kind.get(kind, 0) >= limit:
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+        return True
+
+    def release(self, kind: str) -> None:
+        self.in_flight -= 1
+        self.by_kind[kind] -= 1
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "limit": self.total,
+            "in_flight": self.in_flight,
+            "in_flight_by_kind": dict(self.by_kind),
+            "rejected": self.rejected,
+        }
+
+
+# Общие для процесса ограничители
+rate_limiter = TokenBucketLimiter()
+concurrency_limiter = ConcurrencyLimiter(settings.db_pool_size + settings.db_max_overflow)
+
+
+class LoadSheddingMiddleware:
+    """ASGI-middleware: лимит частоты на клиента (429) и одновременных запросов (503)"""
+
+    def __init__(self, app, enabled: Optional[bool] = None):
+        self.app = app
+        self.enabled = settings.rate_limit_enabled if enabled is None else enabled
+        self.budgets = get_budgets()
+        self.api_keys = frozenset(settings.rate_limit_api_keys)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled or not scope["path"].startswith("/api/") \
+                or scope["path"].rstrip("/").startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        kind = classify(scope["method"], scope["path"])
+        budget = self.budgets[kind]
+
+        allowed, retry_after = await rate_limiter.acquire(client_id(scope, self.api_keys), kind, budget)
+        if not allowed:
+            await self._reject(send, 429, "Слишком много запросов", retry_after)
+            return
+
+        if not concurrency_limiter.try_acquire(kind, budget.concurrency):
+            await self._reject(send, 503, "Сервер перегружен, повторите запрос позже", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            concurrency_limiter.release(kind)
+
+    @staticmethod
+    async def _reject(send, status_code: int, detail: str, retry_after: float) -> None:
+        body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def load_shedding_stats() -> Dict[str, object]:
+    """Счетчики ограничения нагрузки процесса"""
+    return {
+        "rate_limited": rate_limiter.rejected,
+        "concurrency": concurrency_limiter.stats(),
+    }
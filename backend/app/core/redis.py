@@ -0,0 +1,29 @@
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+# Общий клиент Redis процесса приложения (соединения создаются лениво).
+# Таймауты не дают запросу зависнуть при обрыве сети: ограничитель частоты
+# и идемпотентность в этом случае пропускают запрос.
+redis_client = Redis.from_url(
+    settings.redis_url,
+    decode_responses=True,
+    socket_timeout=settings.redis_socket_timeout,
+    socket_connect_timeout=settings.redis_socket_connect_timeout
+)
+
+# Клиент подписки шины событий: без таймаута чтения. В старых redis-py
+# listen() ждет сообщения с socket_timeout, и тихий канал обрывался бы
+# каждые полсекунды (переподключение и resync всех индексов)
+pubsub_client = Redis.from_url(
+    settings.redis_url,
+    decode_responses=True,
+    socket_timeout=None,
+    socket_connect_timeout=settings.redis_socket_connect_timeout
+)
+
+
+async def close_redis():
+    """Закрыть соединения с Redis"""
+    await pubsub_client.aclose()
+    await redis_client.aclose()
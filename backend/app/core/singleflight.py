@@ -0,0 +1,68 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    """Запрос-лидер отменен, ожидающие должны выполнить вызов сами"""
+
+
+class SingleFlight:
+    """Объединение одинаковых одновременных вызовов в пределах процесса.
+
+    Первый вызов с ключом (лидер) выполняет функцию, остальные вызовы с тем
+    же ключом, пришедшие до ее завершения, ждут и получают тот же результат
+    или то же исключение. Результат не кэшируется: после завершения лидера
+    следующий вызов снова идет в источник.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Выполнить fn или присоединиться к уже идущему вызову с тем же ключом"""
+        self.calls += 1
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            try:
+                # shield: отмена ожидающего не должна отменять общий результат
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.executions += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Помечаем исключение полученным, даже если ожидающих нет
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики объединения запросов"""
+        coalesced = self.calls - self.executions
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": coalesced,
+            "coalescing_ratio": round(coalesced / self.calls, 4) if self.calls else 0.0,
+            "in_flight": len(self._inflight),
+        }
@@ -0,0 +1,448 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Заголовок W3C Trace Context: версия-trace_id-span_id-флаги
+TRACEPARENT = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# Ответ с записанной трассой получает ее идентификатор
+TRACE_ID_HEADER = b"x-trace-id"
+
+# Процесс в выгрузке: api или worker (задают сигналы воркера Celery)
+process_role = "api"
+
+# Текущий спан задачи asyncio или потока
+_current: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+
+
+class Span:
+    """Операция трассы; sampled=False - спан только передает решение выборки"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind", "sampled",
+        "attributes", "status", "started_at", "_started", "duration_ms"
+    )
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.attributes: Dict[str, Any] = {}
+        self.status = "ok"
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def set_error(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.set_attribute("error", f"{type(exc).__name__}: {exc}"[:500])
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def end(self) -> None:
+        if self.duration_ms is None:
+            self.duration_ms = (time.perf_counter() - self._started) * 1000
+            if self.sampled:
+                _exporter.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(timespec="microseconds"),
+            "duration_ms": round(self.duration_ms or 0.0, 3),
+            "status": self.status,
+            "service": settings.tracing_service_name,
+            "role": process_role,
+            "pid": os.getpid(),
+            "attributes": self.attributes,
+        }
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """trace_id, span_id родителя и флаг выборки из заголовка traceparent"""
+    match = _TRACEPARENT_RE.match((value or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(
+    name: str,
+    kind: str = "internal",
+    traceparent: Optional[str] = None,
+    root: bool = True
+) -> Optional[Span]:
+    """Начать спан: дочерний для текущего или для traceparent другого процесса.
+
+    Решение о выборке принимается один раз в корне трассы (доля
+    tracing_sample_rate) и дальше наследуется, в том числе через
+    traceparent. root=False - только внутри существующей трассы: для
+    SQL и прочих операций, которые сами по себе трассу не начинают.
+    """
+    if not settings.tracing_enabled:
+        return None
+    parent = _current.get()
+    if parent is not None:
+        if not parent.sampled:
+            # Трасса не пишется: новый спан не нужен, решение передает родитель
+            return parent
+        return Span(name, kind, parent.trace_id, parent.span_id, parent.sampled)
+    remote = parse_traceparent(traceparent)
+    if remote is not None:
+        return Span(name, kind, remote[0], remote[1], remote[2])
+    if not root:
+        return None
+    sampled = random.random() < settings.tracing_sample_rate
+    return Span(name, kind, f"{random.getrandbits(128):032x}", None, sampled)
+
+
+def activate(span: Optional[Span]) -> Token:
+    """Сделать спан текущим; вернуть токен для deactivate"""
+    return _current.set(span)
+
+
+def deactivate(token: Token) -> None:
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Токен из другого контекста: текущий спан этого контекста не трогаем
+        pass
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Optional[Span]]:
+    """Спан вокруг блока кода; ошибка блока отмечается в спане"""
+    current = start_span(name, kind, root=False)
+    if current is None or not current.sampled:
+        yield current
+        return
+    for key, value in attributes.items():
+        current.set_attribute(key, value)
+    token = activate(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set_error(e)
+        raise
+    finally:
+        deactivate(token)
+        current.end()
+
+
+class SpanExporter:
+    """Завершенные спаны: буфер процесса и файл JSON lines.
+
+    Запрос только кладет спан в очередь; в файл спаны пишет отдельный
+    поток пачками. При переполненной очереди спан в файл не попадает
+    (учитывается в dropped), в буфере процесса он есть всегда. Файл
+    открывается на каждую пачку в режиме дописывания, поэтому в него
+    могут писать несколько процессов, а при превышении
+    tracing_file_max_mb он переименовывается в .1.
+    """
+
+    def __init__(self):
+        self.recent: Deque[Span] = deque(maxlen=settings.tracing_buffer_spans)
+        self.exported = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(settings.tracing_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        self.recent.append(span)
+        self.exported += 1
+        if not settings.tracing_file:
+            return
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        # Поток создается в каждом процессе при первом спане: после fork
+        # потока родителя в дочернем процессе нет
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(settings.tracing_queue_size)
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < 1000:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: List[Span]) -> None:
+        path = settings.tracing_file
+        lines = "".join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n" for span in batch)
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            try:
+                if os.path.getsize(path) > settings.tracing_file_max_mb * 1024 * 1024:
+                    os.replace(path, path + ".1")
+            except FileNotFoundError:
+                pass
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            self.write_errors += 1
+            if self.write_errors == 1:
+                logger.warning(f"Не удалось записать спаны в {path}: {e}")
+
+    def flush(self, timeout: float = 5) -> None:
+        """Дописать очередь в файл и остановить поток"""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout=timeout)
+        self._thread = None
+        self._pid = None
+
+    def traces(self, min_ms: float = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """Корневые спаны процесса из буфера, самые долгие первыми"""
+        roots = [
+            s for s in list(self.recent)
+            if (s.parent_id is None or s.kind == "server") and (s.duration_ms or 0) >= min_ms
+        ]
+        roots.sort(key=lambda s: s.duration_ms or 0, reverse=True)
+        return [s.to_dict() for s in roots[:limit]]
+
+    def trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Спаны трассы из буфера процесса в порядке начала"""
+        spans = [s for s in list(self.recent) if s.trace_id == trace_id]
+        spans.sort(key=lambda s: s.started_at)
+        return [s.to_dict() for s in spans]
+
+
+_exporter = SpanExporter()
+
+
+def recent_traces(min_ms: float = 0, limit: int = 20) -> List[Dict[str, Any]]:
+    return _exporter.traces(min_ms, limit)
+
+
+def get_trace(trace_id: str) -> List[Dict[str, Any]]:
+    return _exporter.trace(trace_id)
+
+
+def stop_tracing() -> None:
+    _exporter.flush()
+
+
+def tracing_stats() -> dict:
+    return {
+        "enabled": settings.tracing_enabled,
+        "sample_rate": settings.tracing_sample_rate,
+        "exported": _exporter.exported,
+        "buffered": len(_exporter.recent),
+        "queue_dropped": _exporter.dropped,
+        "write_errors": _exporter.write_errors,
+    }
+
+
+class TracingMiddleware:
+    """Спан на каждый HTTP-запрос.
+
+    Родитель берется из заголовка traceparent, если клиент его прислал.
+    Спан становится текущим для обработчика, поэтому запросы к БД и
+    задачи Celery запроса попадают в ту же трассу. Имя спана - путь с
+    параметрами маршрута (/api/v1/vehicles/{vehicle_id}), а не значениями.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.tracing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        method = scope["method"]
+        current = start_span(f"{method} {scope['path']}", "server", traceparent)
+        if not current.sampled:
+            # Решение выборки все равно передается дальше (в задачи Celery)
+            token = activate(current)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                deactivate(token)
+            return
+
+        current.set_attribute("http.method", method)
+        current.set_attribute("http.target", scope["path"])
+        if scope.get("query_string"):
+            current.set_attribute("http.query", scope["query_string"].decode("latin-1")[:500])
+
+        async def send_with_trace(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                current.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    current.status = "error"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (TRACE_ID_HEADER, current.trace_id.encode())
+                ]
+            await send(message)
+
+        token = activate(current)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except BaseException as e:
+            current.set_error(e)
+            raise
+        finally:
+            deactivate(token)
+            if scope.get("route") is not None:
+                current.name = f"{method} {_route_template(scope)}"
+            current.end()
+
+
+def _route_template(scope: Scope) -> str:
+    """Путь запроса с параметрами маршрута вместо значений"""
+    path = scope["path"]
+    for name, value in (scope.get("path_params") or {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+
+# SQLAlchemy: спан на каждый запрос курсора и на фиксацию сессии. События
+# вызываются в greenlet, который делит контекст с задачей asyncio, поэтому
+# текущий спан запроса HTTP или задачи Celery здесь виден.
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = start_span("db.query", "client", root=False)
+    if current is None or not current.sampled:
+        return
+    current.set_attribute("db.statement", statement[:settings.tracing_max_statement_length])
+    if executemany:
+        current.set_attribute("db.executemany", len(parameters))
+    if context is not None:
+        context._trace_span = current
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = getattr(context, "_trace_span", None)
+    if current is None:
+        return
+    context._trace_span = None
+    rowcount = getattr(cursor, "rowcount", -1)
+    if rowcount is not None and rowcount >= 0:
+        current.set_attribute("db.rows", rowcount)
+    current.end()
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    current = getattr(context, "_trace_span", None)
+    if current is None:
+        return
+    context._trace_span = None
+    current.set_error(exception_context.original_exception)
+    current.end()
+
+
+# Фиксация: спан от начала commit сессии (flush: INSERT/UPDATE) до COMMIT;
+# запросы flush становятся его дочерними
+
+def _before_commit(session):
+    current = start_span("db.commit", "internal", root=False)
+    if current is None or not current.sampled:
+        return
+    session.info["_trace"] = (current, activate(current))
+
+
+def _end_commit(session, error: bool = False):
+    started = session.info.pop("_trace", None)
+    if started is None:
+        return
+    current, token = started
+    deactivate(token)
+    if error:
+        current.status = "error"
+    current.end()
+
+
+def _after_rollback(session):
+    # Фиксация не удалась (после успешной спана уже нет)
+    _end_commit(session, error=True)
+
+
+_instrumented = False
+
+
+def setup_tracing() -> None:
+    """Подключить события SQLAlchemy (всех движков процесса); повторный вызов ничего не делает"""
+    global _instrumented
+    if _instrumented or not settings.tracing_enabled:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _end_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
+    _instrumented = True
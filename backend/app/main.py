@@ -2,20 +2,22 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
-import sys
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.log import setup_logging, stop_logging
+from app.core.ratelimit import LoadSheddingMiddleware
+from app.core.tracing import TracingMiddleware, setup_tracing, stop_tracing
+from app.core.redis import close_redis
 from app.api.v1.router import api_router
+from app.services.events import vehicle_events
+from app.services.nearest import nearest_vehicles
+from app.services.suggest import plate_suggester
 
 # Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+setup_logging()
+setup_tracing()
 
 logger = logging.getLogger(__name__)
 
@@ -28,10 +30,24 @@ async def lifespan(app: FastAPI):
     # Инициализация БД
     await init_db()
     
+    # Индексы подсказок и ближайших автомобилей строятся в фоне
+    # и обновляются событиями
+    vehicle_events.subscribe(plate_suggester.handle_event)
+    vehicle_events.subscribe(nearest_vehicles.handle_event)
+    await vehicle_events.start()
+    plate_suggester.start_rebuild(AsyncSessionLocal)
+    nearest_vehicles.start_rebuild(AsyncSessionLocal)
+    
     yield
     
     # Shutdown
     logger.info("🛑 Остановка DriveCore API")
+    await plate_suggester.stop()
+    await nearest_vehicles.stop()
+    await vehicle_events.stop()
+    await close_redis()
+    stop_tracing()
+    stop_logging()
 
 app = FastAPI(
     title="DriveCore API",
@@ -42,6 +58,14 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Ограничение нагрузки (добавлено раньше CORS, поэтому работает внутри него
+# и отказы получают CORS-заголовки)
+app.add_middleware(LoadSheddingMiddleware)
+
+# Повторы записей с Idempotency-Key (снаружи ограничения нагрузки: повтор
+# из Redis и ожидание первого запроса не занимают места записей)
+app.add_middleware(IdempotencyMiddleware)
+
 # Настройка CORS
 app.add_middleware(
     CORSMiddleware,
@@ -51,6 +75,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Трассировка запросов (снаружи всех, чтобы спан запроса включал их время)
+app.add_middleware(TracingMiddleware)
+
 # Подключение роутеров
 app.include_router(api_router, prefix="/api/v1")
 
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, String
+
+from .base import Base
+
+
+class JobCheckpoint(Base):
+    """Позиция, до которой инкрементальная фоновая задача обработала данные"""
+    __tablename__ = "job_checkpoints"
+
+    name = Column(String(100), primary_key=True)
+    checkpoint_at = Column(DateTime(timezone=True), nullable=False)
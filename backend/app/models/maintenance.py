@@ -0,0 +1,55 @@
+from sqlalchemy import Column, Boolean, CheckConstraint, Date, DateTime, ForeignKey, Identity, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class MaintenanceInterval(Base):
+    """Регламент ТО: пробег и срок между обслуживаниями.
+
+    Строка с model = NULL действует для всех моделей марки, строка с
+    моделью - только для нее. Для марок без строк берется регламент из
+    настроек (maintenance_default_interval_*).
+    """
+    __tablename__ = "maintenance_intervals"
+
+    id = Column(Integer, Identity(), primary_key=True)
+    brand = Column(String(100), nullable=False)
+    model = Column(String(100), nullable=True)
+    interval_km = Column(Integer, nullable=False)
+    interval_months = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('idx_maintenance_interval_brand_model', 'brand', 'model', unique=True, postgresql_nulls_not_distinct=True),
+        CheckConstraint('interval_km > 0 AND interval_months > 0', name='check_maintenance_interval_positive'),
+    )
+
+
+class VehicleMaintenance(Base):
+    """График ТО автомобиля.
+
+    last_service_* - последнее ТО, отмеченное вручную; остальные колонки
+    пересчитывает задача refresh_maintenance_schedule. next_service_on -
+    раньшая из дат: по сроку регламента и прогноз, когда при среднем
+    пробеге в день будет достигнут next_service_km.
+    """
+    __tablename__ = "vehicle_maintenance"
+
+    vehicle_id = Column(UUID(as_uuid=True), ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True)
+    last_service_km = Column(Integer, nullable=True)
+    last_service_on = Column(Date, nullable=True)
+    interval_km = Column(Integer, nullable=False)
+    interval_months = Column(Integer, nullable=False)
+    next_service_km = Column(Integer, nullable=False)
+    next_service_on = Column(Date, nullable=False)
+    km_left = Column(Integer, nullable=False)  # отрицательный - ТО просрочено по пробегу
+    overdue = Column(Boolean, nullable=False)
+    # Время последнего изменения рассчитанных колонок
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Запрос «ТО в ближайшие N км или дней»: BitmapOr по двум индексам
+        Index('idx_vehicle_maintenance_km_left', 'km_left'),
+        Index('idx_vehicle_maintenance_next_service_on', 'next_service_on'),
+    )
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, Index, CheckConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class VehicleMileageReading(Base):
+    """Показание одометра от телематики.
+
+    Таблица секционирована по месяцам recorded_at; секции создает
+    MileageService.ensure_partitions (задача и разовая подготовка), месяц
+    без секции попадает в секцию по умолчанию. Первичный ключ включает ключ
+    секционирования, поэтому повторная отправка показания отбрасывается.
+    """
+    __tablename__ = "vehicle_mileage_readings"
+
+    vehicle_id = Column(UUID(as_uuid=True), ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True)
+    recorded_at = Column(DateTime(timezone=True), primary_key=True)
+    mileage_km = Column(Integer, nullable=False)
+    # Время приема, по нему задача свертки находит новые показания
+    ingested_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_mileage_reading_recorded_at', 'recorded_at', postgresql_using='brin'),
+        Index('idx_mileage_reading_ingested_at', 'ingested_at', postgresql_using='brin'),
+        CheckConstraint('mileage_km >= 0', name='check_reading_mileage_positive'),
+        {'postgresql_partition_by': 'RANGE (recorded_at)'},
+    )
+
+
+class VehicleMileageDaily(Base):
+    """Дневная свертка показаний одометра"""
+    __tablename__ = "vehicle_mileage_daily"
+
+    vehicle_id = Column(UUID(as_uuid=True), ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    min_km = Column(Integer, nullable=False)
+    max_km = Column(Integer, nullable=False)
+    readings = Column(Integer, nullable=False)
+
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, BigInteger, Date, DateTime, Identity, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class OsagoNotification(Base):
+    """Уведомление об окончании полиса ОСАГО.
+
+    Одна строка на автомобиль, дату окончания и вид (expiring/expired), поэтому
+    повторный запуск проверки не создает повторных уведомлений. enqueued_at
+    ставится при постановке в очередь, sent_at - после отправки.
+    """
+    __tablename__ = "osago_notifications"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    vehicle_id = Column(UUID(as_uuid=True), nullable=False)
+    policy_number = Column(String(50), nullable=True)
+    expires_on = Column(Date, nullable=False)
+    kind = Column(String(20), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    enqueued_at = Column(DateTime(timezone=True), nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('idx_osago_notification_unique', 'vehicle_id', 'expires_on', 'kind', unique=True),
+        Index('idx_osago_notification_pending', 'id', postgresql_where=enqueued_at.is_(None)),
+    )
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, BigInteger, DateTime, ForeignKey, Identity, Index, Numeric, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class Penalty(Base):
+    """Штраф за нарушение ПДД из файла выгрузки.
+
+    uin - номер постановления (УИН), по нему повторный импорт того же
+    файла не создает дублей. vehicle_id NULL - номер не найден в реестре
+    на момент импорта; такие штрафы сопоставляются при следующем
+    импорте, где они встретятся.
+    """
+    __tablename__ = "penalties"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    uin = Column(String(25), nullable=False)
+    plate_number = Column(String(20), nullable=False)
+    vehicle_id = Column(UUID(as_uuid=True), ForeignKey("vehicles.id", ondelete="SET NULL"), nullable=True)
+    violated_at = Column(DateTime(timezone=True), nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
+    article = Column(String(50), nullable=True)  # статья КоАП
+    location = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_penalty_uin', 'uin', unique=True),
+        Index('idx_penalty_vehicle_violated_at', 'vehicle_id', 'violated_at'),
+        Index('idx_penalty_unmatched_violated_at', 'violated_at', postgresql_where=vehicle_id.is_(None)),
+    )
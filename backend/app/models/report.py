@@ -0,0 +1,41 @@
+from sqlalchemy import Column, BigInteger, DateTime, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from .base import Base, TimestampMixin, UUIDMixin
+
+# Состояния задания отчета
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATES = (PENDING, RUNNING)
+
+
+class ReportJob(Base, UUIDMixin, TimestampMixin):
+    """Задание на построение отчета в фоне.
+
+    params_hash - хэш формата и фильтров: пока задание с тем же хэшем ждет
+    или выполняется, новое не создается (частичный уникальный индекс).
+    updated_at обновляется с каждой записанной порцией строк и служит
+    признаком жизни воркера.
+    """
+    __tablename__ = "report_jobs"
+
+    format = Column(String(10), nullable=False)
+    params = Column(JSONB, nullable=False)
+    params_hash = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default=PENDING)
+    total_rows = Column(Integer, nullable=True)
+    rows_done = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    file_size = Column(BigInteger, nullable=True)
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index(
+            'idx_report_job_active_params', 'params_hash', unique=True,
+            postgresql_where=status.in_(ACTIVE_STATES)
+        ),
+        Index('idx_report_job_created_at', 'created_at'),
+    )
@@ -0,0 +1,84 @@
+from sqlalchemy import Column, BigInteger, Integer, Float, Date, DateTime, Enum, Index, Identity
+from sqlalchemy.dialects.postgresql import UUID
+
+from .base import Base
+from .vehicle import VehicleStatus, VehicleCity
+
+
+class VehicleStatusTransition(Base):
+    """Смена статуса или города автомобиля (журнал только на добавление).
+
+    Пишется в одной транзакции с изменением автомобиля. Создание
+    автомобиля записывается без from_*, удаление без to_*. Ссылки на
+    vehicles нет, чтобы история переживала удаление автомобиля.
+    """
+    __tablename__ = "vehicle_status_transitions"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    vehicle_id = Column(UUID(as_uuid=True), nullable=False)
+    changed_at = Column(DateTime(timezone=True), nullable=False)
+    from_status = Column(Enum(VehicleStatus), nullable=True)
+    from_city = Column(Enum(VehicleCity), nullable=True)
+    # Начало интервала, который закрывает эта смена
+    from_changed_at = Column(DateTime(timezone=True), nullable=True)
+    to_status = Column(Enum(VehicleStatus), nullable=True)
+    to_city = Column(Enum(VehicleCity), nullable=True)
+
+    __table_args__ = (
+        Index('idx_status_transition_vehicle_changed_at', 'vehicle_id', 'changed_at'),
+        Index('idx_status_transition_changed_at', 'changed_at', postgresql_using='brin'),
+    )
+
+
+class VehicleStatusLevel(Base):
+    """Число автомобилей в статусе и городе на момент позиции свертки"""
+    __tablename__ = "vehicle_status_levels"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    city = Column(Enum(VehicleCity), nullable=True)
+    status = Column(Enum(VehicleStatus), nullable=False)
+    vehicles = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('idx_status_level_unique', 'city', 'status', unique=True, postgresql_nulls_not_distinct=True),
+    )
+
+
+class VehicleStatusHourly(Base):
+    """Автомобиле-секунды в статусе по городам за час"""
+    __tablename__ = "vehicle_status_hourly"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    hour = Column(DateTime(timezone=True), nullable=False)
+    city = Column(Enum(VehicleCity), nullable=True)
+    status = Column(Enum(VehicleStatus), nullable=False)
+    seconds = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index('idx_status_hourly_unique', 'hour', 'city', 'status', unique=True, postgresql_nulls_not_distinct=True),
+    )
+
+
+class VehicleStatusDaily(Base):
+    """Автомобиле-секунды в статусе по городам за день (в часовом поясе приложения)"""
+    __tablename__ = "vehicle_status_daily"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    day = Column(Date, nullable=False)
+    city = Column(Enum(VehicleCity), nullable=True)
+    status = Column(Enum(VehicleStatus), nullable=False)
+    seconds = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index('idx_status_daily_unique', 'day', 'city', 'status', unique=True, postgresql_nulls_not_distinct=True),
+    )
+
+
+class VehicleStatusVehicleDaily(Base):
+    """Секунды в статусе по автомобилю за день, из закрытых интервалов"""
+    __tablename__ = "vehicle_status_vehicle_daily"
+
+    vehicle_id = Column(UUID(as_uuid=True), primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(VehicleStatus), primary_key=True)
+    seconds = Column(Float, nullable=False)
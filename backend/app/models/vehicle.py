@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Enum, Index, CheckConstraint
+from sqlalchemy import Column, String, Integer, Float, Enum, Index, CheckConstraint, Date, DateTime
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -31,27 +31,53 @@ class Vehicle(Base, UUIDMixin, TimestampMixin):
     __tablename__ = "vehicles"
 
     # Основные поля
-    plate_number = Column(String(20), nullable=False, unique=True, index=True)
-    vin = Column(String(17), nullable=True, unique=True, index=True)
+    plate_number = Column(String(20), nullable=False)
+    vin = Column(String(17), nullable=True)
     brand = Column(String(100), nullable=False)
     model = Column(String(100), nullable=False)
     year = Column(Integer, nullable=False)
     color = Column(String(50), nullable=True)
-    status = Column(Enum(VehicleStatus), nullable=False, default=VehicleStatus.AVAILABLE, index=True)
+    status = Column(Enum(VehicleStatus), nullable=False, default=VehicleStatus.AVAILABLE)
+    # Время последней смены статуса или города (начало текущего интервала)
+    status_changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     mileage_km = Column(Integer, nullable=False, default=0)
-    city = Column(Enum(VehicleCity), nullable=True, index=True)
+    city = Column(Enum(VehicleCity), nullable=True)
+    # Последние известные координаты (WGS 84) и время их снятия
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    location_updated_at = Column(DateTime(timezone=True), nullable=True)
     owner_name = Column(String(200), nullable=True)
     osago_policy_number = Column(String(50), nullable=True)
+    osago_starts_on = Column(Date, nullable=True)
+    osago_expires_on = Column(Date, nullable=True)  # последний день действия полиса
 
-    # Индексы
+    # Индексы (все объявлены здесь, без index=True/unique=True на колонках,
+    # чтобы create_all не строил дубликаты)
     __table_args__ = (
-        Index('idx_vehicle_status', 'status'),
-        Index('idx_vehicle_city', 'city'),
         Index('idx_vehicle_plate_unique', 'plate_number', unique=True),
         Index('idx_vehicle_vin_unique', 'vin', unique=True, postgresql_where=vin.isnot(None)),
+        # Фильтры списка + сортировка по дате создания (по умолчанию -created_at)
+        Index('idx_vehicle_created_at', 'created_at'),
+        Index('idx_vehicle_status_created_at', 'status', 'created_at'),
+        Index('idx_vehicle_city_created_at', 'city', 'created_at'),
+        # Самый частый запрос диспетчеров: свободные машины в городе
+        Index(
+            'idx_vehicle_available_city_created_at', 'city', 'created_at',
+            postgresql_where=status == VehicleStatus.AVAILABLE
+        ),
+        # Ночная проверка ОСАГО читает только диапазон дат окончания
+        Index(
+            'idx_vehicle_osago_expires_on', 'osago_expires_on', 'id',
+            postgresql_where=osago_expires_on.isnot(None)
+        ),
         CheckConstraint('year >= 1990 AND year <= EXTRACT(YEAR FROM NOW()) + 1', name='check_year_range'),
         CheckConstraint('mileage_km >= 0', name='check_mileage_positive'),
         CheckConstraint("plate_number ~ '^[АВЕКМНОРСТУХ]\\d{3}[АВЕКМНОРСТУХ]{2}\\d{2,3}$'", name='check_plate_format'),
+        CheckConstraint('osago_expires_on >= osago_starts_on', name='check_osago_period'),
+        CheckConstraint(
+            '(latitude IS NULL) = (longitude IS NULL) AND latitude BETWEEN -90 AND 90 AND longitude BETWEEN -180 AND 180',
+            name='check_location'
+        ),
         CheckConstraint("vin ~ '^[A-HJ-NPR-Z0-9]{17}$'", name='check_vin_format'),
     )
 
@@ -0,0 +1,46 @@
+from pydantic import BaseModel, Field, validator
+from typing import List
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+
+class VehicleLocationIn(BaseModel):
+    """Координаты автомобиля от телематики"""
+    vehicle_id: UUID = Field(..., description="ID автомобиля")
+    recorded_at: datetime = Field(..., description="Время снятия координат")
+    latitude: float = Field(..., ge=-90, le=90, description="Широта")
+    longitude: float = Field(..., ge=-180, le=180, description="Долгота")
+
+    @validator('recorded_at')
+    def validate_recorded_at(cls, v):
+        """Время без часового пояса считается UTC, будущее не принимается"""
+        if v.tzinfo is None:
+            v = v.replace(tzinfo=timezone.utc)
+        if v > datetime.now(timezone.utc) + timedelta(minutes=5):
+            raise ValueError('Время координат не может быть в будущем')
+        return v
+
+
+class VehicleLocationBatch(BaseModel):
+    """Пакет координат"""
+    locations: List[VehicleLocationIn] = Field(..., min_length=1, max_length=10000)
+
+
+class VehicleLocationIngestResponse(BaseModel):
+    """Результат приема пакета координат"""
+    received: int
+    updated: int
+
+
+class VehicleNearby(BaseModel):
+    """Свободный автомобиль рядом с точкой"""
+    id: UUID
+    plate_number: str
+    latitude: float
+    longitude: float
+    distance_km: float
+
+
+class VehicleNearestResponse(BaseModel):
+    """Ближайшие свободные автомобили по возрастанию расстояния"""
+    items: List[VehicleNearby]
@@ -0,0 +1,49 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date, datetime
+from uuid import UUID
+
+from app.models.vehicle import VehicleStatus, VehicleCity
+
+
+class MaintenanceServiceIn(BaseModel):
+    """Отметка о проведенном ТО"""
+    mileage_km: int = Field(..., ge=0, description="Пробег на момент ТО, км")
+    service_on: Optional[date] = Field(None, description="Дата ТО (по умолчанию сегодня)")
+
+
+class VehicleMaintenanceResponse(BaseModel):
+    """График ТО автомобиля"""
+    vehicle_id: UUID
+    last_service_km: Optional[int] = None
+    last_service_on: Optional[date] = None
+    interval_km: int
+    interval_months: int
+    next_service_km: int
+    next_service_on: date
+    km_left: int
+    overdue: bool
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class MaintenanceDueItem(VehicleMaintenanceResponse):
+    """Автомобиль, которому скоро ТО"""
+    plate_number: str
+    brand: str
+    model: str
+    status: VehicleStatus
+    city: Optional[VehicleCity] = None
+    mileage_km: int
+
+
+class MaintenanceDueResponse(BaseModel):
+    """Автомобили, которым ТО в ближайшие км или дни"""
+    items: List[MaintenanceDueItem]
+    within_km: int
+    within_days: int
+    page: int
+    page_size: int
+    total: int
@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field, validator
+from typing import List
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
+
+from app.core.config import settings
+
+
+class MileageReadingIn(BaseModel):
+    """Показание одометра от телематики"""
+    vehicle_id: UUID = Field(..., description="ID автомобиля")
+    recorded_at: datetime = Field(..., description="Время снятия показания")
+    mileage_km: int = Field(..., ge=0, description="Пробег в км")
+
+    @validator('recorded_at')
+    def validate_recorded_at(cls, v):
+        """Время без часового пояса считается UTC; будущее и слишком старое не принимается"""
+        if v.tzinfo is None:
+            v = v.replace(tzinfo=timezone.utc)
+        now = datetime.now(timezone.utc)
+        if v > now + timedelta(minutes=5):
+            raise ValueError('Время показания не может быть в будущем')
+        if v < now - timedelta(days=settings.mileage_max_age_days):
+            raise ValueError(f'Показание старше {settings.mileage_max_age_days} дней не принимается')
+        return v
+
+
+class MileageReadingBatch(BaseModel):
+    """Пакет показаний одометра"""
+    readings: List[MileageReadingIn] = Field(..., min_length=1, max_length=10000)
+
+
+class MileageIngestResponse(BaseModel):
+    """Результат приема пакета показаний"""
+    received: int
+    inserted: int
+
+
+class MileageDailyPoint(BaseModel):
+    """Пробег автомобиля за день"""
+    day: date
+    min_km: int
+    max_km: int
+    distance_km: int
+    readings: int
+
+
+class MileageDailyResponse(BaseModel):
+    """Дневная история пробега автомобиля"""
+    vehicle_id: UUID
+    items: List[MileageDailyPoint]
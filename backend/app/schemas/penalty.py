@@ -0,0 +1,43 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+
+class PenaltyResponse(BaseModel):
+    """Штраф за нарушение ПДД"""
+    id: int
+    uin: str
+    plate_number: str
+    vehicle_id: Optional[UUID] = None
+    violated_at: datetime
+    amount: Decimal
+    article: Optional[str] = None
+    location: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PenaltyListResponse(BaseModel):
+    """Список штрафов"""
+    items: List[PenaltyResponse]
+    page: int
+    page_size: int
+    total: int
+
+
+class PenaltyImportResponse(BaseModel):
+    """Итог импорта файла штрафов"""
+    received: int  # строк с данными в файле
+    inserted: int  # новых штрафов
+    matched: int  # из них сопоставлено с автомобилем
+    unmatched: int  # из них номер не найден
+    rematched: int  # ранее несопоставленные штрафы, для которых нашелся автомобиль
+    duplicates: int  # уже загруженные штрафы
+    invalid: int  # строк с ошибками
+    errors: List[str]  # первые ошибки с номерами строк
+    seconds: float
+    fines_per_second: float
@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+from datetime import datetime
+from uuid import UUID
+
+from app.models.vehicle import VehicleStatus, VehicleCity
+
+
+class ReportJobCreate(BaseModel):
+    """Запрос отчета по автопарку"""
+    format: str = Field("csv", pattern="^(csv|xlsx)$", description="csv или xlsx")
+    status: Optional[VehicleStatus] = Field(None, description="Статус")
+    city: Optional[VehicleCity] = Field(None, description="Город")
+
+
+class ReportJobResponse(BaseModel):
+    """Состояние задания отчета"""
+    id: UUID
+    status: str
+    format: str
+    params: Dict[str, Any]
+    total_rows: Optional[int] = None
+    rows_done: int
+    progress: float = Field(..., description="Доля готовых строк, 0..1")
+    eta_seconds: Optional[float] = Field(None, description="Оценка оставшегося времени")
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    download_url: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,51 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import date, datetime
+from uuid import UUID
+
+from app.models.vehicle import VehicleStatus, VehicleCity
+
+
+class StatusTransitionResponse(BaseModel):
+    """Смена статуса или города автомобиля"""
+    changed_at: datetime
+    from_status: Optional[VehicleStatus] = None
+    from_city: Optional[VehicleCity] = None
+    from_changed_at: Optional[datetime] = None
+    to_status: Optional[VehicleStatus] = None
+    to_city: Optional[VehicleCity] = None
+
+    class Config:
+        from_attributes = True
+
+
+class StatusHistoryResponse(BaseModel):
+    """Журнал смен статуса автомобиля"""
+    vehicle_id: UUID
+    items: List[StatusTransitionResponse]
+
+
+class UtilizationBucket(BaseModel):
+    """Время в статусах за день или час"""
+    start: datetime
+    seconds: Dict[str, float]
+    utilization: float
+
+
+class FleetUtilizationResponse(BaseModel):
+    """Загрузка парка за период"""
+    date_from: date
+    date_to: date
+    city: Optional[VehicleCity] = None
+    granularity: str
+    utilization: float
+    items: List[UtilizationBucket]
+
+
+class VehicleUtilizationResponse(BaseModel):
+    """Загрузка автомобиля за период"""
+    vehicle_id: UUID
+    date_from: date
+    date_to: date
+    seconds: Dict[str, float]
+    utilization: float
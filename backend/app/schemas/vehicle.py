@@ -1,11 +1,17 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Dict
+from datetime import date, datetime
 from uuid import UUID
 import re
 import enum
 
 from app.models.vehicle import VehicleStatus, VehicleCity
+from app.services.suggest import canonical_plate, canonical_vin
+
+# Поля, по которым можно запросить фасетные счетчики
+FACET_FIELDS = ('status', 'city')
+
+BATCH_GET_MAX_IDS = 5000
 
 class VehicleBase(BaseModel):
     """Базовая схема автомобиля"""
@@ -20,24 +26,45 @@ class VehicleBase(BaseModel):
     city: Optional[VehicleCity] = Field(None, description="Город")
     owner_name: Optional[str] = Field(None, max_length=200, description="Владелец")
     osago_policy_number: Optional[str] = Field(None, max_length=50, description="Номер ОСАГО")
+    osago_starts_on: Optional[date] = Field(None, description="Начало действия ОСАГО")
+    osago_expires_on: Optional[date] = Field(None, description="Последний день действия ОСАГО")
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Широта последнего местоположения")
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Долгота последнего местоположения")
+
+    @validator('osago_expires_on')
+    def validate_osago_period(cls, v, values):
+        """Полис не может кончиться раньше, чем начался"""
+        starts_on = values.get('osago_starts_on')
+        if v is not None and starts_on is not None and v < starts_on:
+            raise ValueError('Дата окончания ОСАГО раньше даты начала')
+        return v
+
+    @validator('longitude')
+    def validate_location(cls, v, values):
+        """Координаты задаются парой"""
+        if (v is None) != (values.get('latitude') is None):
+            raise ValueError('Широта и долгота задаются вместе')
+        return v
 
     @validator('plate_number')
     def validate_plate_number(cls, v):
-        """Валидация российского номера"""
+        """Валидация российского номера (латинские двойники букв переводятся в кириллицу)"""
+        v = canonical_plate(v)
         pattern = r'^[АВЕКМНОРСТУХ]\d{3}[АВЕКМНОРСТУХ]{2}\d{2,3}$'
-        if not re.match(pattern, v.upper()):
+        if not re.match(pattern, v):
             raise ValueError('Неверный формат номера. Используйте формат: А111АА77')
-        return v.upper()
+        return v
 
     @validator('vin')
     def validate_vin(cls, v):
-        """Валидация VIN номера"""
+        """Валидация VIN номера (кириллические двойники букв переводятся в латиницу)"""
         if v is None:
             return v
+        v = canonical_vin(v)
         pattern = r'^[A-HJ-NPR-Z0-9]{17}$'
-        if not re.match(pattern, v.upper()):
+        if not re.match(pattern, v):
             raise ValueError('VIN должен содержать 17 символов (латиница и цифры)')
-        return v.upper()
+        return v
 
 class VehicleCreate(VehicleBase):
     """Схема для создания автомобиля"""
@@ -56,40 +83,79 @@ class VehicleUpdate(BaseModel):
     city: Optional[VehicleCity] = None
     owner_name: Optional[str] = Field(None, max_length=200)
     osago_policy_number: Optional[str] = Field(None, max_length=50)
+    osago_starts_on: Optional[date] = None
+    osago_expires_on: Optional[date] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
+    @validator('osago_expires_on')
+    def validate_osago_period(cls, v, values):
+        starts_on = values.get('osago_starts_on')
+        if v is not None and starts_on is not None and v < starts_on:
+            raise ValueError('Дата окончания ОСАГО раньше даты начала')
+        return v
 
     @validator('plate_number')
     def validate_plate_number(cls, v):
         if v is None:
             return v
+        v = canonical_plate(v)
         pattern = r'^[АВЕКМНОРСТУХ]\d{3}[АВЕКМНОРСТУХ]{2}\d{2,3}$'
-        if not re.match(pattern, v.upper()):
+        if not re.match(pattern, v):
             raise ValueError('Неверный формат номера. Используйте формат: А111АА77')
-        return v.upper()
+        return v
 
     @validator('vin')
     def validate_vin(cls, v):
         if v is None:
             return v
+        v = canonical_vin(v)
         pattern = r'^[A-HJ-NPR-Z0-9]{17}$'
-        if not re.match(pattern, v.upper()):
+        if not re.match(pattern, v):
             raise ValueError('VIN должен содержать 17 символов (латиница и цифры)')
-        return v.upper()
+        return v
 
 class VehicleResponse(VehicleBase):
     """Схема ответа с автомобилем"""
     id: UUID
+    location_updated_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
+class VehicleFacets(BaseModel):
+    """Количество автомобилей по значениям фильтров"""
+    status: Optional[Dict[str, int]] = None
+    city: Optional[Dict[str, int]] = None
+
 class VehicleListResponse(BaseModel):
     """Схема ответа со списком автомобилей"""
     items: List[VehicleResponse]
     page: int
     page_size: int
     total: int
+    facets: Optional[VehicleFacets] = None
+
+class VehicleSuggestion(BaseModel):
+    """Подсказка по номеру или VIN"""
+    id: UUID
+    plate_number: str
+    vin: Optional[str] = None
+
+class VehicleSuggestResponse(BaseModel):
+    """Схема ответа с подсказками"""
+    items: List[VehicleSuggestion]
+
+class VehicleBatchGetRequest(BaseModel):
+    """Запрос автомобилей по списку ID"""
+    ids: List[UUID] = Field(..., min_length=1, max_length=BATCH_GET_MAX_IDS, description="ID автомобилей")
+
+class VehicleBatchGetResponse(BaseModel):
+    """Автомобили в порядке запроса (без повторов) и ненайденные ID"""
+    items: List[VehicleResponse]
+    missing: List[UUID]
 
 class VehicleFilters(BaseModel):
     """Схема фильтров для поиска автомобилей"""
@@ -99,6 +165,19 @@ class VehicleFilters(BaseModel):
     page: int = Field(1, ge=1, description="Номер страницы")
     page_size: int = Field(10, ge=1, le=100, description="Размер страницы")
     ordering: str = Field("-created_at", description="Сортировка")
+    facets: List[str] = Field(default_factory=list, description="Фасеты для подсчета: status, city")
+
+    @validator('facets', pre=True)
+    def validate_facets(cls, v):
+        """Разбор списка фасетов вида status,city"""
+        if v is None:
+            return []
+        if isinstance(v, str):
+            v = [item.strip() for item in v.split(',') if item.strip()]
+        unknown = set(v) - set(FACET_FIELDS)
+        if unknown:
+            raise ValueError(f"Неизвестные фасеты: {', '.join(sorted(unknown))}")
+        return list(dict.fromkeys(v))
 
 class ErrorResponse(BaseModel):
     """Схема ошибки"""
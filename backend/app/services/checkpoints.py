@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.checkpoint import JobCheckpoint
+
+
+async def get_checkpoint(db: AsyncSession, name: str, lock: bool = False) -> Optional[datetime]:
+    """Позиция инкрементальной задачи; lock блокирует строку до конца транзакции"""
+    query = select(JobCheckpoint.checkpoint_at).where(JobCheckpoint.name == name)
+    if lock:
+        query = query.with_for_update()
+    return (await db.execute(query)).scalar()
+
+
+async def set_checkpoint(db: AsyncSession, name: str, checkpoint_at: datetime) -> None:
+    """Сохранить позицию задачи (в текущей транзакции)"""
+    stmt = insert(JobCheckpoint).values(name=name, checkpoint_at=checkpoint_at)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[JobCheckpoint.name],
+        set_={"checkpoint_at": stmt.excluded.checkpoint_at}
+    ))
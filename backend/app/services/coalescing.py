@@ -0,0 +1,77 @@
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.core.database import ReadOnlyConnection
+from app.core.singleflight import SingleFlight
+from app.schemas.vehicle import VehicleFilters, VehicleResponse
+from app.services.events import vehicle_events
+from app.services.vehicle import VehicleReader
+
+
+class CoalescingVehicleReader:
+    """Слой объединения одинаковых одновременных чтений перед VehicleReader.
+
+    Одинаковые запросы списка (по нормализованным фильтрам) и карточки
+    (по id), пришедшие в воркер одновременно, выполняются одним обращением
+    к БД через соединение запроса-лидера. Результат отдается в виде схем ответа,
+    не привязанных к сессии. Записи через этот слой не проходят и никогда
+    не объединяются; любое изменение автомобилей увеличивает поколение, и
+    чтения, начатые до записи, не раздаются запросам, пришедшим после нее.
+    """
+
+    def __init__(self):
+        self.lists = SingleFlight()
+        self.details = SingleFlight()
+        self._generation = 0
+
+    def invalidate(self, event: Dict[str, Any] = None) -> None:
+        """Отделить последующие чтения от уже идущих"""
+        self._generation += 1
+
+    @staticmethod
+    def normalize_filters(filters: VehicleFilters) -> VehicleFilters:
+        """Привести равнозначные фильтры к одному виду"""
+        q = filters.q.strip().lower() if filters.q else None
+        return filters.copy(update={
+            "q": q or None,
+            "facets": sorted(filters.facets),
+        })
+
+    async def get_vehicles(
+        self,
+        conn: ReadOnlyConnection,
+        filters: VehicleFilters
+    ) -> Tuple[List[VehicleResponse], int, Optional[Dict[str, Dict[str, int]]]]:
+        """Страница списка (и фасеты, если запрошены)"""
+        filters = self.normalize_filters(filters)
+        key = (self._generation, tuple(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in filters.dict().items()
+        ))
+
+        async def load():
+            reader = VehicleReader(conn)
+            facets = None
+            if filters.facets:
+                items, total, facets = await reader.get_vehicles_with_facets(filters)
+            else:
+                items, total = await reader.get_vehicles(filters)
+            return items, total, facets
+
+        return await self.lists.do(key, load)
+
+    async def get_vehicle(self, conn: ReadOnlyConnection, vehicle_id: UUID) -> Optional[VehicleResponse]:
+        """Карточка автомобиля"""
+
+        async def load():
+            return await VehicleReader(conn).get_vehicle_by_id(vehicle_id)
+
+        return await self.details.do((self._generation, vehicle_id), load)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"list": self.lists.stats(), "detail": self.details.stats()}
+
+
+# Слой объединения чтений процесса
+vehicle_reads = CoalescingVehicleReader()
+vehicle_events.subscribe(vehicle_reads.invalidate)
@@ -0,0 +1,148 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import uuid4
+import asyncio
+import json
+import logging
+
+from redis.exceptions import RedisError
+
+from app.core.redis import pubsub_client, redis_client
+from app.models.vehicle import Vehicle
+
+logger = logging.getLogger(__name__)
+
+VEHICLE_EVENTS_CHANNEL = "drivecore:vehicle-events"
+
+# Типы событий
+VEHICLE_UPSERTED = "upserted"
+VEHICLE_DELETED = "deleted"
+# Новые координаты пачки автомобилей: {"locations": [[id, lat, lon], ...]}
+VEHICLE_MOVED = "moved"
+# Соединение с Redis восстановлено, часть событий могла быть потеряна
+VEHICLE_RESYNC = "resync"
+
+# Повтор перестроения индекса после ошибки: пауза растет от 1 до 60 секунд
+REBUILD_RETRY_MIN_SECONDS = 1
+REBUILD_RETRY_MAX_SECONDS = 60
+
+VehicleEventHandler = Callable[[Dict[str, Any]], None]
+
+
+async def rebuild_with_retries(rebuild: Callable[[], Awaitable[None]], name: str) -> None:
+    """Перестраивать индекс, пока не получится (например, БД еще не готова при старте).
+
+    Ошибка логируется, следующая попытка - после паузы, которая удваивается
+    до REBUILD_RETRY_MAX_SECONDS. Пока индекс не построен, его ready = False.
+    """
+    delay = REBUILD_RETRY_MIN_SECONDS
+    while True:
+        try:
+            await rebuild()
+            return
+        except Exception as e:
+            logger.error(f"{name}: ошибка построения, повтор через {delay} с: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, REBUILD_RETRY_MAX_SECONDS)
+
+
+def vehicle_payload(vehicle: Vehicle) -> Dict[str, Any]:
+    """Данные автомобиля, которые нужны подписчикам событий"""
+    return {
+        "id": str(vehicle.id),
+        "plate_number": vehicle.plate_number,
+        "vin": vehicle.vin,
+        "status": vehicle.status.value if vehicle.status else None,
+        "city": vehicle.city.value if vehicle.city else None,
+        "latitude": vehicle.latitude,
+        "longitude": vehicle.longitude,
+    }
+
+
+class VehicleEventBus:
+    """Шина событий изменения автомобилей.
+
+    Событие сразу доставляется подписчикам текущего процесса и публикуется
+    в Redis, откуда его получают остальные воркеры. Собственные события из
+    Redis повторно не обрабатываются.
+    """
+
+    def __init__(self, channel: str = VEHICLE_EVENTS_CHANNEL):
+        self.channel = channel
+        self._origin = uuid4().hex
+        self._handlers: List[VehicleEventHandler] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, handler: VehicleEventHandler) -> None:
+        """Подписать обработчик на события"""
+        self._handlers.append(handler)
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        for handler in self._handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика события {event.get('type')}: {e}")
+
+    async def publish(self, event_type: str, vehicle: Vehicle) -> None:
+        """Опубликовать событие об изменении автомобиля"""
+        await self._send({"type": event_type, "vehicle": vehicle_payload(vehicle)})
+
+    async def publish_locations(self, locations: Sequence[Tuple[str, float, float]]) -> None:
+        """Опубликовать новые координаты пачки автомобилей одним событием"""
+        await self._send({"type": VEHICLE_MOVED, "locations": [list(item) for item in locations]})
+
+    async def _send(self, event: Dict[str, Any]) -> None:
+        self._dispatch(event)
+        try:
+            await redis_client.publish(
+                self.channel, json.dumps({**event, "origin": self._origin})
+            )
+        except RedisError as e:
+            # Изменение уже зафиксировано в БД, остальные воркеры догонят по TTL/resync
+            logger.error(f"Не удалось опубликовать событие {event['type']}: {e}")
+
+    async def start(self) -> None:
+        """Начать получение событий других воркеров"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        reconnecting = False
+        while True:
+            try:
+                async with pubsub_client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    if reconnecting:
+                        self._dispatch({"type": VEHICLE_RESYNC})
+                        reconnecting = False
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        # Неверное сообщение пропускается, подписка продолжается
+                        try:
+                            event = json.loads(message["data"])
+                        except ValueError as e:
+                            logger.error(f"Сообщение шины событий не JSON, пропущено: {e}")
+                            continue
+                        if not isinstance(event, dict) or "type" not in event:
+                            logger.error(f"Сообщение шины событий без типа пропущено: {str(event)[:200]}")
+                            continue
+                        if event.pop("origin", None) != self._origin:
+                            self._dispatch(event)
+            except RedisError as e:
+                logger.error(f"Потеряно соединение с шиной событий: {e}")
+                reconnecting = True
+                await asyncio.sleep(1)
+
+
+# Шина событий процесса
+vehicle_events = VehicleEventBus()
@@ -0,0 +1,20 @@
+from typing import Optional
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.dataloader import DataLoader
+from app.models.vehicle import Vehicle
+from app.services.vehicle import VehicleService
+
+
+def vehicle_loader(db: AsyncSession) -> DataLoader[UUID, Optional[Vehicle]]:
+    """Загрузчик автомобилей по ID для одного запроса"""
+    return DataLoader(VehicleService(db).get_vehicles_by_ids, max_batch_size=5000)
+
+
+async def get_vehicle_loader(db: AsyncSession = Depends(get_db)) -> DataLoader[UUID, Optional[Vehicle]]:
+    """Зависимость FastAPI: загрузчик автомобилей на сессии запроса"""
+    return vehicle_loader(db)
@@ -0,0 +1,64 @@
+from typing import Dict, List
+from uuid import UUID
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.location import VehicleLocationIn
+from app.services.events import vehicle_events
+
+logger = logging.getLogger(__name__)
+
+# Координаты обновляются, только если они новее сохраненных: пакеты
+# телематики могут приходить не по порядку
+UPDATE_LOCATIONS_SQL = text(
+    """
+    UPDATE vehicles AS v
+    SET latitude = r.latitude, longitude = r.longitude, location_updated_at = r.recorded_at
+    FROM unnest(
+        CAST(:vehicle_ids AS uuid[]),
+        CAST(:recorded_at AS timestamptz[]),
+        CAST(:latitudes AS double precision[]),
+        CAST(:longitudes AS double precision[])
+    ) AS r (vehicle_id, recorded_at, latitude, longitude)
+    WHERE v.id = r.vehicle_id
+      AND (v.location_updated_at IS NULL OR v.location_updated_at < r.recorded_at)
+    RETURNING v.id, v.latitude, v.longitude
+    """
+)
+
+
+class LocationService:
+    """Прием координат автомобилей от телематики"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def ingest(self, locations: List[VehicleLocationIn]) -> int:
+        """Сохранить пакет координат одним запросом и разослать перемещения.
+
+        Из нескольких координат одного автомобиля в пакете берется последняя.
+        Возвращает число обновленных автомобилей.
+        """
+        latest: Dict[UUID, VehicleLocationIn] = {}
+        for item in locations:
+            current = latest.get(item.vehicle_id)
+            if current is None or item.recorded_at > current.recorded_at:
+                latest[item.vehicle_id] = item
+
+        items = list(latest.values())
+        rows = (await self.db.execute(
+            UPDATE_LOCATIONS_SQL,
+            {
+                "vehicle_ids": [item.vehicle_id for item in items],
+                "recorded_at": [item.recorded_at for item in items],
+                "latitudes": [item.latitude for item in items],
+                "longitudes": [item.longitude for item in items],
+            }
+        )).all()
+        await self.db.commit()
+
+        if rows:
+            await vehicle_events.publish_locations([(str(row.id), row.latitude, row.longitude) for row in rows])
+        return len(rows)
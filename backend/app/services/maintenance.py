@@ -0,0 +1,332 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import logging
+
+import numpy as np
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.maintenance import MaintenanceInterval, VehicleMaintenance
+from app.models.vehicle import Vehicle, VehicleCity, VehicleStatus
+from app.schemas.maintenance import MaintenanceDueItem, MaintenanceServiceIn
+from app.services.osago import local_today
+
+logger = logging.getLogger(__name__)
+
+# Ключ перед любым реальным (старт keyset-обхода)
+_MIN_ID = UUID(int=0)
+
+# Прогноз по пробегу дальше этого не строится (машина почти не ездит)
+MAX_PROJECTION_DAYS = 3650
+# Минимальный возраст для среднего пробега в день: у новых машин он шумный
+MIN_AGE_DAYS = 30
+
+# Порция автомобилей одной строкой массивов: колонки сразу ложатся в
+# массивы NumPy без разбора строк. Агрегаты получают строки в порядке
+# подзапроса, поэтому i-е элементы массивов относятся к одной машине.
+# Даты приходят днями от 1970-01-01 (datetime64[D] без объектов date);
+# без отметки о ТО last_service_km = -1, а last_service_on не используется.
+_COLUMNS_SQL = """
+    WITH chunk AS (
+        SELECT v.id, v.brand, v.model, v.year, v.mileage_km,
+               (v.created_at AT TIME ZONE :tz)::date - DATE '1970-01-01' AS in_fleet_on,
+               COALESCE(m.last_service_km, -1) AS last_service_km,
+               COALESCE(m.last_service_on - DATE '1970-01-01', 0) AS last_service_on
+        FROM vehicles v
+        LEFT JOIN vehicle_maintenance m ON m.vehicle_id = v.id
+        WHERE {where}
+        ORDER BY v.id
+        LIMIT :limit
+    )
+    SELECT array_agg(id) AS ids, array_agg(brand) AS brands, array_agg(model) AS models,
+           array_agg(year) AS years, array_agg(mileage_km) AS mileage,
+           array_agg(in_fleet_on) AS in_fleet_on, array_agg(last_service_km) AS last_service_km,
+           array_agg(last_service_on) AS last_service_on
+    FROM chunk
+"""
+CHUNK_SQL = text(_COLUMNS_SQL.format(where="v.id > :last_id"))
+VEHICLE_SQL = text(_COLUMNS_SQL.format(where="v.id = :vehicle_id"))
+
+# Рассчитанные колонки порции одним запросом. Последнее ТО не трогается,
+# а строка обновляется, только если оно то же, что прочитано в порции:
+# record_service мог отметить ТО после чтения, и его график новее (у новой
+# строки прочитанное ТО - NULL). Неизмененные строки не переписываются.
+# JOIN отбрасывает удаленные за время расчета машины.
+UPSERT_SQL = text(
+    """
+    INSERT INTO vehicle_maintenance AS m (
+        vehicle_id, last_service_km, last_service_on,
+        interval_km, interval_months, next_service_km, next_service_on, km_left, overdue
+    )
+    SELECT r.vehicle_id,
+           NULLIF(r.last_service_km, -1),
+           CASE WHEN r.last_service_km >= 0 THEN DATE '1970-01-01' + r.last_service_on END,
+           r.interval_km, r.interval_months, r.next_service_km, r.next_service_on, r.km_left, r.overdue
+    FROM unnest(
+        CAST(:vehicle_ids AS uuid[]),
+        CAST(:last_service_km AS integer[]),
+        CAST(:last_service_on AS integer[]),
+        CAST(:interval_km AS integer[]),
+        CAST(:interval_months AS integer[]),
+        CAST(:next_service_km AS integer[]),
+        CAST(:next_service_on AS date[]),
+        CAST(:km_left AS integer[]),
+        CAST(:overdue AS boolean[])
+    ) AS r (
+        vehicle_id, last_service_km, last_service_on,
+        interval_km, interval_months, next_service_km, next_service_on, km_left, overdue
+    )
+    JOIN vehicles v ON v.id = r.vehicle_id
+    ON CONFLICT (vehicle_id) DO UPDATE SET
+        interval_km = EXCLUDED.interval_km,
+        interval_months = EXCLUDED.interval_months,
+        next_service_km = EXCLUDED.next_service_km,
+        next_service_on = EXCLUDED.next_service_on,
+        km_left = EXCLUDED.km_left,
+        overdue = EXCLUDED.overdue,
+        updated_at = now()
+    WHERE (m.last_service_km, m.last_service_on)
+        IS NOT DISTINCT FROM (EXCLUDED.last_service_km, EXCLUDED.last_service_on)
+      AND (m.interval_km, m.interval_months, m.next_service_km, m.next_service_on, m.km_left, m.overdue)
+        IS DISTINCT FROM
+        (EXCLUDED.interval_km, EXCLUDED.interval_months, EXCLUDED.next_service_km,
+         EXCLUDED.next_service_on, EXCLUDED.km_left, EXCLUDED.overdue)
+    """
+)
+
+SERVICE_SQL = text(
+    """
+    INSERT INTO vehicle_maintenance AS m (
+        vehicle_id, last_service_km, last_service_on, interval_km, interval_months,
+        next_service_km, next_service_on, km_left, overdue
+    )
+    VALUES (
+        :vehicle_id, :last_service_km, :last_service_on, :interval_km, :interval_months,
+        :next_service_km, :next_service_on, :km_left, :overdue
+    )
+    ON CONFLICT (vehicle_id) DO UPDATE SET
+        last_service_km = EXCLUDED.last_service_km,
+        last_service_on = EXCLUDED.last_service_on,
+        interval_km = EXCLUDED.interval_km,
+        interval_months = EXCLUDED.interval_months,
+        next_service_km = EXCLUDED.next_service_km,
+        next_service_on = EXCLUDED.next_service_on,
+        km_left = EXCLUDED.km_left,
+        overdue = EXCLUDED.overdue,
+        updated_at = now()
+    """
+)
+
+Intervals = Dict[Tuple[str, Optional[str]], Tuple[int, int]]
+
+
+def _columns(chunk) -> Dict[str, np.ndarray]:
+    return {
+        "brand": np.array(chunk.brands),
+        "model": np.array(chunk.models),
+        "year": np.array(chunk.years, dtype=np.int64),
+        "mileage": np.array(chunk.mileage, dtype=np.int64),
+        "in_fleet_on": np.array(chunk.in_fleet_on, dtype=np.int64).astype("datetime64[D]"),
+        "last_service_km": np.array(chunk.last_service_km, dtype=np.int64),
+        "last_service_on": np.array(chunk.last_service_on, dtype=np.int64).astype("datetime64[D]"),
+    }
+
+
+def _resolve_intervals(brand: np.ndarray, model: np.ndarray, intervals: Intervals) -> Tuple[np.ndarray, np.ndarray]:
+    """Регламент каждой машины: модель, иначе марка, иначе по умолчанию.
+
+    Поиск в словаре идет по уникальным парам (марка, модель) порции, их
+    единицы-десятки; по машинам значения раскладываются индексом.
+    """
+    brands, brand_index = np.unique(brand, return_inverse=True)
+    models, model_index = np.unique(model, return_inverse=True)
+    pairs, pair_index = np.unique(brand_index * len(models) + model_index, return_inverse=True)
+    default = (settings.maintenance_default_interval_km, settings.maintenance_default_interval_months)
+    resolved = np.array([
+        intervals.get((b, m)) or intervals.get((b, None)) or default
+        for b, m in ((brands[p // len(models)].lower(), models[p % len(models)].lower()) for p in pairs)
+    ], dtype=np.int64).reshape(-1, 2)
+    return resolved[pair_index, 0], resolved[pair_index, 1]
+
+
+def _add_months(days: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """Дата через months месяцев; день, которого нет в месяце, - последний день"""
+    month_start = days.astype("datetime64[M]")
+    target = month_start + months.astype("timedelta64[M]")
+    month_length = (target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")
+    offset = np.minimum(days - month_start.astype("datetime64[D]"), month_length - np.timedelta64(1, "D"))
+    return target.astype("datetime64[D]") + offset
+
+
+def compute_schedule(columns: Dict[str, np.ndarray], intervals: Intervals, today: date) -> Dict[str, np.ndarray]:
+    """Следующее ТО для порции машин, целиком векторными операциями.
+
+    Без отметки о последнем ТО считается, что ТО шли по регламенту: по
+    пробегу - на каждом кратном интервалу километре, по сроку - каждые
+    interval_months с ввода в парк. Дата по пробегу - прогноз при
+    среднем пробеге в день с середины года выпуска.
+    """
+    today = np.datetime64(today, "D")
+    mileage = columns["mileage"]
+    interval_km, interval_months = _resolve_intervals(columns["brand"], columns["model"], intervals)
+    serviced = columns["last_service_km"] >= 0
+
+    base_km = np.where(serviced, columns["last_service_km"], mileage // interval_km * interval_km)
+    next_km = base_km + interval_km
+    km_left = next_km - mileage
+
+    base_on = np.where(serviced, columns["last_service_on"], columns["in_fleet_on"])
+    months_elapsed = (today.astype("datetime64[M]") - base_on.astype("datetime64[M]")).astype(np.int64)
+    periods = np.where(serviced, 1, np.maximum(months_elapsed // interval_months, 1))
+    due_by_time = _add_months(base_on, periods * interval_months)
+    # Срок по регламенту без отметок не может быть в прошлом: следующий период
+    passed = ~serviced & (due_by_time < today)
+    due_by_time = np.where(passed, _add_months(base_on, (periods + 1) * interval_months), due_by_time)
+
+    in_use_from = (columns["year"] - 1970).astype("datetime64[Y]").astype("datetime64[D]") + 182
+    age_days = np.maximum((today - in_use_from).astype(np.int64), MIN_AGE_DAYS)
+    km_per_day = mileage / age_days
+    days_left = np.full(len(mileage), MAX_PROJECTION_DAYS, dtype=np.float64)
+    np.divide(km_left, km_per_day, out=days_left, where=km_per_day > 0)
+    days_left = np.clip(np.ceil(days_left), 0, MAX_PROJECTION_DAYS).astype(np.int64)
+    due_by_km = today + days_left.astype("timedelta64[D]")
+
+    return {
+        "interval_km": interval_km,
+        "interval_months": interval_months,
+        "next_service_km": next_km,
+        "next_service_on": np.minimum(due_by_time, due_by_km),
+        "km_left": km_left,
+        "overdue": (km_left < 0) | (due_by_time < today),
+    }
+
+
+class MaintenanceService:
+    """График планового ТО автопарка"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _load_intervals(self) -> Intervals:
+        rows = (await self.db.execute(select(
+            MaintenanceInterval.brand, MaintenanceInterval.model,
+            MaintenanceInterval.interval_km, MaintenanceInterval.interval_months
+        ))).all()
+        return {
+            (row.brand.lower(), row.model.lower() if row.model else None): (row.interval_km, row.interval_months)
+            for row in rows
+        }
+
+    async def refresh(self, today: Optional[date] = None) -> dict:
+        """Пересчитать график ТО всего автопарка.
+
+        Автопарк читается порциями по id (keyset), порция приходит колонками
+        и считается в NumPy, результат пишется одним запросом на порцию в
+        ее же транзакции. Прерванный пересчет безопасно повторить.
+        """
+        today = today or local_today()
+        intervals = await self._load_intervals()
+        last_id = _MIN_ID
+        vehicles = updated = overdue = 0
+
+        while True:
+            chunk = (await self.db.execute(CHUNK_SQL, {
+                "last_id": last_id, "limit": settings.maintenance_chunk_size, "tz": settings.timezone
+            })).one()
+            if chunk.ids is None:
+                await self.db.commit()
+                break
+            schedule = compute_schedule(_columns(chunk), intervals, today)
+            result = await self.db.execute(UPSERT_SQL, {
+                "vehicle_ids": chunk.ids,
+                "last_service_km": chunk.last_service_km,
+                "last_service_on": chunk.last_service_on,
+                **{key: values.tolist() for key, values in schedule.items()}
+            })
+            await self.db.commit()
+            vehicles += len(chunk.ids)
+            updated += result.rowcount
+            overdue += int(schedule["overdue"].sum())
+            last_id = max(chunk.ids)
+
+        logger.info(f"График ТО: автомобилей {vehicles}, изменено {updated}, просрочено {overdue}")
+        return {"vehicles": vehicles, "updated": updated, "overdue": overdue}
+
+    async def record_service(self, vehicle_id: UUID, data: MaintenanceServiceIn) -> Optional[VehicleMaintenance]:
+        """Отметить проведенное ТО и сразу пересчитать график машины"""
+        today = local_today()
+        service_on = data.service_on or today
+        if service_on > today:
+            raise ValueError("Дата ТО не может быть в будущем")
+
+        chunk = (await self.db.execute(VEHICLE_SQL, {
+            "vehicle_id": vehicle_id, "limit": 1, "tz": settings.timezone
+        })).one()
+        if chunk.ids is None:
+            return None
+        if data.mileage_km > chunk.mileage[0]:
+            raise ValueError(f"Пробег ТО больше текущего пробега автомобиля ({chunk.mileage[0]} км)")
+
+        columns = _columns(chunk)
+        columns["last_service_km"][:] = data.mileage_km
+        columns["last_service_on"][:] = np.datetime64(service_on, "D")
+        schedule = compute_schedule(columns, await self._load_intervals(), today)
+        await self.db.execute(SERVICE_SQL, {
+            "vehicle_id": vehicle_id,
+            "last_service_km": data.mileage_km,
+            "last_service_on": service_on,
+            **{key: values.tolist()[0] for key, values in schedule.items()}
+        })
+        await self.db.commit()
+        return await self.get_schedule(vehicle_id)
+
+    async def get_schedule(self, vehicle_id: UUID) -> Optional[VehicleMaintenance]:
+        return (await self.db.execute(
+            select(VehicleMaintenance)
+            .where(VehicleMaintenance.vehicle_id == vehicle_id)
+            .execution_options(populate_existing=True)
+        )).scalar_one_or_none()
+
+    async def get_due(
+        self,
+        within_km: int,
+        within_days: int,
+        city: Optional[VehicleCity] = None,
+        status: Optional[VehicleStatus] = None,
+        page: int = 1,
+        page_size: int = 20
+    ) -> Tuple[List[MaintenanceDueItem], int]:
+        """Машины, которым ТО в ближайшие within_km км или within_days дней (и просроченные).
+
+        Условие - OR по двум индексированным колонкам графика, план -
+        BitmapOr по idx_vehicle_maintenance_km_left и _next_service_on.
+        """
+        conditions = [or_(
+            VehicleMaintenance.km_left <= within_km,
+            VehicleMaintenance.next_service_on <= local_today() + timedelta(days=within_days)
+        )]
+        if city:
+            conditions.append(Vehicle.city == city)
+        if status:
+            conditions.append(Vehicle.status == status)
+
+        total = (await self.db.execute(
+            select(func.count())
+            .select_from(VehicleMaintenance)
+            .join(Vehicle, Vehicle.id == VehicleMaintenance.vehicle_id)
+            .where(*conditions)
+        )).scalar_one()
+        rows = (await self.db.execute(
+            select(
+                *VehicleMaintenance.__table__.columns,
+                Vehicle.plate_number, Vehicle.brand, Vehicle.model, Vehicle.status, Vehicle.city, Vehicle.mileage_km
+            )
+            .join(Vehicle, Vehicle.id == VehicleMaintenance.vehicle_id)
+            .where(*conditions)
+            .order_by(VehicleMaintenance.next_service_on, VehicleMaintenance.km_left, VehicleMaintenance.vehicle_id)
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )).all()
+        return [MaintenanceDueItem.model_validate(row._mapping) for row in rows], total
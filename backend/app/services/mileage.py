@@ -0,0 +1,224 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Set
+from uuid import UUID
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.mileage import VehicleMileageReading
+from app.schemas.mileage import MileageDailyPoint, MileageReadingIn
+from app.services.checkpoints import get_checkpoint, set_checkpoint
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_CHECKPOINT = "mileage_rollup"
+
+# Месяцы, для которых секции уже точно существуют (в пределах процесса)
+_known_partitions: Set[date] = set()
+
+# Показания вне месячных секций (их месяц еще не подготовлен) попадают сюда
+DEFAULT_PARTITION = "vehicle_mileage_readings_default"
+
+INSERT_READINGS_SQL = text(
+    """
+    INSERT INTO vehicle_mileage_readings (vehicle_id, recorded_at, mileage_km)
+    SELECT r.vehicle_id, r.recorded_at, r.mileage_km
+    FROM unnest(
+        CAST(:vehicle_ids AS uuid[]),
+        CAST(:recorded_at AS timestamptz[]),
+        CAST(:mileage_km AS integer[])
+    ) AS r (vehicle_id, recorded_at, mileage_km)
+    JOIN vehicles v ON v.id = r.vehicle_id
+    ON CONFLICT DO NOTHING
+    """
+)
+
+# Свертка новых показаний одним набором: дневные минимумы/максимумы и
+# последний пробег в vehicles.mileage_km (пробег только растет)
+ROLLUP_SQL = text(
+    """
+    WITH fresh AS (
+        SELECT vehicle_id, recorded_at, mileage_km
+        FROM vehicle_mileage_readings
+        WHERE ingested_at > :since AND ingested_at <= :until
+    ),
+    daily AS (
+        INSERT INTO vehicle_mileage_daily AS d (vehicle_id, day, min_km, max_km, readings)
+        SELECT vehicle_id, (recorded_at AT TIME ZONE :tz)::date,
+               min(mileage_km), max(mileage_km), count(*)
+        FROM fresh
+        GROUP BY 1, 2
+        ON CONFLICT (vehicle_id, day) DO UPDATE SET
+            min_km = LEAST(d.min_km, EXCLUDED.min_km),
+            max_km = GREATEST(d.max_km, EXCLUDED.max_km),
+            readings = d.readings + EXCLUDED.readings
+        RETURNING 1
+    ),
+    latest AS (
+        SELECT DISTINCT ON (vehicle_id) vehicle_id, mileage_km
+        FROM fresh
+        ORDER BY vehicle_id, recorded_at DESC
+    ),
+    updated AS (
+        UPDATE vehicles v
+        SET mileage_km = latest.mileage_km, updated_at = now()
+        FROM latest
+        WHERE v.id = latest.vehicle_id AND latest.mileage_km > v.mileage_km
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM daily) AS days, (SELECT count(*) FROM updated) AS vehicles
+    """
+)
+
+DAILY_SQL = text(
+    """
+    SELECT day, min_km, max_km, readings,
+           max_km - COALESCE(lag(max_km) OVER (ORDER BY day), min_km) AS distance_km
+    FROM vehicle_mileage_daily
+    WHERE vehicle_id = :vehicle_id AND day BETWEEN :date_from AND :date_to
+    ORDER BY day
+    """
+)
+
+
+def month_start(value: datetime) -> date:
+    value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _utc_midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+class MileageService:
+    """Сервис истории пробега"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def ensure_partitions(self, months: Iterable[date]) -> None:
+        """Создать месячные секции показаний, если их еще нет.
+
+        Только для задачи ensure_mileage_partitions и разовой подготовки
+        секций (scripts.mileage_partitions): DDL берет блокировку
+        родительской таблицы и в обработчике запроса не выполняется.
+        Показания месяца, попавшие в секцию по умолчанию, переносятся в
+        новую секцию в той же транзакции. Месяц запоминается только после
+        успешного создания.
+        """
+        table = VehicleMileageReading.__tablename__
+        for month in sorted(set(months) - _known_partitions):
+            partition = f"{table}_y{month:%Y}m{month:%m}"
+            bounds = f"FROM ('{month} 00:00:00+00') TO ('{next_month(month)} 00:00:00+00')"
+            try:
+                exists = (await self.db.execute(
+                    text("SELECT to_regclass(:name) IS NOT NULL"), {"name": partition}
+                )).scalar_one()
+                if not exists:
+                    await self._create_partition(table, partition, month, bounds)
+                await self.db.commit()
+            except DBAPIError as e:
+                # Например, секцию одновременно создал другой процесс:
+                # следующий запуск задачи проверит ее снова
+                await self.db.rollback()
+                logger.warning(f"Секция {partition} не создана: {e}")
+                continue
+            _known_partitions.add(month)
+
+    async def _create_partition(self, table: str, partition: str, month: date, bounds: str) -> None:
+        misplaced = (await self.db.execute(
+            text(
+                f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+                f"WHERE recorded_at >= :month_from AND recorded_at < :month_to)"
+            ),
+            {"month_from": _utc_midnight(month), "month_to": _utc_midnight(next_month(month))}
+        )).scalar_one()
+        if not misplaced:
+            await self.db.execute(text(f"CREATE TABLE {partition} PARTITION OF {table} FOR VALUES {bounds}"))
+            return
+        # PostgreSQL не создает секцию, пока ее строки лежат в секции по
+        # умолчанию: переносим их в отдельную таблицу и присоединяем ее
+        await self.db.execute(text(
+            f"CREATE TABLE {partition} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ))
+        moved = await self.db.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                f"WHERE recorded_at >= :month_from AND recorded_at < :month_to RETURNING *) "
+                f"INSERT INTO {partition} SELECT * FROM moved"
+            ),
+            {"month_from": _utc_midnight(month), "month_to": _utc_midnight(next_month(month))}
+        )
+        await self.db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {partition} FOR VALUES {bounds}"))
+        logger.info(f"Секция {partition}: перенесено показаний из секции по умолчанию {moved.rowcount}")
+
+    async def ensure_upcoming_partitions(self, months_ahead: int = 3) -> None:
+        """Создать секции на текущий и ближайшие месяцы"""
+        month = month_start(datetime.now(timezone.utc))
+        months = [month]
+        for _ in range(months_ahead):
+            month = next_month(month)
+            months.append(month)
+        await self.ensure_partitions(months)
+
+    async def ingest(self, readings: List[MileageReadingIn]) -> int:
+        """Принять пакет показаний одним запросом.
+
+        Показания неизвестных автомобилей и повторы уже принятых
+        пропускаются. Секции здесь не создаются: время показаний
+        ограничено схемой (mileage_max_age_days), месяц без своей секции
+        попадает в секцию по умолчанию. Возвращает число сохраненных
+        показаний.
+        """
+        result = await self.db.execute(
+            INSERT_READINGS_SQL,
+            {
+                "vehicle_ids": [r.vehicle_id for r in readings],
+                "recorded_at": [r.recorded_at for r in readings],
+                "mileage_km": [r.mileage_km for r in readings],
+            }
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def rollup(self) -> dict:
+        """Свернуть показания, принятые после прошлого запуска.
+
+        Показания выбираются по времени приема до now() - задержка, чтобы
+        не пропустить транзакции, которые еще не зафиксированы. Позиция
+        сохраняется в той же транзакции, что и результаты свертки.
+        """
+        until = datetime.now(timezone.utc) - timedelta(seconds=settings.mileage_rollup_lag_seconds)
+        since = await get_checkpoint(self.db, ROLLUP_CHECKPOINT, lock=True)
+        if since is None:
+            since = datetime(1970, 1, 1, tzinfo=timezone.utc)
+        if since >= until:
+            await self.db.rollback()
+            return {"days": 0, "vehicles": 0}
+
+        row = (await self.db.execute(
+            ROLLUP_SQL, {"since": since, "until": until, "tz": settings.timezone}
+        )).one()
+        await set_checkpoint(self.db, ROLLUP_CHECKPOINT, until)
+        await self.db.commit()
+        return {"days": row.days, "vehicles": row.vehicles}
+
+    async def get_daily(
+        self,
+        vehicle_id: UUID,
+        date_from: date,
+        date_to: date
+    ) -> List[MileageDailyPoint]:
+        """Пробег по дням из дневной свертки"""
+        result = await self.db.execute(
+            DAILY_SQL,
+            {"vehicle_id": vehicle_id, "date_from": date_from, "date_to": date_to}
+        )
+        return [MileageDailyPoint(**row._mapping) for row in result]
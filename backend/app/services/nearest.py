@@ -0,0 +1,261 @@
+from array import array
+from heapq import heappush, heapreplace
+from math import ceil, cos, floor, radians, sqrt
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+import asyncio
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.models.vehicle import Vehicle, VehicleStatus
+from app.services.events import VEHICLE_DELETED, VEHICLE_MOVED, VEHICLE_RESYNC, VEHICLE_UPSERTED, rebuild_with_retries
+
+logger = logging.getLogger(__name__)
+
+# Длина градуса меридиана на сфере радиусом 6371 км
+KM_PER_DEGREE = 111.195
+
+Cell = Tuple[int, int]
+
+
+class GridIndex:
+    """Равномерная сетка по широте и долготе для поиска ближайших точек.
+
+    Ячейка около cell_km по обеим осям на широте reference_lat. Поиск
+    обходит кольца ячеек вокруг точки запроса и останавливается, когда
+    k-я найденная точка ближе любой ячейки следующего кольца. Расстояние
+    считается в локальной равнопромежуточной проекции на широте запроса,
+    на расстояниях до сотни километров это точнее метра на километр.
+    Данные точки лежат в слоте, как в PrefixIndex.
+    """
+
+    def __init__(self, cell_km: float, reference_lat: float):
+        self.lat_step = cell_km / KM_PER_DEGREE
+        self.lon_step = cell_km / (KM_PER_DEGREE * cos(radians(reference_lat)))
+        self._lats = array("d")
+        self._lons = array("d")
+        self._ids = bytearray()
+        self._plates: List[Optional[str]] = []
+        self._cell_of: List[Optional[Cell]] = []
+        self._cells: Dict[Cell, Set[int]] = {}
+        self._slot_by_id: Dict[bytes, int] = {}
+        self._free_slots: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        return floor(lat / self.lat_step), floor(lon / self.lon_step)
+
+    def upsert(self, vehicle_id: UUID, plate_number: str, lat: float, lon: float) -> None:
+        """Добавить точку или переместить существующую"""
+        raw_id = vehicle_id.bytes
+        slot = self._slot_by_id.get(raw_id)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self._ids[slot * 16:(slot + 1) * 16] = raw_id
+                self._lats[slot], self._lons[slot] = lat, lon
+                self._plates[slot] = plate_number
+            else:
+                slot = len(self._plates)
+                self._ids += raw_id
+                self._lats.append(lat)
+                self._lons.append(lon)
+                self._plates.append(plate_number)
+                self._cell_of.append(None)
+            self._slot_by_id[raw_id] = slot
+        else:
+            self._plates[slot] = plate_number
+        self._place(slot, lat, lon)
+
+    def move(self, vehicle_id: UUID, lat: float, lon: float) -> bool:
+        """Переместить точку, если она есть в индексе"""
+        slot = self._slot_by_id.get(vehicle_id.bytes)
+        if slot is None:
+            return False
+        self._place(slot, lat, lon)
+        return True
+
+    def remove(self, vehicle_id: UUID) -> None:
+        """Удалить точку из индекса"""
+        slot = self._slot_by_id.pop(vehicle_id.bytes, None)
+        if slot is None:
+            return
+        cell = self._cell_of[slot]
+        members = self._cells[cell]
+        members.discard(slot)
+        if not members:
+            del self._cells[cell]
+        self._cell_of[slot] = None
+        self._plates[slot] = None
+        self._free_slots.append(slot)
+
+    def _place(self, slot: int, lat: float, lon: float) -> None:
+        self._lats[slot], self._lons[slot] = lat, lon
+        cell = self._cell(lat, lon)
+        previous = self._cell_of[slot]
+        if previous == cell:
+            return
+        if previous is not None:
+            members = self._cells[previous]
+            members.discard(slot)
+            if not members:
+                del self._cells[previous]
+        self._cells.setdefault(cell, set()).add(slot)
+        self._cell_of[slot] = cell
+
+    def nearest(self, lat: float, lon: float, k: int, max_km: float) -> List[Dict[str, Any]]:
+        """До k ближайших точек не дальше max_km, по возрастанию расстояния"""
+        kx = KM_PER_DEGREE * cos(radians(lat))
+        ky = KM_PER_DEGREE
+        # Любая точка за пределами r колец не ближе r * ring_km
+        ring_km = min(self.lat_step * ky, self.lon_step * kx)
+        max_rings = ceil(max_km / ring_km) if ring_km > 0 else 0
+        limit = max_km * max_km
+        cy, cx = self._cell(lat, lon)
+        lats, lons, cells = self._lats, self._lons, self._cells
+        # Куча из (-квадрат расстояния, слот): в вершине самая дальняя из k
+        best: List[Tuple[float, int]] = []
+
+        for ring in range(max_rings + 1):
+            for cell in self._ring(cy, cx, ring):
+                members = cells.get(cell)
+                if not members:
+                    continue
+                for slot in members:
+                    dx = (lons[slot] - lon) * kx
+                    dy = (lats[slot] - lat) * ky
+                    d2 = dx * dx + dy * dy
+                    if d2 > limit:
+                        continue
+                    if len(best) < k:
+                        heappush(best, (-d2, slot))
+                    elif d2 < -best[0][0]:
+                        heapreplace(best, (-d2, slot))
+            if len(best) == k and -best[0][0] <= (ring * ring_km) ** 2:
+                break
+
+        return [self._slot_data(slot, sqrt(-neg_d2)) for neg_d2, slot in sorted(best, reverse=True)]
+
+    @staticmethod
+    def _ring(cy: int, cx: int, ring: int) -> Iterable[Cell]:
+        if ring == 0:
+            yield cy, cx
+            return
+        for x in range(cx - ring, cx + ring + 1):
+            yield cy - ring, x
+            yield cy + ring, x
+        for y in range(cy - ring + 1, cy + ring):
+            yield y, cx - ring
+            yield y, cx + ring
+
+    def _slot_data(self, slot: int, distance_km: float) -> Dict[str, Any]:
+        return {
+            "id": UUID(bytes=bytes(self._ids[slot * 16:(slot + 1) * 16])),
+            "plate_number": self._plates[slot],
+            "latitude": self._lats[slot],
+            "longitude": self._lons[slot],
+            "distance_km": round(distance_km, 3),
+        }
+
+
+def new_grid() -> GridIndex:
+    return GridIndex(settings.nearest_grid_cell_km, settings.nearest_reference_latitude)
+
+
+class NearestVehicleFinder:
+    """Ближайшие свободные автомобили из индекса в памяти воркера.
+
+    В индексе только автомобили в статусе AVAILABLE с известными
+    координатами. Индекс строится при старте приложения и поддерживается
+    событиями: смена статуса добавляет или убирает автомобиль, пачка
+    координат от телематики перемещает уже известные точки. События,
+    пришедшие во время перестроения, применяются к новому индексу перед
+    подменой, как в PlateSuggester.
+    """
+
+    def __init__(self):
+        self.index = new_grid()
+        self.ready = False
+        self._pending: Optional[List[Dict[str, Any]]] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self._session_factory: Optional[async_sessionmaker] = None
+
+    async def rebuild(self, session_factory: async_sessionmaker) -> None:
+        """Построить индекс заново по таблице vehicles"""
+        self._session_factory = session_factory
+        self._pending = []
+        started = time.perf_counter()
+        try:
+            index = new_grid()
+            async with session_factory() as session:
+                result = await session.stream(
+                    select(Vehicle.id, Vehicle.plate_number, Vehicle.latitude, Vehicle.longitude)
+                    .where(Vehicle.status == VehicleStatus.AVAILABLE, Vehicle.latitude.isnot(None))
+                    .execution_options(yield_per=10000)
+                )
+                async for rows in result.partitions():
+                    for vehicle_id, plate_number, lat, lon in rows:
+                        index.upsert(vehicle_id, plate_number, lat, lon)
+            for event in self._pending:
+                self._apply(index, event)
+            self.index = index
+            self.ready = True
+        finally:
+            self._pending = None
+        logger.info(
+            f"Индекс ближайших автомобилей построен: {len(self.index)} свободных "
+            f"за {time.perf_counter() - started:.2f} с"
+        )
+
+    def start_rebuild(self, session_factory: async_sessionmaker) -> None:
+        """Перестроить индекс в фоне, не блокируя обработку запросов; при ошибке - повтор"""
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(
+                rebuild_with_retries(lambda: self.rebuild(session_factory), "Индекс ближайших автомобилей")
+            )
+
+    async def stop(self) -> None:
+        if self._rebuild_task is not None:
+            self._rebuild_task.cancel()
+            try:
+                await self._rebuild_task
+            except asyncio.CancelledError:
+                pass
+
+    def handle_event(self, event: Dict[str, Any]) -> None:
+        """Обработчик шины событий автомобилей"""
+        if event["type"] == VEHICLE_RESYNC:
+            if self._session_factory is not None:
+                self.start_rebuild(self._session_factory)
+            return
+        self._apply(self.index, event)
+        if self._pending is not None:
+            self._pending.append(event)
+
+    @staticmethod
+    def _apply(index: GridIndex, event: Dict[str, Any]) -> None:
+        if event["type"] == VEHICLE_MOVED:
+            for vehicle_id, lat, lon in event["locations"]:
+                index.move(UUID(vehicle_id), lat, lon)
+        elif event["type"] == VEHICLE_UPSERTED:
+            vehicle = event["vehicle"]
+            vehicle_id = UUID(vehicle["id"])
+            if vehicle["status"] == VehicleStatus.AVAILABLE.value and vehicle.get("latitude") is not None:
+                index.upsert(vehicle_id, vehicle["plate_number"], vehicle["latitude"], vehicle["longitude"])
+            else:
+                index.remove(vehicle_id)
+        elif event["type"] == VEHICLE_DELETED:
+            index.remove(UUID(event["vehicle"]["id"]))
+
+    def nearest(self, lat: float, lon: float, k: int, max_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        return self.index.nearest(lat, lon, k, max_km or settings.nearest_max_radius_km)
+
+
+# Индекс ближайших свободных автомобилей процесса
+nearest_vehicles = NearestVehicleFinder()
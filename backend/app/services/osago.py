@@ -0,0 +1,143 @@
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional
+from uuid import UUID
+from zoneinfo import ZoneInfo
+import logging
+
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.osago import OsagoNotification
+
+logger = logging.getLogger(__name__)
+
+EXPIRING = "expiring"
+EXPIRED = "expired"
+
+# Ключ перед любым реальным (старт keyset-обхода)
+_MIN_ID = UUID(int=0)
+
+# Одна порция обхода: следующие :limit автомобилей по (дата окончания, id)
+# из окна дат и уведомления для них. Уже созданные уведомления пропускаются
+# уникальным индексом, поэтому перезапуск с начала ничего не дублирует.
+SCAN_CHUNK_SQL = text(
+    """
+    WITH chunk AS (
+        SELECT id, status, osago_policy_number, osago_expires_on
+        FROM vehicles
+        WHERE osago_expires_on IS NOT NULL
+          AND osago_expires_on BETWEEN :since AND :until
+          AND (osago_expires_on, id) > (:last_on, :last_id)
+        ORDER BY osago_expires_on, id
+        LIMIT :limit
+    ),
+    inserted AS (
+        INSERT INTO osago_notifications (vehicle_id, policy_number, expires_on, kind)
+        SELECT id, osago_policy_number, osago_expires_on,
+               CASE WHEN osago_expires_on < :today THEN :expired ELSE :expiring END
+        FROM chunk
+        WHERE status <> 'INACTIVE'
+        ON CONFLICT DO NOTHING
+        RETURNING 1
+    ),
+    last AS (
+        SELECT osago_expires_on, id FROM chunk ORDER BY osago_expires_on DESC, id DESC LIMIT 1
+    )
+    SELECT (SELECT count(*) FROM chunk) AS scanned,
+           (SELECT count(*) FROM inserted) AS created,
+           (SELECT osago_expires_on FROM last) AS last_on,
+           (SELECT id FROM last) AS last_id
+    """
+)
+
+
+def local_today() -> date:
+    return datetime.now(ZoneInfo(settings.timezone)).date()
+
+
+class OsagoService:
+    """Отслеживание окончания полисов ОСАГО"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def scan_expiring(self, today: Optional[date] = None) -> dict:
+        """Создать уведомления для полисов, которые скоро кончатся или недавно кончились.
+
+        Обходит только окно дат окончания по индексу порциями, каждая в своей
+        транзакции, так что стоимость зависит от числа таких полисов, а не от
+        размера автопарка. Прерванный запуск безопасно повторить.
+        """
+        today = today or local_today()
+        since = today - timedelta(days=settings.osago_expired_lookback_days)
+        until = today + timedelta(days=settings.osago_notice_days)
+        last_on, last_id = since - timedelta(days=1), _MIN_ID
+        scanned = created = 0
+
+        while True:
+            row = (await self.db.execute(SCAN_CHUNK_SQL, {
+                "since": since, "until": until, "today": today,
+                "expired": EXPIRED, "expiring": EXPIRING,
+                "last_on": last_on, "last_id": last_id,
+                "limit": settings.osago_scan_chunk_size,
+            })).one()
+            await self.db.commit()
+            if not row.scanned:
+                break
+            scanned += row.scanned
+            created += row.created
+            last_on, last_id = row.last_on, row.last_id
+
+        logger.info(f"ОСАГО: просмотрено полисов {scanned}, новых уведомлений {created}")
+        return {"scanned": scanned, "created": created}
+
+    async def enqueue_pending(self, send: Callable[[List[int]], None]) -> int:
+        """Передать неотправленные уведомления в send пачками.
+
+        Пачка помечается enqueued_at в той же транзакции, в которой вызывается
+        send: если постановка в очередь упала, пачка останется в ожидании до
+        следующего запуска.
+        """
+        total = 0
+        while True:
+            pending = (
+                select(OsagoNotification.id)
+                .where(OsagoNotification.enqueued_at.is_(None))
+                .order_by(OsagoNotification.id)
+                .limit(settings.osago_notify_batch_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            ids = (await self.db.execute(
+                update(OsagoNotification)
+                .where(OsagoNotification.id.in_(pending))
+                .values(enqueued_at=text("now()"))
+                .returning(OsagoNotification.id)
+            )).scalars().all()
+            if not ids:
+                await self.db.commit()
+                break
+            try:
+                send(sorted(ids))
+            except Exception:
+                await self.db.rollback()
+                raise
+            await self.db.commit()
+            total += len(ids)
+        return total
+
+    async def claim_for_sending(self, ids: List[int]) -> List[OsagoNotification]:
+        """Пометить уведомления отправленными; уже отправленные не возвращаются.
+
+        Повторная доставка той же пачки (повтор задачи Celery) ничего не шлет.
+        """
+        result = await self.db.execute(
+            update(OsagoNotification)
+            .where(OsagoNotification.id.in_(ids), OsagoNotification.sent_at.is_(None))
+            .values(sent_at=text("now()"))
+            .returning(OsagoNotification)
+        )
+        notifications = list(result.scalars().all())
+        await self.db.commit()
+        return notifications
@@ -0,0 +1,222 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from uuid import UUID
+from zoneinfo import ZoneInfo
+import csv
+import io
+import logging
+import re
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.penalty import Penalty
+from app.services.suggest import canonical_plate
+
+logger = logging.getLogger(__name__)
+
+# Колонки файла (заголовок обязателен, порядок любой, разделитель , или ;)
+COLUMNS = ("uin", "plate_number", "violated_at", "amount", "article", "location")
+REQUIRED_COLUMNS = ("uin", "plate_number", "violated_at", "amount")
+# Ошибок строк в ответе не больше этого (считаются все)
+MAX_REPORTED_ERRORS = 20
+
+# УИН постановления - 20 или 25 цифр
+_UIN_RE = re.compile(r"^\d{20}(\d{5})?$")
+_LOCAL_FORMATS = ("%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M")
+
+# Пачка штрафов одним запросом: сопоставление номеров - один JOIN с
+# vehicles по idx_vehicle_plate_unique, запись - одна вставка. Уже
+# загруженный штраф пропускается, а несопоставленный получает автомобиль,
+# если тот появился в реестре. xmax = 0 отличает вставку от обновления.
+IMPORT_BATCH_SQL = text(
+    """
+    WITH fines AS (
+        SELECT *
+        FROM unnest(
+            CAST(:uins AS text[]),
+            CAST(:plates AS text[]),
+            CAST(:violated_at AS timestamptz[]),
+            CAST(:amounts AS numeric[]),
+            CAST(:articles AS text[]),
+            CAST(:locations AS text[])
+        ) AS f (uin, plate_number, violated_at, amount, article, location)
+    ),
+    written AS (
+        INSERT INTO penalties AS p (uin, plate_number, vehicle_id, violated_at, amount, article, location)
+        SELECT f.uin, f.plate_number, v.id, f.violated_at, f.amount, f.article, f.location
+        FROM fines f
+        LEFT JOIN vehicles v ON v.plate_number = f.plate_number
+        ON CONFLICT (uin) DO UPDATE SET vehicle_id = EXCLUDED.vehicle_id
+        WHERE p.vehicle_id IS NULL AND EXCLUDED.vehicle_id IS NOT NULL
+        RETURNING xmax = 0 AS inserted, vehicle_id IS NOT NULL AS matched
+    )
+    SELECT count(*) FILTER (WHERE inserted) AS inserted,
+           count(*) FILTER (WHERE inserted AND matched) AS matched,
+           count(*) FILTER (WHERE NOT inserted) AS rematched
+    FROM written
+    """
+)
+
+Fine = Tuple[str, str, datetime, Decimal, Optional[str], Optional[str]]
+
+
+def _parse_datetime(value: str, tz: ZoneInfo) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in _LOCAL_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"неверное время нарушения «{value}»")
+    # Время без пояса - местное (как в выгрузках ГИБДД)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=tz)
+
+
+def _parse_row(row: List[str], index: Dict[str, int], tz: ZoneInfo) -> Fine:
+    """Штраф из строки файла; ValueError с причиной, если строка неверна"""
+    values = {name: row[i].strip() if i < len(row) else "" for name, i in index.items()}
+    uin = values["uin"]
+    if not _UIN_RE.match(uin):
+        raise ValueError(f"неверный УИН «{uin}»")
+    plate = canonical_plate(values["plate_number"])
+    if not plate or len(plate) > 20:
+        raise ValueError(f"неверный госномер «{values['plate_number']}»")
+    try:
+        amount = Decimal(values["amount"].replace(" ", "").replace(",", "."))
+    except InvalidOperation:
+        raise ValueError(f"неверная сумма «{values['amount']}»")
+    if not amount.is_finite() or amount <= 0 or amount >= 10 ** 8:
+        raise ValueError(f"неверная сумма «{values['amount']}»")
+    return (
+        uin,
+        plate,
+        _parse_datetime(values["violated_at"], tz),
+        amount.quantize(Decimal("0.01")),
+        values.get("article") or None,
+        (values.get("location") or "")[:255] or None,
+    )
+
+
+class PenaltyService:
+    """Штрафы за нарушения ПДД: импорт файлов и выборка"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def import_file(self, file: BinaryIO) -> dict:
+        """Загрузить файл штрафов (CSV, UTF-8).
+
+        Файл читается потоком: в памяти только текущая пачка из
+        penalty_batch_size строк, сопоставление и запись пачки - один
+        запрос в своей транзакции. Повторы внутри пачки и уже
+        загруженные штрафы (по УИН) пропускаются, поэтому файл можно
+        загрузить повторно, в том числе после обрыва.
+        """
+        started = time.perf_counter()
+        tz = ZoneInfo(settings.timezone)
+        # Starlette уже сохранил загрузку во временный файл; detach ниже
+        # оставляет его открытым для закрытия самим UploadFile
+        stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        try:
+            header_line = stream.readline()
+            delimiter = ";" if header_line.count(";") > header_line.count(",") else ","
+            header = [name.strip().lower() for name in next(csv.reader([header_line], delimiter=delimiter), [])]
+            missing = [name for name in REQUIRED_COLUMNS if name not in header]
+            if missing:
+                raise ValueError(f"В заголовке файла нет колонок: {', '.join(missing)}")
+            index = {name: header.index(name) for name in COLUMNS if name in header}
+
+            totals = {"inserted": 0, "matched": 0, "rematched": 0}
+            received = invalid = 0
+            errors: List[str] = []
+            batch: Dict[str, Fine] = {}
+            reader = csv.reader(stream, delimiter=delimiter)
+            for row in reader:
+                if not any(value.strip() for value in row):
+                    continue
+                received += 1
+                try:
+                    fine = _parse_row(row, index, tz)
+                except ValueError as e:
+                    invalid += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        # + 1: строку заголовка прочитал не reader
+                        errors.append(f"Строка {reader.line_num + 1}: {e}")
+                    continue
+                batch[fine[0]] = fine
+                if len(batch) >= settings.penalty_batch_size:
+                    await self._write_batch(list(batch.values()), totals)
+                    batch = {}
+            if batch:
+                await self._write_batch(list(batch.values()), totals)
+        except UnicodeDecodeError:
+            raise ValueError("Файл должен быть в кодировке UTF-8")
+        except csv.Error as e:
+            raise ValueError(f"Неверный формат CSV: {e}")
+        finally:
+            stream.detach()
+
+        seconds = time.perf_counter() - started
+        result = {
+            "received": received,
+            **totals,
+            "unmatched": totals["inserted"] - totals["matched"],
+            "duplicates": received - invalid - totals["inserted"] - totals["rematched"],
+            "invalid": invalid,
+            "errors": errors,
+            "seconds": round(seconds, 3),
+            "fines_per_second": round(received / seconds, 1) if seconds else 0.0,
+        }
+        logger.info(
+            f"Импорт штрафов: строк {received}, новых {totals['inserted']} "
+            f"(сопоставлено {totals['matched']}), с ошибками {invalid}, {result['fines_per_second']:.0f} штрафов/с"
+        )
+        return result
+
+    async def _write_batch(self, fines: List[Fine], totals: Dict[str, int]) -> None:
+        uins, plates, violated_at, amounts, articles, locations = zip(*fines)
+        row = (await self.db.execute(IMPORT_BATCH_SQL, {
+            "uins": list(uins),
+            "plates": list(plates),
+            "violated_at": list(violated_at),
+            "amounts": list(amounts),
+            "articles": list(articles),
+            "locations": list(locations),
+        })).one()
+        await self.db.commit()
+        for key in totals:
+            totals[key] += getattr(row, key)
+
+    async def get_penalties(
+        self,
+        vehicle_id: Optional[UUID] = None,
+        matched: Optional[bool] = None,
+        page: int = 1,
+        page_size: int = 20
+    ) -> Tuple[List[Penalty], int]:
+        """Штрафы автомобиля или несопоставленные, новые нарушения первыми"""
+        conditions = []
+        if vehicle_id:
+            conditions.append(Penalty.vehicle_id == vehicle_id)
+        if matched is not None:
+            conditions.append(Penalty.vehicle_id.isnot(None) if matched else Penalty.vehicle_id.is_(None))
+
+        total = (await self.db.execute(
+            select(func.count()).select_from(Penalty).where(*conditions)
+        )).scalar_one()
+        penalties = (await self.db.execute(
+            select(Penalty)
+            .where(*conditions)
+            .order_by(Penalty.violated_at.desc(), Penalty.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )).scalars().all()
+        return list(penalties), total
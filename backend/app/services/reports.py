@@ -0,0 +1,266 @@
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from zoneinfo import ZoneInfo
+import csv
+import hashlib
+import json
+import logging
+import os
+
+from openpyxl import Workbook
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.report import ACTIVE_STATES, DONE, FAILED, PENDING, RUNNING, ReportJob
+from app.models.vehicle import Vehicle, VehicleCity, VehicleStatus
+from app.schemas.report import ReportJobCreate
+from app.services.osago import local_today
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+FLEET_HEADER = [
+    "Госномер", "VIN", "Марка", "Модель", "Год выпуска", "Цвет", "Статус", "Город",
+    "Пробег, км", "Возраст, лет", "Пробег в год, км", "В статусе с", "Дней в статусе",
+    "Полис ОСАГО", "ОСАГО до", "Дней до конца ОСАГО",
+]
+
+FLEET_COLUMNS = (
+    Vehicle.plate_number, Vehicle.vin, Vehicle.brand, Vehicle.model, Vehicle.year, Vehicle.color,
+    Vehicle.status, Vehicle.city, Vehicle.mileage_km, Vehicle.status_changed_at,
+    Vehicle.osago_policy_number, Vehicle.osago_expires_on,
+)
+
+
+def _fleet_row(row, today: date, tz: ZoneInfo) -> List[Any]:
+    """Строка отчета с вычисляемыми колонками"""
+    age = max(today.year - row.year, 0)
+    # В xlsx нельзя писать время с часовым поясом: пишем местное
+    changed_at = row.status_changed_at.astimezone(tz)
+    return [
+        row.plate_number, row.vin, row.brand, row.model, row.year, row.color,
+        row.status.value, row.city.value if row.city else None,
+        row.mileage_km, age, row.mileage_km // max(age, 1),
+        changed_at.replace(tzinfo=None, microsecond=0), (today - changed_at.date()).days,
+        row.osago_policy_number, row.osago_expires_on,
+        (row.osago_expires_on - today).days if row.osago_expires_on else None,
+    ]
+
+
+class _CsvWriter:
+    def __init__(self, path: Path, header: List[str]):
+        # BOM, чтобы Excel открыл кириллицу без мастера импорта
+        self._file = open(path, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(header)
+
+    def write(self, rows: List[List[Any]]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _XlsxWriter:
+    # write_only: строки сразу уходят во временный файл листа, а не в память
+    def __init__(self, path: Path, header: List[str]):
+        self._path = path
+        self._book = Workbook(write_only=True)
+        self._sheet = self._book.create_sheet("Автопарк")
+        self._sheet.append(header)
+
+    def write(self, rows: List[List[Any]]) -> None:
+        for row in rows:
+            self._sheet.append(row)
+
+    def close(self) -> None:
+        self._book.save(self._path)
+
+
+WRITERS = {"csv": _CsvWriter, "xlsx": _XlsxWriter}
+
+
+def report_path(job: ReportJob) -> Path:
+    return Path(settings.report_dir) / f"{job.id}.{job.format}"
+
+
+def download_name(job: ReportJob) -> str:
+    return f"fleet-{job.created_at.astimezone(ZoneInfo(settings.timezone)):%Y%m%d-%H%M}.{job.format}"
+
+
+def estimate(job: ReportJob) -> Tuple[float, Optional[float]]:
+    """Доля готовых строк и оценка оставшегося времени в секундах"""
+    if job.status == DONE:
+        return 1.0, 0.0
+    if not job.total_rows:
+        return 0.0, None
+    progress = min(job.rows_done / job.total_rows, 1.0)
+    if job.status != RUNNING or not job.rows_done or job.started_at is None:
+        return progress, None
+    elapsed = (datetime.now(timezone.utc) - job.started_at).total_seconds()
+    return progress, round(elapsed * (1 - progress) / progress, 1)
+
+
+class ReportJobService:
+    """Фоновые отчеты по автопарку: задания, построение файла, очистка"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, data: ReportJobCreate) -> Tuple[ReportJob, bool]:
+        """Создать задание или вернуть уже ждущее/выполняемое с теми же параметрами.
+
+        Второй элемент - создано ли задание (только тогда его нужно ставить
+        в очередь). Одинаковые запросы сводит частичный уникальный индекс,
+        поэтому гонка двух POST тоже дает одно задание.
+        """
+        params = {
+            "format": data.format,
+            "status": data.status.value if data.status else None,
+            "city": data.city.value if data.city else None,
+        }
+        params_hash = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        await self.fail_stale(params_hash)
+
+        # Задание может завершиться между вставкой и чтением, тогда пробуем снова
+        for _ in range(3):
+            job = (await self.db.execute(
+                insert(ReportJob)
+                .values(format=data.format, params=params, params_hash=params_hash, status=PENDING, rows_done=0)
+                .on_conflict_do_nothing(index_elements=["params_hash"], index_where=ReportJob.status.in_(ACTIVE_STATES))
+                .returning(ReportJob)
+            )).scalar_one_or_none()
+            if job is not None:
+                await self.db.commit()
+                return job, True
+            job = (await self.db.execute(
+                select(ReportJob).where(ReportJob.params_hash == params_hash, ReportJob.status.in_(ACTIVE_STATES))
+            )).scalar_one_or_none()
+            await self.db.commit()
+            if job is not None:
+                return job, False
+        raise RuntimeError("Не удалось создать задание отчета")
+
+    async def get(self, job_id: UUID) -> Optional[ReportJob]:
+        return await self.db.get(ReportJob, job_id)
+
+    async def mark_failed(self, job_id: UUID, error: str) -> None:
+        await self.db.execute(
+            update(ReportJob)
+            .where(ReportJob.id == job_id, ReportJob.status.in_(ACTIVE_STATES))
+            .values(status=FAILED, error=error, finished_at=func.now())
+        )
+        await self.db.commit()
+
+    async def fail_stale(self, params_hash: Optional[str] = None) -> int:
+        """Пометить упавшими выполняемые задания, которые давно не писали прогресс"""
+        query = (
+            update(ReportJob)
+            .where(
+                ReportJob.status == RUNNING,
+                ReportJob.updated_at < func.now() - text(f"interval '{settings.report_stale_seconds} seconds'")
+            )
+            .values(status=FAILED, error="Построение прервано", finished_at=func.now())
+        )
+        if params_hash is not None:
+            query = query.where(ReportJob.params_hash == params_hash)
+        result = await self.db.execute(query)
+        await self.db.commit()
+        return result.rowcount
+
+    async def run(self, job_id: UUID) -> Dict[str, int]:
+        """Построить файл отчета по заданию.
+
+        Строки читаются серверным курсором порциями по report_chunk_size и
+        сразу пишутся в файл, так что память не зависит от размера автопарка.
+        Подсчет и выборка идут в одном снимке (REPEATABLE READ), поэтому
+        total_rows точен. Повторная доставка задачи ничего не делает.
+        """
+        job = (await self.db.execute(
+            update(ReportJob)
+            .where(ReportJob.id == job_id, ReportJob.status == PENDING)
+            .values(status=RUNNING, started_at=func.now())
+            .returning(ReportJob)
+        )).scalar_one_or_none()
+        await self.db.commit()
+        if job is None:
+            return {"rows": 0}
+
+        path = report_path(job)
+        partial = path.with_name(path.name + ".part")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            rows = await self._write(job, partial)
+            os.replace(partial, path)
+        except Exception as e:
+            partial.unlink(missing_ok=True)
+            await self.db.rollback()
+            await self.mark_failed(job.id, str(e)[:1000])
+            raise
+
+        await self.db.execute(
+            update(ReportJob)
+            .where(ReportJob.id == job.id)
+            .values(status=DONE, rows_done=rows, file_size=path.stat().st_size, finished_at=func.now())
+        )
+        await self.db.commit()
+        return {"rows": rows}
+
+    async def _write(self, job: ReportJob, path: Path) -> int:
+        conditions = []
+        if job.params.get("status"):
+            conditions.append(Vehicle.status == VehicleStatus(job.params["status"]))
+        if job.params.get("city"):
+            conditions.append(Vehicle.city == VehicleCity(job.params["city"]))
+        today, tz = local_today(), ZoneInfo(settings.timezone)
+
+        async with self.db.bind.connect() as conn:
+            await conn.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+            total = (await conn.execute(select(func.count()).select_from(Vehicle).where(*conditions))).scalar_one()
+            await self._progress(job.id, total_rows=total)
+
+            done = 0
+            writer = WRITERS[job.format](path, FLEET_HEADER)
+            try:
+                result = await conn.stream(
+                    select(*FLEET_COLUMNS)
+                    .where(*conditions)
+                    .order_by(Vehicle.plate_number)
+                    .execution_options(yield_per=settings.report_chunk_size)
+                )
+                async for rows in result.partitions():
+                    writer.write([_fleet_row(row, today, tz) for row in rows])
+                    done += len(rows)
+                    await self._progress(job.id, rows_done=done)
+            finally:
+                writer.close()
+        return done
+
+    async def _progress(self, job_id: UUID, **values) -> None:
+        # Отдельная короткая транзакция: прогресс виден API сразу
+        await self.db.execute(update(ReportJob).where(ReportJob.id == job_id).values(**values))
+        await self.db.commit()
+
+    async def purge_expired(self) -> int:
+        """Удалить завершенные задания старше report_retention_hours вместе с файлами"""
+        await self.fail_stale()
+        jobs = (await self.db.execute(
+            delete(ReportJob)
+            .where(
+                ReportJob.status.notin_(ACTIVE_STATES),
+                ReportJob.created_at < func.now() - text(f"interval '{settings.report_retention_hours} hours'")
+            )
+            .returning(ReportJob.id, ReportJob.format)
+        )).all()
+        await self.db.commit()
+        for job in jobs:
+            report_path(job).unlink(missing_ok=True)
+        return len(jobs)
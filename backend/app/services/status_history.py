@@ -0,0 +1,254 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from zoneinfo import ZoneInfo
+import logging
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.status_history import (
+    VehicleStatusTransition,
+    VehicleStatusHourly,
+    VehicleStatusDaily,
+    VehicleStatusVehicleDaily
+)
+from app.models.vehicle import Vehicle, VehicleCity, VehicleStatus
+from app.services.checkpoints import get_checkpoint, set_checkpoint
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_CHECKPOINT = "status_rollup"
+
+# Больше этого за один запуск не сворачиваем (догон после простоя идет частями)
+MAX_ROLLUP_WINDOW = timedelta(hours=6)
+
+BUSY_STATUSES = (VehicleStatus.RENTED_TAXI, VehicleStatus.RENTED_TOUR)
+
+# Свертка окна (:since, :until] одним запросом. Время в статусе по городу
+# считается через число автомобилей в каждой паре (город, статус) на начало
+# окна (vehicle_status_levels) и смены внутри окна, поэтому читаются только
+# новые записи журнала, а автомобили без смен учитываются без обращения к ним.
+# Все CTE видят один снимок, так что часы считаются по уровням на начало окна.
+ROLLUP_SQL = text(
+    """
+    WITH fresh AS (
+        SELECT *
+        FROM vehicle_status_transitions
+        WHERE changed_at > :since AND changed_at <= :until
+    ),
+    moves AS (
+        SELECT changed_at AS t, from_city AS city, from_status AS status, -1 AS delta
+        FROM fresh WHERE from_status IS NOT NULL
+        UNION ALL
+        SELECT changed_at, to_city, to_status, 1
+        FROM fresh WHERE to_status IS NOT NULL
+    ),
+    slots AS (
+        SELECT h AS hour, GREATEST(h, :since) AS s, LEAST(h + interval '1 hour', :until) AS e
+        FROM generate_series(date_trunc('hour', CAST(:since AS timestamptz), 'UTC'), :until, interval '1 hour') AS h
+        WHERE h < :until
+    ),
+    parts AS (
+        SELECT slots.hour, l.city, l.status, l.vehicles * extract(epoch FROM slots.e - slots.s) AS seconds
+        FROM slots CROSS JOIN vehicle_status_levels l
+        UNION ALL
+        SELECT slots.hour, m.city, m.status, m.delta * extract(epoch FROM slots.e - GREATEST(m.t, slots.s))
+        FROM moves m JOIN slots ON m.t < slots.e
+    ),
+    hourly AS (
+        SELECT hour, city, status, sum(seconds) AS seconds
+        FROM parts
+        GROUP BY hour, city, status
+        HAVING sum(seconds) <> 0
+    ),
+    upsert_hourly AS (
+        INSERT INTO vehicle_status_hourly AS h (hour, city, status, seconds)
+        SELECT hour, city, status, seconds FROM hourly
+        ON CONFLICT (hour, city, status) DO UPDATE SET seconds = h.seconds + EXCLUDED.seconds
+        RETURNING 1
+    ),
+    upsert_daily AS (
+        INSERT INTO vehicle_status_daily AS d (day, city, status, seconds)
+        SELECT (hour AT TIME ZONE :tz)::date, city, status, sum(seconds)
+        FROM hourly
+        GROUP BY 1, city, status
+        ON CONFLICT (day, city, status) DO UPDATE SET seconds = d.seconds + EXCLUDED.seconds
+        RETURNING 1
+    ),
+    upsert_levels AS (
+        INSERT INTO vehicle_status_levels AS l (city, status, vehicles)
+        SELECT city, status, sum(delta) FROM moves GROUP BY city, status
+        ON CONFLICT (city, status) DO UPDATE SET vehicles = l.vehicles + EXCLUDED.vehicles
+        RETURNING 1
+    ),
+    upsert_vehicle_daily AS (
+        INSERT INTO vehicle_status_vehicle_daily AS v (vehicle_id, day, status, seconds)
+        SELECT f.vehicle_id, d.day, f.from_status, sum(extract(epoch FROM
+            LEAST(f.changed_at, (d.day + 1)::timestamp AT TIME ZONE :tz)
+            - GREATEST(f.from_changed_at, d.day::timestamp AT TIME ZONE :tz)
+        ))
+        FROM fresh f
+        CROSS JOIN LATERAL generate_series(
+            (f.from_changed_at AT TIME ZONE :tz)::date,
+            (f.changed_at AT TIME ZONE :tz)::date,
+            interval '1 day'
+        ) AS g (day_start)
+        CROSS JOIN LATERAL (SELECT g.day_start::date AS day) d
+        WHERE f.from_status IS NOT NULL
+        GROUP BY f.vehicle_id, d.day, f.from_status
+        ON CONFLICT (vehicle_id, day, status) DO UPDATE SET seconds = v.seconds + EXCLUDED.seconds
+        RETURNING 1
+    )
+    SELECT
+        (SELECT count(*) FROM fresh) AS transitions,
+        (SELECT count(*) FROM upsert_hourly) AS hourly,
+        (SELECT count(*) FROM upsert_daily) AS daily,
+        (SELECT count(*) FROM upsert_levels) AS levels,
+        (SELECT count(*) FROM upsert_vehicle_daily) AS vehicle_daily
+    """
+)
+
+
+def utilization(seconds: Dict[VehicleStatus, float]) -> float:
+    """Доля времени в аренде от времени, когда автомобиль в парке (без INACTIVE)"""
+    active = sum(value for status, value in seconds.items() if status != VehicleStatus.INACTIVE)
+    busy = sum(seconds.get(status, 0.0) for status in BUSY_STATUSES)
+    return round(busy / active, 4) if active > 0 else 0.0
+
+
+class StatusHistoryService:
+    """Сервис истории статусов и загрузки парка"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def rollup(self) -> dict:
+        """Свернуть смены статусов после прошлого запуска в почасовые и дневные таблицы.
+
+        Смены выбираются по changed_at до now() - задержка, чтобы не пропустить
+        еще не зафиксированные транзакции. Позиция сохраняется в той же
+        транзакции, что и результаты свертки.
+        """
+        until = datetime.now(timezone.utc) - timedelta(seconds=settings.status_rollup_lag_seconds)
+        since = await get_checkpoint(self.db, ROLLUP_CHECKPOINT, lock=True)
+        if since is None:
+            first = (await self.db.execute(select(func.min(VehicleStatusTransition.changed_at)))).scalar()
+            since = first - timedelta(microseconds=1) if first else until
+        until = min(until, since + MAX_ROLLUP_WINDOW)
+        if since >= until:
+            await self.db.rollback()
+            return {"transitions": 0}
+
+        row = (await self.db.execute(
+            ROLLUP_SQL, {"since": since, "until": until, "tz": settings.timezone}
+        )).one()
+        await set_checkpoint(self.db, ROLLUP_CHECKPOINT, until)
+        await self.db.commit()
+        return dict(row._mapping)
+
+    async def get_fleet_utilization(
+        self,
+        date_from: date,
+        date_to: date,
+        city: Optional[VehicleCity] = None,
+        hourly: bool = False
+    ) -> List[Tuple[datetime, Dict[VehicleStatus, float]]]:
+        """Время в статусах по дням или часам из свертки"""
+        if hourly:
+            tz = ZoneInfo(settings.timezone)
+            bucket = VehicleStatusHourly.hour
+            table = VehicleStatusHourly
+            start = datetime.combine(date_from, time(), tz)
+            end = datetime.combine(date_to + timedelta(days=1), time(), tz)
+        else:
+            bucket = VehicleStatusDaily.day
+            table = VehicleStatusDaily
+            start, end = date_from, date_to + timedelta(days=1)
+
+        query = (
+            select(bucket, table.status, func.sum(table.seconds))
+            .where(bucket >= start, bucket < end)
+            .group_by(bucket, table.status)
+            .order_by(bucket)
+        )
+        if city:
+            query = query.where(table.city == city)
+
+        buckets: Dict[datetime, Dict[VehicleStatus, float]] = {}
+        for value, status, seconds in await self.db.execute(query):
+            buckets.setdefault(value, {})[status] = float(seconds)
+        return list(buckets.items())
+
+    async def get_vehicle_seconds(
+        self,
+        vehicle_id: UUID,
+        date_from: date,
+        date_to: date
+    ) -> Dict[VehicleStatus, float]:
+        """Время автомобиля в статусах за период.
+
+        Дневная свертка дополняется сменами, которые еще не свернуты, и
+        текущим незакрытым интервалом.
+        """
+        # Свертка и ее позиция читаются из одного снимка, иначе смену,
+        # свернутую между запросами, можно учесть дважды
+        await self.db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+        tz = ZoneInfo(settings.timezone)
+        start = datetime.combine(date_from, time(), tz)
+        end = min(datetime.combine(date_to + timedelta(days=1), time(), tz), datetime.now(timezone.utc))
+
+        seconds: Dict[VehicleStatus, float] = {}
+        rolled = await self.db.execute(
+            select(VehicleStatusVehicleDaily.status, func.sum(VehicleStatusVehicleDaily.seconds))
+            .where(
+                VehicleStatusVehicleDaily.vehicle_id == vehicle_id,
+                VehicleStatusVehicleDaily.day >= date_from,
+                VehicleStatusVehicleDaily.day <= date_to
+            )
+            .group_by(VehicleStatusVehicleDaily.status)
+        )
+        for status, value in rolled:
+            seconds[status] = float(value)
+
+        def add(status: VehicleStatus, interval_start: datetime, interval_end: datetime) -> None:
+            overlap = (min(interval_end, end) - max(interval_start, start)).total_seconds()
+            if overlap > 0:
+                seconds[status] = seconds.get(status, 0.0) + overlap
+
+        checkpoint = await get_checkpoint(self.db, ROLLUP_CHECKPOINT)
+        pending = select(VehicleStatusTransition).where(
+            VehicleStatusTransition.vehicle_id == vehicle_id,
+            VehicleStatusTransition.from_status.isnot(None)
+        )
+        if checkpoint:
+            pending = pending.where(VehicleStatusTransition.changed_at > checkpoint)
+        for transition in (await self.db.execute(pending)).scalars():
+            add(transition.from_status, transition.from_changed_at, transition.changed_at)
+
+        vehicle = (await self.db.execute(
+            select(Vehicle.status, Vehicle.status_changed_at).where(Vehicle.id == vehicle_id)
+        )).one_or_none()
+        if vehicle:
+            add(vehicle.status, vehicle.status_changed_at, end)
+
+        return seconds
+
+    async def get_vehicle_transitions(
+        self,
+        vehicle_id: UUID,
+        before: Optional[datetime] = None,
+        limit: int = 50
+    ) -> List[VehicleStatusTransition]:
+        """Журнал смен автомобиля, от новых к старым"""
+        query = (
+            select(VehicleStatusTransition)
+            .where(VehicleStatusTransition.vehicle_id == vehicle_id)
+            .order_by(VehicleStatusTransition.changed_at.desc())
+            .limit(limit)
+        )
+        if before:
+            query = query.where(VehicleStatusTransition.changed_at < before)
+        return list((await self.db.execute(query)).scalars())
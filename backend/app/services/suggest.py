@@ -0,0 +1,247 @@
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+import asyncio
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.vehicle import Vehicle
+from app.services.events import VEHICLE_DELETED, VEHICLE_RESYNC, VEHICLE_UPSERTED, rebuild_with_retries
+
+logger = logging.getLogger(__name__)
+
+# Кириллические буквы номеров и их латинские двойники
+PLATE_CYRILLIC = "АВЕКМНОРСТУХ"
+PLATE_LATIN = "ABEKMHOPCTYX"
+_TO_LATIN = str.maketrans(PLATE_CYRILLIC, PLATE_LATIN, " -")
+_TO_CYRILLIC = str.maketrans(PLATE_LATIN, PLATE_CYRILLIC)
+_TO_STORED_PLATE = str.maketrans(PLATE_LATIN, PLATE_CYRILLIC, " -")
+
+
+def normalize_key(value: str) -> str:
+    """Ключ поиска: верхний регистр, латиница вместо кириллических двойников"""
+    return value.upper().translate(_TO_LATIN)
+
+
+def canonical_plate(value: str) -> str:
+    """Номер в хранимом виде: верхний регистр, кириллица, без пробелов и дефисов.
+
+    Хранимый номер ограничен check_plate_format, поэтому сам служит
+    нормализованным ключом: поиск и проверка дублей - одно обращение
+    к idx_vehicle_plate_unique при любом алфавите ввода.
+    """
+    return value.upper().translate(_TO_STORED_PLATE)
+
+
+def canonical_vin(value: str) -> str:
+    """VIN в хранимом виде (латиница, check_vin_format)"""
+    return normalize_key(value)
+
+
+class PrefixIndex:
+    """Отсортированный индекс номеров и VIN для поиска по префиксу.
+
+    Ключи хранятся в ASCII (номер переводится в латиницу), отсортированный
+    список ключей и параллельный массив слотов позволяют найти первые
+    совпадения через bisect. Данные автомобиля лежат в слоте: UUID
+    в общем bytearray, номер и VIN - в списках по номеру слота.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._key_slots = array("i")
+        self._ids = bytearray()
+        self._plates: List[Optional[str]] = []
+        self._vins: List[Optional[str]] = []
+        self._slot_by_id: Dict[bytes, int] = {}
+        self._free_slots: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+
+    def build(self, rows: Iterable[Tuple[UUID, str, Optional[str]]]) -> None:
+        """Заполнить пустой индекс одной сортировкой"""
+        self.extend(rows)
+        self.sort()
+
+    def extend(self, rows: Iterable[Tuple[UUID, str, Optional[str]]]) -> None:
+        """Добавить автомобили без сортировки ключей (до вызова sort)"""
+        for vehicle_id, plate_number, vin in rows:
+            slot = self._allocate(vehicle_id.bytes, plate_number, vin)
+            for key in self._slot_keys(slot):
+                self._keys.append(key)
+                self._key_slots.append(slot)
+
+    def sort(self) -> None:
+        """Упорядочить ключи после extend"""
+        order = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+        self._keys = [self._keys[i] for i in order]
+        self._key_slots = array("i", (self._key_slots[i] for i in order))
+
+    def upsert(self, vehicle_id: UUID, plate_number: str, vin: Optional[str]) -> None:
+        """Добавить автомобиль или обновить его номер и VIN"""
+        raw_id = vehicle_id.bytes
+        slot = self._slot_by_id.get(raw_id)
+        if slot is not None:
+            if (
+                self._plates[slot] == normalize_key(plate_number)
+                and self._vins[slot] == (vin.upper() if vin else None)
+            ):
+                return
+            self.remove(vehicle_id)
+        slot = self._allocate(raw_id, plate_number, vin)
+        for key in self._slot_keys(slot):
+            position = bisect_left(self._keys, key)
+            self._keys.insert(position, key)
+            self._key_slots.insert(position, slot)
+
+    def remove(self, vehicle_id: UUID) -> None:
+        """Удалить автомобиль из индекса"""
+        slot = self._slot_by_id.pop(vehicle_id.bytes, None)
+        if slot is None:
+            return
+        for key in self._slot_keys(slot):
+            position = bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._key_slots[position] == slot:
+                    del self._keys[position]
+                    del self._key_slots[position]
+                    break
+                position += 1
+        self._plates[slot] = None
+        self._vins[slot] = None
+        self._free_slots.append(slot)
+
+    def search(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Первые limit автомобилей, у которых номер или VIN начинается с prefix"""
+        prefix = normalize_key(prefix)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        position = bisect_left(self._keys, prefix)
+        while position < len(self._keys) and len(results) < limit:
+            key = self._keys[position]
+            if not key.startswith(prefix):
+                break
+            slot = self._key_slots[position]
+            if slot not in seen:
+                seen.add(slot)
+                results.append(self._slot_data(slot))
+            position += 1
+        return results
+
+    def _allocate(self, raw_id: bytes, plate_number: str, vin: Optional[str]) -> int:
+        plate_key = normalize_key(plate_number)
+        vin_key = vin.upper() if vin else None
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._ids[slot * 16:(slot + 1) * 16] = raw_id
+            self._plates[slot] = plate_key
+            self._vins[slot] = vin_key
+        else:
+            slot = len(self._plates)
+            self._ids += raw_id
+            self._plates.append(plate_key)
+            self._vins.append(vin_key)
+        self._slot_by_id[raw_id] = slot
+        return slot
+
+    def _slot_keys(self, slot: int) -> List[str]:
+        keys = [self._plates[slot]]
+        if self._vins[slot]:
+            keys.append(self._vins[slot])
+        return keys
+
+    def _slot_data(self, slot: int) -> Dict[str, Any]:
+        return {
+            "id": UUID(bytes=bytes(self._ids[slot * 16:(slot + 1) * 16])),
+            "plate_number": self._plates[slot].translate(_TO_CYRILLIC),
+            "vin": self._vins[slot],
+        }
+
+
+class PlateSuggester:
+    """Подсказки по номеру и VIN из индекса в памяти воркера.
+
+    Индекс строится при старте приложения и поддерживается событиями
+    изменения автомобилей. События, пришедшие во время перестроения,
+    накапливаются и применяются к новому индексу перед подменой.
+    """
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        self.ready = False
+        self._pending: Optional[List[Dict[str, Any]]] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self._session_factory: Optional[async_sessionmaker] = None
+
+    async def rebuild(self, session_factory: async_sessionmaker) -> None:
+        """Построить индекс заново по таблице vehicles"""
+        self._session_factory = session_factory
+        self._pending = []
+        started = time.perf_counter()
+        try:
+            index = PrefixIndex()
+            async with session_factory() as session:
+                result = await session.stream(
+                    select(Vehicle.id, Vehicle.plate_number, Vehicle.vin)
+                    .execution_options(yield_per=10000)
+                )
+                async for rows in result.partitions():
+                    index.extend(rows)
+            index.sort()
+            for event in self._pending:
+                self._apply(index, event)
+            self.index = index
+            self.ready = True
+        finally:
+            self._pending = None
+        logger.info(
+            f"Индекс подсказок построен: {len(self.index)} автомобилей "
+            f"за {time.perf_counter() - started:.2f} с"
+        )
+
+    def start_rebuild(self, session_factory: async_sessionmaker) -> None:
+        """Перестроить индекс в фоне, не блокируя обработку запросов; при ошибке - повтор"""
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(
+                rebuild_with_retries(lambda: self.rebuild(session_factory), "Индекс подсказок")
+            )
+
+    async def stop(self) -> None:
+        if self._rebuild_task is not None:
+            self._rebuild_task.cancel()
+            try:
+                await self._rebuild_task
+            except asyncio.CancelledError:
+                pass
+
+    def handle_event(self, event: Dict[str, Any]) -> None:
+        """Обработчик шины событий автомобилей"""
+        if event["type"] == VEHICLE_RESYNC:
+            if self._session_factory is not None:
+                self.start_rebuild(self._session_factory)
+            return
+        self._apply(self.index, event)
+        if self._pending is not None:
+            self._pending.append(event)
+
+    @staticmethod
+    def _apply(index: PrefixIndex, event: Dict[str, Any]) -> None:
+        if event["type"] == VEHICLE_UPSERTED:
+            vehicle = event["vehicle"]
+            index.upsert(UUID(vehicle["id"]), vehicle["plate_number"], vehicle["vin"])
+        elif event["type"] == VEHICLE_DELETED:
+            index.remove(UUID(event["vehicle"]["id"]))
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return self.index.search(prefix, limit)
+
+
+# Индекс подсказок процесса
+plate_suggester = PlateSuggester()
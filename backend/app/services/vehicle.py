@@ -1,11 +1,119 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_, and_
-from sqlalchemy.orm import selectinload
-from typing import List, Optional, Tuple
+from sqlalchemy import Integer, Select, String, select, func, or_, and_, true, tuple_, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.orm import aliased, selectinload
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 from uuid import UUID
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import ReadOnlyConnection
+from app.models.status_history import VehicleStatusTransition
 from app.models.vehicle import Vehicle, VehicleStatus, VehicleCity
-from app.schemas.vehicle import VehicleCreate, VehicleUpdate, VehicleFilters
+from app.schemas.vehicle import VehicleCreate, VehicleUpdate, VehicleFilters, VehicleResponse
+from app.services.events import VEHICLE_DELETED, VEHICLE_MOVED, VEHICLE_UPSERTED, vehicle_events
+from app.services.suggest import canonical_plate, canonical_vin
+
+# Фасеты без поискового запроса, общие для всех запросов воркера;
+# сбрасываются при любом изменении автомобилей в любом воркере
+# (перемещение на счетчики по статусу и городу не влияет)
+_facets_cache = TTLCache(ttl=settings.facets_cache_ttl)
+
+def _invalidate_facets(event: dict) -> None:
+    if event["type"] != VEHICLE_MOVED:
+        _facets_cache.clear()
+
+vehicle_events.subscribe(_invalidate_facets)
+
+# Готовые запросы горячих путей: строятся один раз на процесс (списки -
+# один раз на форму фильтров), значения передаются параметрами
+_list_statements: Dict[Tuple, Tuple[Select, Select]] = {}
+_facets_statements: Dict[Tuple, Select] = {}
+_page_with_facets_statements: Dict[Tuple[Select, Select], Select] = {}
+_vehicle_by_id = select(Vehicle).where(Vehicle.id == bindparam("vehicle_id"))
+_vehicle_for_update_by_id = (
+    _vehicle_by_id.with_for_update().execution_options(populate_existing=True)
+)
+_vehicle_by_plate = select(Vehicle).where(Vehicle.plate_number == bindparam("plate_number"))
+_vehicle_by_vin = select(Vehicle).where(Vehicle.vin == bindparam("vin"))
+
+def _facets_cache_key(filters: VehicleFilters) -> Optional[Tuple]:
+    # Без поискового запроса счетчики зависят только от фильтров
+    # статуса и города, поэтому их можно кэшировать
+    return None if filters.q else (filters.status, filters.city)
+
+def _parse_facets(rows: Sequence[Sequence[Any]]) -> Tuple[int, Dict[str, Dict[str, int]]]:
+    """Общее количество и счетчики из строк запроса фасетов:
+    (status, city, by_status, status_count, city_count, matched)"""
+    total = 0
+    facets: Dict[str, Dict[str, int]] = {'status': {}, 'city': {}}
+    for status, city, by_status, status_count, city_count, matched in rows:
+        if by_status:
+            facets['status'][status.value] = status_count
+            total += matched
+        elif city is not None:
+            facets['city'][city.value] = city_count
+    return total, facets
+
+async def _load_facets(
+    executor: Union[AsyncSession, ReadOnlyConnection],
+    filters: VehicleFilters
+) -> Tuple[int, Dict[str, Dict[str, int]]]:
+    """Общее количество и фасетные счетчики (через сессию или соединение для чтения)"""
+    cache_key = _facets_cache_key(filters)
+    if cache_key is not None:
+        cached = _facets_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    query, params = VehicleService.facets_statement(filters)
+    result = await executor.execute(query, params)
+    total, facets = _parse_facets(result.all())
+    
+    if cache_key is not None:
+        _facets_cache.set(cache_key, (total, facets))
+    
+    return total, facets
+
+async def _load_page_with_facets(
+    executor: Union[AsyncSession, ReadOnlyConnection],
+    filters: VehicleFilters,
+    orm: bool
+) -> Tuple[List[Any], int, Dict[str, Dict[str, int]]]:
+    """Страница и фасеты за одно обращение к БД.
+
+    Если счетчики есть в кэше, выполняется только запрос страницы, иначе -
+    общий запрос page_with_facets_statement. orm=True возвращает объекты
+    Vehicle (сессия), иначе строки (соединение для чтения).
+    """
+    cache_key = _facets_cache_key(filters)
+    cached = _facets_cache.get(cache_key) if cache_key is not None else None
+    if cached is not None:
+        query, _, params = VehicleService.list_statements(filters)
+        result = await executor.execute(query, params)
+        items = result.scalars().all() if orm else result.all()
+        total, facets = cached
+    else:
+        query, params = VehicleService.page_with_facets_statement(filters)
+        rows = (await executor.execute(query, params)).all()
+        # Строка есть всегда (LEFT JOIN к счетчикам), на пустой странице без автомобиля
+        facet_rows = [
+            (
+                VehicleStatus[status] if status else None,
+                VehicleCity[city] if city else None,
+                by_status, status_count, city_count, matched
+            )
+            for status, city, by_status, status_count, city_count, matched in rows[0].facets or ()
+        ]
+        total, facets = _parse_facets(facet_rows)
+        if cache_key is not None:
+            _facets_cache.set(cache_key, (total, facets))
+        if orm:
+            items = [row[0] for row in rows if row[0] is not None]
+        else:
+            items = [row for row in rows if row.id is not None]
+    facets = {name: counts for name, counts in facets.items() if name in filters.facets}
+    return items, total, facets
 
 class VehicleService:
     """Сервис для работы с автомобилями"""
@@ -13,12 +121,66 @@ class VehicleService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_vehicles(
-        self, 
-        filters: VehicleFilters
-    ) -> Tuple[List[Vehicle], int]:
-        """Получить список автомобилей с фильтрацией и пагинацией"""
+    @staticmethod
+    def _search_condition():
+        """Условие поиска по номеру, VIN, марке и модели (шаблон в параметре q)"""
+        search_term = bindparam("q", type_=String)
+        return or_(
+            Vehicle.plate_number.ilike(search_term),
+            Vehicle.vin.ilike(search_term),
+            Vehicle.brand.ilike(search_term),
+            Vehicle.model.ilike(search_term)
+        )
+
+    @staticmethod
+    def _filter_params(filters: VehicleFilters) -> Dict[str, Any]:
+        params: Dict[str, Any] = {}
+        if filters.q:
+            params["q"] = f"%{filters.q}%"
+        if filters.status:
+            params["status"] = filters.status
+        if filters.city:
+            params["city"] = filters.city
+        return params
+
+    @staticmethod
+    def _ordering(filters: VehicleFilters) -> Tuple[Optional[str], bool]:
+        descending = filters.ordering.startswith('-')
+        order_field = filters.ordering[1:] if descending else filters.ordering
+        if order_field not in Vehicle.__table__.c:
+            order_field = None
+        return order_field, descending
+
+    @staticmethod
+    def list_statements(filters: VehicleFilters) -> Tuple[Select, Select, Dict[str, Any]]:
+        """Запросы страницы и количества для формы фильтров и значения параметров.
+
+        Запросы строятся один раз на форму (какие фильтры заданы и сортировка),
+        значения передаются параметрами, поэтому на запрос не тратится время
+        на построение выражения и SQL одной формы всегда одинаковый: его
+        компиляция кэшируется SQLAlchemy, а подготовленный запрос - asyncpg.
+        """
+        order_field, descending = VehicleService._ordering(filters)
+        shape = (bool(filters.q), bool(filters.status), bool(filters.city), order_field, descending)
+        
+        statements = _list_statements.get(shape)
+        if statements is None:
+            statements = _list_statements[shape] = VehicleService._build_list_statements(*shape)
+        query, count_query = statements
         
+        params = VehicleService._filter_params(filters)
+        params["offset"] = (filters.page - 1) * filters.page_size
+        params["limit"] = filters.page_size
+        return query, count_query, params
+
+    @staticmethod
+    def _build_list_statements(
+        has_q: bool,
+        has_status: bool,
+        has_city: bool,
+        order_field: Optional[str],
+        descending: bool
+    ) -> Tuple[Select, Select]:
         # Базовый запрос
         query = select(Vehicle)
         count_query = select(func.count(Vehicle.id))
@@ -26,61 +188,205 @@ class VehicleService:
         # Применяем фильтры
         conditions = []
         
-        if filters.q:
-            search_term = f"%{filters.q}%"
-            conditions.append(
-                or_(
-                    Vehicle.plate_number.ilike(search_term),
-                    Vehicle.vin.ilike(search_term),
-                    Vehicle.brand.ilike(search_term),
-                    Vehicle.model.ilike(search_term)
-                )
-            )
+        if has_q:
+            conditions.append(VehicleService._search_condition())
         
-        if filters.status:
-            conditions.append(Vehicle.status == filters.status)
+        if has_status:
+            conditions.append(Vehicle.status == bindparam("status"))
             
-        if filters.city:
-            conditions.append(Vehicle.city == filters.city)
+        if has_city:
+            conditions.append(Vehicle.city == bindparam("city"))
         
         if conditions:
             query = query.where(and_(*conditions))
             count_query = count_query.where(and_(*conditions))
         
         # Применяем сортировку
-        if filters.ordering.startswith('-'):
-            order_field = filters.ordering[1:]
-            if hasattr(Vehicle, order_field):
-                query = query.order_by(getattr(Vehicle, order_field).desc())
-        else:
-            if hasattr(Vehicle, filters.ordering):
-                query = query.order_by(getattr(Vehicle, filters.ordering))
+        if order_field:
+            column = getattr(Vehicle, order_field)
+            query = query.order_by(column.desc() if descending else column)
         
         # Применяем пагинацию
-        offset = (filters.page - 1) * filters.page_size
-        query = query.offset(offset).limit(filters.page_size)
+        query = query.offset(bindparam("offset", type_=Integer)).limit(bindparam("limit", type_=Integer))
+        
+        return query, count_query
+
+    @staticmethod
+    def build_list_queries(filters: VehicleFilters) -> Tuple[Select, Select]:
+        """Запросы страницы и количества с подставленными значениями (для EXPLAIN и бенчмарков)"""
+        query, count_query, params = VehicleService.list_statements(filters)
+        return query.params(params), count_query.params(params)
+
+    async def get_vehicles(
+        self, 
+        filters: VehicleFilters
+    ) -> Tuple[List[Vehicle], int]:
+        """Получить список автомобилей с фильтрацией и пагинацией"""
+        
+        query, count_query, params = self.list_statements(filters)
         
         # Выполняем запросы
-        result = await self.db.execute(query)
+        result = await self.db.execute(query, params)
         vehicles = result.scalars().all()
         
-        count_result = await self.db.execute(count_query)
+        count_result = await self.db.execute(count_query, params)
         total = count_result.scalar()
         
         return vehicles, total
 
-    async def get_vehicle_by_id(self, vehicle_id: UUID) -> Optional[Vehicle]:
-        """Получить автомобиль по ID"""
-        query = select(Vehicle).where(Vehicle.id == vehicle_id)
-        result = await self.db.execute(query)
+    @staticmethod
+    def build_facets_query(filters: VehicleFilters) -> Select:
+        """Запрос фасетных счетчиков с подставленными значениями (для EXPLAIN)"""
+        query, params = VehicleService.facets_statement(filters)
+        return query.params(params)
+
+    @staticmethod
+    def facets_statement(filters: VehicleFilters) -> Tuple[Select, Dict[str, Any]]:
+        """Запрос фасетных счетчиков по статусу и городу и значения параметров.
+
+        Один проход GROUPING SETS ((status), (city)) по строкам, найденным
+        поисковым запросом. Счетчики по статусу учитывают фильтр по городу,
+        по городу - фильтр по статусу; matched учитывает оба фильтра и
+        в сумме по строкам статусов дает total для страницы. Как и запросы
+        списка, строится один раз на форму фильтров.
+        """
+        shape = (bool(filters.q), bool(filters.status), bool(filters.city))
+        query = _facets_statements.get(shape)
+        if query is None:
+            query = _facets_statements[shape] = VehicleService._build_facets_statement(*shape)
+        return query, VehicleService._filter_params(filters)
+
+    @staticmethod
+    def _build_facets_statement(has_q: bool, has_status: bool, has_city: bool) -> Select:
+        status_condition = Vehicle.status == bindparam("status") if has_status else true()
+        city_condition = Vehicle.city == bindparam("city") if has_city else true()
+        
+        query = select(
+            Vehicle.status,
+            Vehicle.city,
+            func.grouping(Vehicle.city).label('by_status'),
+            func.count().filter(city_condition).label('status_count'),
+            func.count().filter(status_condition).label('city_count'),
+            func.count().filter(and_(status_condition, city_condition)).label('matched'),
+        ).group_by(
+            func.grouping_sets(tuple_(Vehicle.status), tuple_(Vehicle.city))
+        )
+        
+        if has_q:
+            query = query.where(VehicleService._search_condition())
+        
+        return query
+
+    @staticmethod
+    def page_with_facets_statement(filters: VehicleFilters) -> Tuple[Select, Dict[str, Any]]:
+        """Страница и фасетные счетчики одним запросом и значения параметров.
+
+        Страница - CTE из запроса списка, счетчики - json_agg строк запроса
+        фасетов (одна строка); страница присоединяется к ней через LEFT
+        JOIN, так что и пустая страница возвращает счетчики. Каждая строка
+        результата - автомобиль и одинаковый столбец facets. Строится один
+        раз на пару запросов списка и фасетов.
+        """
+        query, _, params = VehicleService.list_statements(filters)
+        facets_query, _ = VehicleService.facets_statement(filters)
+        statement = _page_with_facets_statements.get((query, facets_query))
+        if statement is None:
+            statement = VehicleService._build_page_with_facets_statement(
+                query, facets_query, *VehicleService._ordering(filters)
+            )
+            _page_with_facets_statements[(query, facets_query)] = statement
+        return statement, params
+
+    @staticmethod
+    def _build_page_with_facets_statement(
+        query: Select,
+        facets_query: Select,
+        order_field: Optional[str],
+        descending: bool
+    ) -> Select:
+        page = query.cte("page")
+        facet_rows = facets_query.subquery("facet_rows")
+        counters = select(
+            func.json_agg(func.json_build_array(*facet_rows.c)).label("facets")
+        ).subquery("counters")
+        vehicle = aliased(Vehicle, page)
+        statement = (
+            select(vehicle, counters.c.facets)
+            .select_from(counters)
+            .outerjoin(page, true())
+        )
+        # Порядок страницы после соединения не гарантирован: сортируем
+        # ее строки (не больше page_size) тем же полем
+        if order_field:
+            column = getattr(vehicle, order_field)
+            statement = statement.order_by(column.desc() if descending else column)
+        return statement
+
+    async def get_facets(
+        self,
+        filters: VehicleFilters
+    ) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        """Получить общее количество и фасетные счетчики одним запросом"""
+        return await _load_facets(self.db, filters)
+
+    async def get_vehicles_with_facets(
+        self,
+        filters: VehicleFilters
+    ) -> Tuple[List[Vehicle], int, Dict[str, Dict[str, int]]]:
+        """Получить страницу автомобилей вместе с фасетными счетчиками.
+
+        Страница и счетчики (они же дают total вместо отдельного COUNT)
+        приходят одним запросом к БД.
+        """
+        return await _load_page_with_facets(self.db, filters, orm=True)
+
+    async def get_vehicle_by_id(self, vehicle_id: UUID, for_update: bool = False) -> Optional[Vehicle]:
+        """Получить автомобиль по ID (for_update блокирует строку до конца транзакции)"""
+        query = _vehicle_for_update_by_id if for_update else _vehicle_by_id
+        result = await self.db.execute(query, {"vehicle_id": vehicle_id})
         return result.scalar_one_or_none()
 
+    async def get_vehicles_by_ids(self, vehicle_ids: Sequence[UUID]) -> Dict[UUID, Vehicle]:
+        """Получить автомобили по списку ID одним запросом"""
+        if not vehicle_ids:
+            return {}
+        # Один параметр-массив вместо IN (...): текст запроса не зависит от числа id
+        ids = bindparam("ids", value=list(vehicle_ids), type_=ARRAY(PG_UUID(as_uuid=True)))
+        result = await self.db.execute(select(Vehicle).where(Vehicle.id == any_(ids)))
+        return {vehicle.id: vehicle for vehicle in result.scalars()}
+
     async def get_vehicle_by_plate(self, plate_number: str) -> Optional[Vehicle]:
-        """Получить автомобиль по номеру"""
-        query = select(Vehicle).where(Vehicle.plate_number == plate_number.upper())
-        result = await self.db.execute(query)
+        """Получить автомобиль по номеру в любом алфавите"""
+        result = await self.db.execute(_vehicle_by_plate, {"plate_number": canonical_plate(plate_number)})
         return result.scalar_one_or_none()
 
+    async def get_vehicle_by_vin(self, vin: str) -> Optional[Vehicle]:
+        """Получить автомобиль по VIN в любом алфавите"""
+        result = await self.db.execute(_vehicle_by_vin, {"vin": canonical_vin(vin)})
+        return result.scalar_one_or_none()
+
+    async def _record_transition(
+        self,
+        vehicle: Vehicle,
+        from_status: Optional[VehicleStatus],
+        from_city: Optional[VehicleCity],
+        deleted: bool = False
+    ) -> None:
+        """Записать смену статуса или города в журнал (в текущей транзакции)"""
+        # Время берется после блокировки строки, чтобы смены одного
+        # автомобиля шли в журнале в порядке фиксации
+        changed_at = (await self.db.execute(select(func.clock_timestamp()))).scalar()
+        self.db.add(VehicleStatusTransition(
+            vehicle_id=vehicle.id,
+            changed_at=changed_at,
+            from_status=from_status,
+            from_city=from_city,
+            from_changed_at=vehicle.status_changed_at if from_status else None,
+            to_status=None if deleted else vehicle.status,
+            to_city=None if deleted else vehicle.city
+        ))
+        vehicle.status_changed_at = changed_at
+
     async def create_vehicle(self, vehicle_data: VehicleCreate) -> Vehicle:
         """Создать новый автомобиль"""
         
@@ -91,16 +397,19 @@ class VehicleService:
         
         # Проверяем уникальность VIN (если указан)
         if vehicle_data.vin:
-            vin_query = select(Vehicle).where(Vehicle.vin == vehicle_data.vin.upper())
-            vin_result = await self.db.execute(vin_query)
-            if vin_result.scalar_one_or_none():
+            if await self.get_vehicle_by_vin(vehicle_data.vin):
                 raise ValueError("Автомобиль с таким VIN уже существует")
         
         # Создаем новый автомобиль
         vehicle = Vehicle(**vehicle_data.dict())
+        if vehicle.latitude is not None:
+            vehicle.location_updated_at = func.now()
         self.db.add(vehicle)
+        await self.db.flush()
+        await self._record_transition(vehicle, None, None)
         await self.db.commit()
         await self.db.refresh(vehicle)
+        await vehicle_events.publish(VEHICLE_UPSERTED, vehicle)
         
         return vehicle
 
@@ -111,7 +420,7 @@ class VehicleService:
     ) -> Optional[Vehicle]:
         """Обновить автомобиль"""
         
-        vehicle = await self.get_vehicle_by_id(vehicle_id)
+        vehicle = await self.get_vehicle_by_id(vehicle_id, for_update=True)
         if not vehicle:
             return None
         
@@ -123,29 +432,93 @@ class VehicleService:
         
         # Проверяем уникальность VIN (если изменяется)
         if vehicle_data.vin and vehicle_data.vin != vehicle.vin:
-            vin_query = select(Vehicle).where(Vehicle.vin == vehicle_data.vin.upper())
-            vin_result = await self.db.execute(vin_query)
-            if vin_result.scalar_one_or_none():
+            if await self.get_vehicle_by_vin(vehicle_data.vin):
                 raise ValueError("Автомобиль с таким VIN уже существует")
         
         # Обновляем поля
+        previous_status, previous_city = vehicle.status, vehicle.city
         update_data = vehicle_data.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(vehicle, field, value)
         
+        if 'latitude' in update_data or 'longitude' in update_data:
+            if (vehicle.latitude is None) != (vehicle.longitude is None):
+                raise ValueError("Широта и долгота задаются вместе")
+            vehicle.location_updated_at = func.now()
+        
+        # Частичное обновление может задать одну из дат ОСАГО
+        if vehicle.osago_starts_on and vehicle.osago_expires_on and vehicle.osago_expires_on < vehicle.osago_starts_on:
+            raise ValueError("Дата окончания ОСАГО раньше даты начала")
+        
+        if (vehicle.status, vehicle.city) != (previous_status, previous_city):
+            await self._record_transition(vehicle, previous_status, previous_city)
+        
         await self.db.commit()
         await self.db.refresh(vehicle)
+        await vehicle_events.publish(VEHICLE_UPSERTED, vehicle)
         
         return vehicle
 
     async def delete_vehicle(self, vehicle_id: UUID) -> bool:
         """Удалить автомобиль"""
         
-        vehicle = await self.get_vehicle_by_id(vehicle_id)
+        vehicle = await self.get_vehicle_by_id(vehicle_id, for_update=True)
         if not vehicle:
             return False
         
+        await self._record_transition(vehicle, vehicle.status, vehicle.city, deleted=True)
         await self.db.delete(vehicle)
         await self.db.commit()
+        await vehicle_events.publish(VEHICLE_DELETED, vehicle)
         
         return True
+
+
+class VehicleReader:
+    """Чтение автомобилей без ORM для GET-запросов.
+
+    Те же готовые запросы, что у VehicleService, выполняются на соединении
+    только для чтения; строки сразу становятся схемами ответа, без identity
+    map, отслеживания изменений и повторной проверки (данные проверены при
+    записи).
+    """
+
+    def __init__(self, conn: ReadOnlyConnection):
+        self.conn = conn
+
+    @staticmethod
+    def _to_response(row) -> VehicleResponse:
+        data = dict(row._mapping)
+        # Столбец счетчиков общего запроса страницы и фасетов
+        data.pop("facets", None)
+        return VehicleResponse.model_construct(**data)
+
+    async def get_vehicles(self, filters: VehicleFilters) -> Tuple[List[VehicleResponse], int]:
+        """Страница списка и общее количество"""
+        query, count_query, params = VehicleService.list_statements(filters)
+        rows = (await self.conn.execute(query, params)).all()
+        total = (await self.conn.execute(count_query, params)).scalar()
+        return [self._to_response(row) for row in rows], total
+
+    async def get_vehicles_with_facets(
+        self,
+        filters: VehicleFilters
+    ) -> Tuple[List[VehicleResponse], int, Dict[str, Dict[str, int]]]:
+        """Страница списка с фасетными счетчиками (вместо отдельного COUNT) одним запросом"""
+        rows, total, facets = await _load_page_with_facets(self.conn, filters, orm=False)
+        return [self._to_response(row) for row in rows], total, facets
+
+    async def get_vehicle_by_id(self, vehicle_id: UUID) -> Optional[VehicleResponse]:
+        """Карточка автомобиля"""
+        row = (await self.conn.execute(_vehicle_by_id, {"vehicle_id": vehicle_id})).first()
+        return self._to_response(row) if row else None
+
+    async def get_vehicle_by_plate(self, plate_number: str) -> Optional[VehicleResponse]:
+        """Автомобиль по номеру в любом алфавите"""
+        row = (await self.conn.execute(_vehicle_by_plate, {"plate_number": canonical_plate(plate_number)})).first()
+        return self._to_response(row) if row else None
+
+    async def get_vehicle_by_vin(self, vin: str) -> Optional[VehicleResponse]:
+        """Автомобиль по VIN в любом алфавите"""
+        row = (await self.conn.execute(_vehicle_by_vin, {"vin": canonical_vin(vin)})).first()
+        return self._to_response(row) if row else None
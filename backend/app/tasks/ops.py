@@ -1,5 +1,6 @@
 from celery import current_task
 from app.workers.celery import celery_app
+from app.workers.runtime import run_with_session
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,3 +16,85 @@ def vehicle_created_event(vehicle_id: str):
     """Задача, выполняемая при создании автомобиля"""
     logger.info(f"🚗 Авто создано: {vehicle_id}")
     return {"status": "success", "message": f"Автомобиль {vehicle_id} успешно создан"}
+
+@celery_app.task
+def rollup_mileage_readings():
+    """Свертка новых показаний одометра в дневную историю и vehicles.mileage_km"""
+    from app.services.mileage import MileageService
+
+    result = run_with_session(lambda session: MileageService(session).rollup())
+    logger.info(f"📈 Свертка пробега: дней {result['days']}, автомобилей {result['vehicles']}")
+    return {"status": "success", **result}
+
+@celery_app.task
+def ensure_mileage_partitions():
+    """Создание секций показаний одометра на ближайшие месяцы"""
+    from app.services.mileage import MileageService
+
+    run_with_session(lambda session: MileageService(session).ensure_upcoming_partitions())
+    return {"status": "success"}
+
+@celery_app.task
+def rollup_status_history():
+    """Свертка новых смен статуса в почасовую и дневную загрузку"""
+    from app.services.status_history import StatusHistoryService
+
+    result = run_with_session(lambda session: StatusHistoryService(session).rollup())
+    logger.info(f"📊 Свертка статусов: смен {result['transitions']}")
+    return {"status": "success", **result}
+
+@celery_app.task
+def scan_osago_expiry():
+    """Ночная проверка окончания полисов ОСАГО и постановка уведомлений в очередь"""
+    from app.services.osago import OsagoService
+
+    async def run(session):
+        service = OsagoService(session)
+        result = await service.scan_expiring()
+        result["enqueued"] = await service.enqueue_pending(notify_osago_expiry.delay)
+        return result
+
+    result = run_with_session(run)
+    logger.info(f"🛡️ ОСАГО: новых уведомлений {result['created']}, в очереди {result['enqueued']}")
+    return {"status": "success", **result}
+
+@celery_app.task
+def notify_osago_expiry(notification_ids: list):
+    """Отправка пачки уведомлений об окончании ОСАГО"""
+    from app.services.osago import EXPIRED, OsagoService
+
+    notifications = run_with_session(lambda session: OsagoService(session).claim_for_sending(notification_ids))
+    for item in notifications:
+        state = "истек" if item.kind == EXPIRED else "истекает"
+        logger.warning(
+            f"⚠️ Полис ОСАГО {item.policy_number} {state} {item.expires_on:%d.%m.%Y} "
+            f"(автомобиль {item.vehicle_id})"
+        )
+    return {"status": "success", "sent": len(notifications)}
+
+@celery_app.task
+def generate_report(job_id: str):
+    """Построение файла отчета по заданию"""
+    from uuid import UUID
+    from app.services.reports import ReportJobService
+
+    result = run_with_session(lambda session: ReportJobService(session).run(UUID(job_id)))
+    logger.info(f"📄 Отчет {job_id}: строк {result['rows']}")
+    return {"status": "success", **result}
+
+@celery_app.task
+def purge_report_jobs():
+    """Удаление старых отчетов и заданий"""
+    from app.services.reports import ReportJobService
+
+    purged = run_with_session(lambda session: ReportJobService(session).purge_expired())
+    return {"status": "success", "purged": purged}
+
+@celery_app.task
+def refresh_maintenance_schedule():
+    """Пересчет графика ТО всего автопарка"""
+    from app.services.maintenance import MaintenanceService
+
+    result = run_with_session(lambda session: MaintenanceService(session).refresh())
+    logger.info(f"🔧 График ТО: автомобилей {result['vehicles']}, изменено {result['updated']}")
+    return {"status": "success", **result}
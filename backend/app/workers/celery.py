@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.schedules import crontab
 from app.core.config import settings
 
 # Создание экземпляра Celery
@@ -21,5 +22,34 @@ celery_app.conf.update(
             "task": "app.tasks.ops.heartbeat",
             "schedule": 60.0,  # Каждую минуту
         },
+        "rollup-mileage-readings": {
+            "task": "app.tasks.ops.rollup_mileage_readings",
+            "schedule": 60.0,
+        },
+        "rollup-status-history": {
+            "task": "app.tasks.ops.rollup_status_history",
+            "schedule": 60.0,
+        },
+        "scan-osago-expiry": {
+            "task": "app.tasks.ops.scan_osago_expiry",
+            "schedule": crontab(hour=3, minute=0),  # Ночью по settings.timezone
+        },
+        "refresh-maintenance-schedule": {
+            "task": "app.tasks.ops.refresh_maintenance_schedule",
+            "schedule": 60 * 60.0,  # Каждый час
+        },
+        "purge-report-jobs": {
+            "task": "app.tasks.ops.purge_report_jobs",
+            "schedule": 60 * 60.0,  # Каждый час
+        },
+        "ensure-mileage-partitions": {
+            "task": "app.tasks.ops.ensure_mileage_partitions",
+            "schedule": 24 * 60 * 60.0,  # Раз в сутки
+        },
     },
 )
+
+# Event loop и пул БД процессов воркера (обработчики сигналов Celery)
+import app.workers.runtime  # noqa: E402,F401
+# Трассировка публикации и выполнения задач (traceparent в заголовках)
+import app.workers.tracing  # noqa: E402,F401
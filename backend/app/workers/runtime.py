@@ -0,0 +1,153 @@
+from typing import Any, Awaitable, Callable, Coroutine, Optional, TypeVar
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+
+from celery import concurrency, signals
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Модули пулов, в которых задачи процесса выполняются одновременно (в
+# prefork и solo процесс выполняет одну задачу за раз)
+_SHARED_POOLS = ("celery.concurrency.thread", "celery.concurrency.gevent", "celery.concurrency.eventlet")
+
+# Задач одновременно в одном процессе; задается при старте воркера
+# (до fork, поэтому дочерние процессы prefork его наследуют)
+_tasks_per_process = 1
+
+
+class WorkerRuntime:
+    """Event loop и пул соединений БД процесса воркера Celery.
+
+    Цикл событий работает в отдельном потоке все время жизни процесса,
+    задачи передают в него корутины и ждут результат. Соединения asyncpg
+    привязаны к циклу, поэтому один цикл на процесс позволяет держать их
+    в пуле между задачами, а не открывать новое на каждую.
+    """
+
+    def __init__(self, pool_size: int, max_overflow: int):
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="celery-db-loop", daemon=True)
+        self._thread.start()
+        self.engine: AsyncEngine = create_async_engine(
+            settings.database_url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.worker_db_pool_timeout,
+            pool_pre_ping=True,
+            pool_recycle=settings.worker_db_pool_recycle,
+            connect_args={"prepared_statement_cache_size": settings.db_prepared_statement_cache_size}
+        )
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Выполнить корутину в цикле процесса и дождаться результата.
+
+        Корутина получает копию контекста вызывающего потока (contextvars),
+        поэтому спан выполняемой задачи виден в ее запросах к БД.
+        """
+        future = asyncio.run_coroutine_threadsafe(_in_context(coro, contextvars.copy_context()), self.loop)
+        try:
+            return future.result()
+        except BaseException:
+            # Мягкий лимит времени Celery прерывает ожидание, а не корутину
+            future.cancel()
+            raise
+
+    def close(self) -> None:
+        try:
+            self.run(self.engine.dispose())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+
+
+async def _in_context(coro: Coroutine[Any, Any, T], context: contextvars.Context) -> T:
+    return await asyncio.get_running_loop().create_task(coro, context=context)
+
+
+_runtime: Optional[WorkerRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def pool_size() -> int:
+    """Постоянных соединений на процесс: по одному на одновременную задачу.
+
+    Не больше worker_db_pool_max: в gevent с --concurrency 500 остальные
+    задачи ждут свободное соединение, а не открывают новые.
+    """
+    return settings.worker_db_pool_size or min(_tasks_per_process, settings.worker_db_pool_max)
+
+
+def get_runtime() -> WorkerRuntime:
+    """Среда процесса; создается при старте процесса воркера или при первом вызове.
+
+    Проверка pid защищает от среды, унаследованной через fork: ее поток
+    цикла в дочернем процессе не существует.
+    """
+    global _runtime
+    if _runtime is None or _runtime.pid != os.getpid():
+        with _runtime_lock:
+            if _runtime is None or _runtime.pid != os.getpid():
+                _runtime = WorkerRuntime(pool_size(), settings.worker_db_max_overflow)
+                logger.info(
+                    f"БД воркера: процесс {_runtime.pid}, пул {pool_size()} + {settings.worker_db_max_overflow}"
+                )
+    return _runtime
+
+
+def close_runtime() -> None:
+    global _runtime
+    with _runtime_lock:
+        if _runtime is not None and _runtime.pid == os.getpid():
+            _runtime.close()
+        _runtime = None
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Выполнить корутину из синхронной задачи"""
+    return get_runtime().run(coro)
+
+
+def run_with_session(fn: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    """Выполнить корутину fn(session) с сессией из пула процесса"""
+    runtime = get_runtime()
+
+    async def run():
+        async with runtime.session_factory() as session:
+            return await fn(session)
+
+    return runtime.run(run())
+
+
+def tasks_per_process(pool_cls, concurrency_limit: Optional[int]) -> int:
+    """Задач одновременно в процессе воркера: pool_cls - класс пула или имя (-P threads)"""
+    pool = concurrency.get_implementation(pool_cls or "prefork")
+    if pool.__module__ in _SHARED_POOLS:
+        return concurrency_limit or 1
+    return 1
+
+
+@signals.worker_init.connect
+def _configure(sender=None, **kwargs):
+    global _tasks_per_process
+    _tasks_per_process = tasks_per_process(getattr(sender, "pool_cls", None), sender.concurrency)
+
+
+@signals.worker_process_init.connect
+def _start(**kwargs):
+    get_runtime()
+
+
+@signals.worker_process_shutdown.connect
+@signals.worker_shutdown.connect
+def _stop(**kwargs):
+    close_runtime()
@@ -0,0 +1,92 @@
+from contextvars import Token
+from typing import Dict, Tuple
+import threading
+
+from celery import signals
+
+from app.core import tracing
+from app.core.tracing import TRACEPARENT, Span
+
+# Начатые спаны по id задачи: сигналы до и после публикации или
+# выполнения - разные вызовы, общий у них только id
+_publishing: Dict[str, Span] = {}
+_running: Dict[str, Tuple[Span, Token]] = {}
+_lock = threading.Lock()
+
+
+@signals.before_task_publish.connect
+def _before_publish(sender=None, headers=None, **kwargs):
+    """Спан публикации; traceparent уходит в заголовках задачи"""
+    if headers is None:
+        return
+    span = tracing.start_span(f"celery.publish {sender}", "producer", root=False)
+    if span is None:
+        return
+    headers[TRACEPARENT] = span.traceparent()
+    if span.sampled:
+        span.set_attribute("celery.task", sender)
+        span.set_attribute("celery.task_id", headers.get("id"))
+        with _lock:
+            _publishing[headers.get("id")] = span
+
+
+@signals.after_task_publish.connect
+def _after_publish(sender=None, headers=None, **kwargs):
+    with _lock:
+        span = _publishing.pop((headers or {}).get("id"), None)
+    if span is not None:
+        span.end()
+
+
+@signals.task_prerun.connect
+def _task_started(task_id=None, task=None, **kwargs):
+    """Спан выполнения - продолжение трассы из заголовка traceparent.
+
+    Задача без заголовка (расписание beat) начинает новую трассу.
+    Спан становится текущим в потоке задачи; корутины задачи
+    WorkerRuntime выполняет в копии этого контекста.
+    """
+    traceparent = getattr(task.request, TRACEPARENT, None)
+    span = tracing.start_span(f"celery.run {task.name}", "consumer", traceparent)
+    if span is None:
+        return
+    span.set_attribute("celery.task", task.name)
+    span.set_attribute("celery.task_id", task_id)
+    span.set_attribute("celery.retries", task.request.retries or 0)
+    with _lock:
+        _running[task_id] = (span, tracing.activate(span))
+
+
+@signals.task_postrun.connect
+def _task_finished(task_id=None, state=None, **kwargs):
+    with _lock:
+        started = _running.pop(task_id, None)
+    if started is None:
+        return
+    span, token = started
+    tracing.deactivate(token)
+    span.set_attribute("celery.state", state)
+    if state not in ("SUCCESS", "RETRY", None):
+        span.status = "error"
+    span.end()
+
+
+@signals.task_failure.connect
+def _task_failed(task_id=None, exception=None, **kwargs):
+    with _lock:
+        started = _running.get(task_id)
+    if started is not None and exception is not None:
+        started[0].set_error(exception)
+
+
+@signals.worker_init.connect
+@signals.worker_process_init.connect
+def _worker_process(**kwargs):
+    tracing.process_role = "worker"
+    tracing.setup_tracing()
+
+
+@signals.worker_process_shutdown.connect
+@signals.worker_shutdown.connect
+def _flush(**kwargs):
+    tracing.stop_tracing()
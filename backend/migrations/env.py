@@ -1,7 +1,9 @@
 from logging.config import fileConfig
-from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
+import asyncio
 import os
 import sys
 
@@ -23,6 +25,19 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 from app.models.base import Base
 from app.models.vehicle import Vehicle  # Импортируем все модели
+from app.models.mileage import VehicleMileageReading, VehicleMileageDaily
+from app.models.checkpoint import JobCheckpoint
+from app.models.osago import OsagoNotification
+from app.models.report import ReportJob
+from app.models.maintenance import MaintenanceInterval, VehicleMaintenance
+from app.models.penalty import Penalty
+from app.models.status_history import (
+    VehicleStatusTransition,
+    VehicleStatusLevel,
+    VehicleStatusHourly,
+    VehicleStatusDaily,
+    VehicleStatusVehicleDaily
+)
 
 target_metadata = Base.metadata
 
@@ -59,29 +74,44 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
-def run_migrations_online() -> None:
-    """Run migrations in 'online' mode.
+def do_run_migrations(connection: Connection) -> None:
+    # Транзакция на каждую миграцию: шаги migrations.online с autocommit
+    # фиксируют только свою миграцию, а не всю цепочку
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True
+    )
 
-    In this scenario we need to create an Engine
-    and associate a connection with the context.
+    with context.begin_transaction():
+        context.run_migrations()
 
-    """
+
+async def run_async_migrations() -> None:
+    """Приложение использует asyncpg, поэтому миграции идут через async движок"""
     configuration = config.get_section(config.config_ini_section, {})
     configuration["sqlalchemy.url"] = get_url()
     
-    connectable = engine_from_config(
+    connectable = async_engine_from_config(
         configuration,
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
 
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode.
+
+    In this scenario we need to create an Engine
+    and associate a connection with the context.
 
-        with context.begin_transaction():
-            context.run_migrations()
+    """
+    asyncio.run(run_async_migrations())
 
 
 if context.is_offline_mode():
@@ -0,0 +1,210 @@
+"""Операции для миграций больших таблиц без долгих блокировок записи.
+
+Использование в файле миграции:
+
+    from migrations.online import backfill, create_index_concurrently
+
+    def upgrade() -> None:
+        op.add_column('vehicles', sa.Column('plate_key', sa.String(20), nullable=True))
+        backfill('vehicles', "plate_key = upper(plate_number)", "plate_key IS NULL")
+        create_index_concurrently('idx_vehicle_plate_key', 'vehicles', ['plate_key'])
+
+Функции с autocommit фиксируют все, что миграция сделала до них, поэтому
+такие шаги лучше держать в конце миграции или в отдельной миграции.
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, TypeVar
+import logging
+import time
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger("alembic.online")
+
+T = TypeVar("T")
+
+# DDL ждет блокировку не дольше этого: пока ALTER стоит в очереди за долгим
+# чтением, за ним встают все записи в таблицу
+DEFAULT_LOCK_TIMEOUT = "3s"
+LOCK_RETRIES = 5
+
+# CREATE INDEX CONCURRENTLY ждет завершения всех транзакций старше себя, и
+# это ожидание тоже ограничено lock_timeout: выгрузка отчета или долгая
+# задача прерывали бы построение уже после чтения таблицы. Его блокировка
+# (SHARE UPDATE EXCLUSIVE) записи не останавливает, поэтому ждем без предела
+BUILD_LOCK_TIMEOUT = "0"
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def _is_lock_timeout(error: DBAPIError) -> bool:
+    orig = error.orig
+    return getattr(orig, "sqlstate", None) == LOCK_NOT_AVAILABLE or "lock timeout" in str(orig)
+
+
+@contextmanager
+def lock_timeout(value: str = DEFAULT_LOCK_TIMEOUT) -> Iterator[None]:
+    """Ограничить ожидание блокировок для операций внутри блока"""
+    op.execute(f"SET lock_timeout = '{value}'")
+    try:
+        yield
+    finally:
+        op.execute("RESET lock_timeout")
+
+
+def _with_lock_retries(fn: Callable[[], T], attempts: int = LOCK_RETRIES) -> T:
+    """Повторить операцию вне транзакции, если не удалось взять блокировку"""
+    for attempt in range(1, attempts + 1):
+        try:
+            with lock_timeout():
+                return fn()
+        except DBAPIError as e:
+            if not _is_lock_timeout(e) or attempt == attempts:
+                raise
+            logger.warning(f"Блокировка не получена (попытка {attempt}/{attempts}), повтор")
+            time.sleep(attempt)
+
+
+def _invalid_index_exists(index_name: str) -> bool:
+    return bool(op.get_bind().execute(
+        sa.text(
+            "SELECT NOT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+        ),
+        {"name": index_name}
+    ).scalar())
+
+
+def create_index_concurrently(
+    index_name: str,
+    table_name: str,
+    columns: List[str],
+    unique: bool = False,
+    where: Optional[str] = None,
+    using: Optional[str] = None
+) -> None:
+    """CREATE INDEX CONCURRENTLY вне транзакции.
+
+    Недостроенный индекс от прерванной попытки (INVALID) удаляется и
+    строится заново; готовый индекс с тем же именем оставляется как есть.
+    Построение ждет долгие транзакции без lock_timeout (BUILD_LOCK_TIMEOUT).
+    """
+    kwargs = {}
+    if where:
+        kwargs["postgresql_where"] = sa.text(where)
+    if using:
+        kwargs["postgresql_using"] = using
+
+    with op.get_context().autocommit_block():
+        if _invalid_index_exists(index_name):
+            logger.warning(f"Индекс {index_name} остался недостроенным, пересоздаем")
+            _with_lock_retries(lambda: op.drop_index(
+                index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True
+            ))
+        with lock_timeout(BUILD_LOCK_TIMEOUT):
+            op.create_index(
+                index_name, table_name, columns,
+                unique=unique, postgresql_concurrently=True, if_not_exists=True, **kwargs
+            )
+        if _invalid_index_exists(index_name):
+            raise RuntimeError(f"Индекс {index_name} остался недостроенным (INVALID)")
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    """DROP INDEX CONCURRENTLY вне транзакции"""
+    with op.get_context().autocommit_block():
+        _with_lock_retries(lambda: op.drop_index(
+            index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True
+        ))
+
+
+def add_check_constraint_not_valid(constraint_name: str, table_name: str, condition: str) -> None:
+    """Добавить CHECK без проверки существующих строк.
+
+    Блокировка нужна только на изменение каталога; новые и изменяемые строки
+    проверяются сразу, существующие - в validate_constraint.
+    """
+    with op.get_context().autocommit_block():
+        _with_lock_retries(lambda: op.execute(
+            f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} CHECK ({condition}) NOT VALID"
+        ))
+
+
+def validate_constraint(constraint_name: str, table_name: str) -> None:
+    """Проверить существующие строки; SHARE UPDATE EXCLUSIVE не блокирует записи"""
+    with op.get_context().autocommit_block():
+        _with_lock_retries(lambda: op.execute(
+            f"ALTER TABLE {table_name} VALIDATE CONSTRAINT {constraint_name}"
+        ))
+
+
+def backfill(
+    table_name: str,
+    set_clause: str,
+    where: str,
+    batch_size: int = 1000,
+    pause: float = 0.05,
+    key: str = "id",
+    params: Optional[dict] = None,
+    log_every: float = 5.0
+) -> int:
+    """Заполнить строки пачками по ключу, каждая пачка в своей транзакции.
+
+    Пачка блокирует не больше batch_size строк на время одного UPDATE, между
+    пачками пауза, чтобы не забивать диск и репликацию. where должен
+    перестать выполняться для обработанных строк (например, col IS NULL),
+    тогда повторный запуск продолжит с места остановки. Строки, вставленные
+    во время заполнения, приложение должно заполнять само.
+    """
+    def statement(after_key: bool) -> sa.TextClause:
+        return sa.text(f"""
+            WITH batch AS (
+                SELECT {key} FROM {table_name}
+                WHERE ({where}) {f"AND {key} > :last" if after_key else ""}
+                ORDER BY {key}
+                LIMIT :limit
+            ),
+            updated AS (
+                UPDATE {table_name} AS t SET {set_clause}
+                FROM batch WHERE t.{key} = batch.{key}
+                RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM updated) AS updated,
+                   (SELECT {key} FROM batch ORDER BY {key} DESC LIMIT 1) AS last
+        """)
+
+    first_batch, next_batch = statement(False), statement(True)
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        estimate = bind.execute(
+            sa.text("SELECT greatest(reltuples, 0)::bigint FROM pg_class WHERE relname = :table"),
+            {"table": table_name}
+        ).scalar() or 0
+
+        last, done = None, 0
+        started = logged = time.monotonic()
+        with lock_timeout():
+            while True:
+                if last is None:
+                    row = bind.execute(first_batch, {**(params or {}), "limit": batch_size}).one()
+                else:
+                    row = bind.execute(next_batch, {**(params or {}), "last": last, "limit": batch_size}).one()
+                if row.last is None:
+                    break
+                last = row.last
+                done += row.updated
+
+                now = time.monotonic()
+                if now - logged >= log_every:
+                    rate = done / (now - started)
+                    eta = f", осталось ~{(estimate - done) / rate:.0f} с" if rate and estimate > done else ""
+                    logger.info(f"{table_name}: заполнено {done} из ~{estimate} ({rate:.0f} строк/с{eta})")
+                    logged = now
+                if pause:
+                    time.sleep(pause)
+
+        logger.info(f"{table_name}: заполнено {done} строк за {time.monotonic() - started:.1f} с")
+        return done
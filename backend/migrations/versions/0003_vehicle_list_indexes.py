@@ -0,0 +1,49 @@
+"""Consolidate vehicle indexes for list queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from migrations.online import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Удаление дублирующих индексов и создание составных индексов для списка"""
+    # Сначала новые индексы: пока старые не удалены, списку есть чем пользоваться.
+    # Фильтр + ORDER BY created_at (индекс читается в обе стороны)
+    create_index_concurrently('idx_vehicle_created_at', 'vehicles', ['created_at'])
+    create_index_concurrently('idx_vehicle_status_created_at', 'vehicles', ['status', 'created_at'])
+    create_index_concurrently('idx_vehicle_city_created_at', 'vehicles', ['city', 'created_at'])
+    create_index_concurrently(
+        'idx_vehicle_available_city_created_at', 'vehicles', ['city', 'created_at'],
+        where="status = 'AVAILABLE'"
+    )
+
+    # Дубликаты, которые create_all строил из index=True/unique=True на колонках
+    drop_index_concurrently('ix_vehicles_plate_number', 'vehicles')
+    drop_index_concurrently('ix_vehicles_vin', 'vehicles')
+    drop_index_concurrently('ix_vehicles_status', 'vehicles')
+    drop_index_concurrently('ix_vehicles_city', 'vehicles')
+
+    # Одиночные индексы по статусу и городу покрываются составными выше
+    drop_index_concurrently('idx_vehicle_status', 'vehicles')
+    drop_index_concurrently('idx_vehicle_city', 'vehicles')
+
+
+def downgrade() -> None:
+    """Возврат одиночных индексов по статусу и городу"""
+    create_index_concurrently('idx_vehicle_status', 'vehicles', ['status'])
+    create_index_concurrently('idx_vehicle_city', 'vehicles', ['city'])
+
+    drop_index_concurrently('idx_vehicle_available_city_created_at', 'vehicles')
+    drop_index_concurrently('idx_vehicle_city_created_at', 'vehicles')
+    drop_index_concurrently('idx_vehicle_status_created_at', 'vehicles')
+    drop_index_concurrently('idx_vehicle_created_at', 'vehicles')
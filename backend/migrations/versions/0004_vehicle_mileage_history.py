@@ -0,0 +1,87 @@
+"""Partitioned vehicle mileage history
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from datetime import date
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# Секции на несколько месяцев вокруг даты миграции; дальше их
+# создает задача ensure_mileage_partitions
+PARTITION_MONTHS_BACK = 12
+PARTITION_MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Создание секционированной таблицы показаний, дневной свертки и позиций задач"""
+    op.create_table(
+        'vehicle_mileage_readings',
+        sa.Column('vehicle_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('mileage_km', sa.Integer(), nullable=False),
+        sa.Column('ingested_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.CheckConstraint('mileage_km >= 0', name='check_reading_mileage_positive'),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('vehicle_id', 'recorded_at'),
+        postgresql_partition_by='RANGE (recorded_at)'
+    )
+    # BRIN: показания пишутся почти по порядку времени, индекс занимает килобайты
+    op.create_index(
+        'idx_mileage_reading_recorded_at', 'vehicle_mileage_readings', ['recorded_at'],
+        postgresql_using='brin'
+    )
+    op.create_index(
+        'idx_mileage_reading_ingested_at', 'vehicle_mileage_readings', ['ingested_at'],
+        postgresql_using='brin'
+    )
+
+    first = _add_months(date.today().replace(day=1), -PARTITION_MONTHS_BACK)
+    for i in range(PARTITION_MONTHS_BACK + PARTITION_MONTHS_AHEAD + 1):
+        month = _add_months(first, i)
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS vehicle_mileage_readings_y{month:%Y}m{month:%m} "
+            f"PARTITION OF vehicle_mileage_readings "
+            f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{_add_months(month, 1)} 00:00:00+00')"
+        )
+
+    op.create_table(
+        'vehicle_mileage_daily',
+        sa.Column('vehicle_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('min_km', sa.Integer(), nullable=False),
+        sa.Column('max_km', sa.Integer(), nullable=False),
+        sa.Column('readings', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('vehicle_id', 'day')
+    )
+
+    op.create_table(
+        'job_checkpoints',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('checkpoint_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Удаление истории пробега"""
+    op.drop_table('job_checkpoints')
+    op.drop_table('vehicle_mileage_daily')
+    # Секции удаляются вместе с родительской таблицей
+    op.drop_table('vehicle_mileage_readings')
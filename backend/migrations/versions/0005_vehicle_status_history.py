@@ -0,0 +1,121 @@
+"""Vehicle status transition log and utilization rollups
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Создание журнала смен статуса и таблиц свертки"""
+    vehicle_status_enum = postgresql.ENUM(name='vehiclestatus', create_type=False)
+    vehicle_city_enum = postgresql.ENUM(name='vehiclecity', create_type=False)
+
+    op.add_column(
+        'vehicles',
+        sa.Column('status_changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False)
+    )
+
+    op.create_table(
+        'vehicle_status_transitions',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('vehicle_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('from_status', vehicle_status_enum, nullable=True),
+        sa.Column('from_city', vehicle_city_enum, nullable=True),
+        sa.Column('from_changed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('to_status', vehicle_status_enum, nullable=True),
+        sa.Column('to_city', vehicle_city_enum, nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'idx_status_transition_vehicle_changed_at', 'vehicle_status_transitions', ['vehicle_id', 'changed_at']
+    )
+    op.create_index(
+        'idx_status_transition_changed_at', 'vehicle_status_transitions', ['changed_at'],
+        postgresql_using='brin'
+    )
+
+    op.create_table(
+        'vehicle_status_levels',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('city', vehicle_city_enum, nullable=True),
+        sa.Column('status', vehicle_status_enum, nullable=False),
+        sa.Column('vehicles', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'idx_status_level_unique', 'vehicle_status_levels', ['city', 'status'],
+        unique=True, postgresql_nulls_not_distinct=True
+    )
+
+    op.create_table(
+        'vehicle_status_hourly',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('hour', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('city', vehicle_city_enum, nullable=True),
+        sa.Column('status', vehicle_status_enum, nullable=False),
+        sa.Column('seconds', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'idx_status_hourly_unique', 'vehicle_status_hourly', ['hour', 'city', 'status'],
+        unique=True, postgresql_nulls_not_distinct=True
+    )
+
+    op.create_table(
+        'vehicle_status_daily',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('city', vehicle_city_enum, nullable=True),
+        sa.Column('status', vehicle_status_enum, nullable=False),
+        sa.Column('seconds', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'idx_status_daily_unique', 'vehicle_status_daily', ['day', 'city', 'status'],
+        unique=True, postgresql_nulls_not_distinct=True
+    )
+
+    op.create_table(
+        'vehicle_status_vehicle_daily',
+        sa.Column('vehicle_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', vehicle_status_enum, nullable=False),
+        sa.Column('seconds', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('vehicle_id', 'day', 'status')
+    )
+
+    # Начальное состояние: текущий статус каждого автомобиля как его создание,
+    # позиция свертки сразу перед ним
+    op.execute(
+        "INSERT INTO vehicle_status_transitions (vehicle_id, changed_at, to_status, to_city) "
+        "SELECT id, now(), status, city FROM vehicles"
+    )
+    op.execute(
+        "INSERT INTO job_checkpoints (name, checkpoint_at) "
+        "VALUES ('status_rollup', now() - interval '1 microsecond') "
+        "ON CONFLICT (name) DO NOTHING"
+    )
+
+
+def downgrade() -> None:
+    """Удаление журнала смен статуса и таблиц свертки"""
+    op.execute("DELETE FROM job_checkpoints WHERE name = 'status_rollup'")
+    op.drop_table('vehicle_status_vehicle_daily')
+    op.drop_table('vehicle_status_daily')
+    op.drop_table('vehicle_status_hourly')
+    op.drop_table('vehicle_status_levels')
+    op.drop_table('vehicle_status_transitions')
+    op.drop_column('vehicles', 'status_changed_at')
@@ -0,0 +1,70 @@
+"""Vehicle OSAGO policy dates and expiry notifications
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migrations.online import (
+    add_check_constraint_not_valid,
+    create_index_concurrently,
+    drop_index_concurrently,
+    lock_timeout,
+    validate_constraint
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Даты полиса ОСАГО, индекс по окончанию и журнал уведомлений"""
+    # Колонки без DEFAULT добавляются без перезаписи vehicles
+    with lock_timeout():
+        op.add_column('vehicles', sa.Column('osago_starts_on', sa.Date(), nullable=True))
+        op.add_column('vehicles', sa.Column('osago_expires_on', sa.Date(), nullable=True))
+
+    op.create_table(
+        'osago_notifications',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('vehicle_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('policy_number', sa.String(length=50), nullable=True),
+        sa.Column('expires_on', sa.Date(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('enqueued_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'idx_osago_notification_unique', 'osago_notifications', ['vehicle_id', 'expires_on', 'kind'], unique=True
+    )
+    op.create_index(
+        'idx_osago_notification_pending', 'osago_notifications', ['id'],
+        postgresql_where=sa.text('enqueued_at IS NULL')
+    )
+
+    # Дальше шаги вне транзакции: фиксируют все, что выше
+    create_index_concurrently(
+        'idx_vehicle_osago_expires_on', 'vehicles', ['osago_expires_on', 'id'],
+        where='osago_expires_on IS NOT NULL'
+    )
+    add_check_constraint_not_valid('check_osago_period', 'vehicles', 'osago_expires_on >= osago_starts_on')
+    validate_constraint('check_osago_period', 'vehicles')
+
+
+def downgrade() -> None:
+    """Удаление дат ОСАГО и журнала уведомлений"""
+    drop_index_concurrently('idx_vehicle_osago_expires_on', 'vehicles')
+    op.drop_table('osago_notifications')
+    op.execute('ALTER TABLE vehicles DROP CONSTRAINT IF EXISTS check_osago_period')
+    op.drop_column('vehicles', 'osago_expires_on')
+    op.drop_column('vehicles', 'osago_starts_on')
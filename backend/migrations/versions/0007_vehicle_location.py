@@ -0,0 +1,41 @@
+"""Vehicle last known location
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online import add_check_constraint_not_valid, lock_timeout, validate_constraint
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Координаты автомобиля и время их снятия"""
+    # Колонки без DEFAULT добавляются без перезаписи vehicles
+    with lock_timeout():
+        op.add_column('vehicles', sa.Column('latitude', sa.Float(), nullable=True))
+        op.add_column('vehicles', sa.Column('longitude', sa.Float(), nullable=True))
+        op.add_column('vehicles', sa.Column('location_updated_at', sa.DateTime(timezone=True), nullable=True))
+
+    add_check_constraint_not_valid(
+        'check_location', 'vehicles',
+        '(latitude IS NULL) = (longitude IS NULL) AND latitude BETWEEN -90 AND 90 AND longitude BETWEEN -180 AND 180'
+    )
+    validate_constraint('check_location', 'vehicles')
+
+
+def downgrade() -> None:
+    """Удаление координат автомобиля"""
+    op.execute('ALTER TABLE vehicles DROP CONSTRAINT IF EXISTS check_location')
+    op.drop_column('vehicles', 'location_updated_at')
+    op.drop_column('vehicles', 'longitude')
+    op.drop_column('vehicles', 'latitude')
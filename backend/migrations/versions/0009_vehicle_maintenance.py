@@ -0,0 +1,75 @@
+"""Maintenance intervals and vehicle maintenance schedule
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+# Регламенты марок парка; остальные марки получают регламент из настроек
+INTERVALS = [
+    {"brand": "Toyota", "model": None, "interval_km": 10000, "interval_months": 12},
+    {"brand": "Hyundai", "model": None, "interval_km": 15000, "interval_months": 12},
+    {"brand": "Kia", "model": None, "interval_km": 15000, "interval_months": 12},
+    {"brand": "Skoda", "model": None, "interval_km": 15000, "interval_months": 12},
+    {"brand": "Volkswagen", "model": None, "interval_km": 15000, "interval_months": 12},
+    {"brand": "Renault", "model": None, "interval_km": 15000, "interval_months": 12},
+    {"brand": "Lada", "model": None, "interval_km": 15000, "interval_months": 12},
+    {"brand": "Lada", "model": "Vesta", "interval_km": 15000, "interval_months": 12},
+    {"brand": "Lada", "model": "Granta", "interval_km": 10000, "interval_months": 12},
+    {"brand": "Nissan", "model": None, "interval_km": 15000, "interval_months": 12},
+]
+
+
+def upgrade() -> None:
+    """Регламенты ТО и график ТО автомобилей"""
+    intervals = op.create_table(
+        'maintenance_intervals',
+        sa.Column('id', sa.Integer(), sa.Identity(), nullable=False),
+        sa.Column('brand', sa.String(length=100), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=True),
+        sa.Column('interval_km', sa.Integer(), nullable=False),
+        sa.Column('interval_months', sa.Integer(), nullable=False),
+        sa.CheckConstraint('interval_km > 0 AND interval_months > 0', name='check_maintenance_interval_positive'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'idx_maintenance_interval_brand_model', 'maintenance_intervals', ['brand', 'model'], unique=True,
+        postgresql_nulls_not_distinct=True
+    )
+    op.bulk_insert(intervals, INTERVALS)
+
+    # Строки графика заполнит задача refresh_maintenance_schedule
+    op.create_table(
+        'vehicle_maintenance',
+        sa.Column('vehicle_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('last_service_km', sa.Integer(), nullable=True),
+        sa.Column('last_service_on', sa.Date(), nullable=True),
+        sa.Column('interval_km', sa.Integer(), nullable=False),
+        sa.Column('interval_months', sa.Integer(), nullable=False),
+        sa.Column('next_service_km', sa.Integer(), nullable=False),
+        sa.Column('next_service_on', sa.Date(), nullable=False),
+        sa.Column('km_left', sa.Integer(), nullable=False),
+        sa.Column('overdue', sa.Boolean(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('vehicle_id')
+    )
+    op.create_index('idx_vehicle_maintenance_km_left', 'vehicle_maintenance', ['km_left'])
+    op.create_index('idx_vehicle_maintenance_next_service_on', 'vehicle_maintenance', ['next_service_on'])
+
+
+def downgrade() -> None:
+    """Удаление графика и регламентов ТО"""
+    op.drop_table('vehicle_maintenance')
+    op.drop_table('maintenance_intervals')
@@ -0,0 +1,46 @@
+"""Traffic penalties imported from daily files
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Таблица штрафов"""
+    op.create_table(
+        'penalties',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('uin', sa.String(length=25), nullable=False),
+        sa.Column('plate_number', sa.String(length=20), nullable=False),
+        sa.Column('vehicle_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('violated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('article', sa.String(length=50), nullable=True),
+        sa.Column('location', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_penalty_uin', 'penalties', ['uin'], unique=True)
+    op.create_index('idx_penalty_vehicle_violated_at', 'penalties', ['vehicle_id', 'violated_at'])
+    op.create_index(
+        'idx_penalty_unmatched_violated_at', 'penalties', ['violated_at'],
+        postgresql_where=sa.text('vehicle_id IS NULL')
+    )
+
+
+def downgrade() -> None:
+    """Удаление таблицы штрафов"""
+    op.drop_table('penalties')
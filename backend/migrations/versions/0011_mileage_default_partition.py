@@ -0,0 +1,28 @@
+"""Default partition for vehicle mileage readings
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Секция по умолчанию: прием показаний не создает секции сам"""
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS vehicle_mileage_readings_default "
+        "PARTITION OF vehicle_mileage_readings DEFAULT"
+    )
+
+
+def downgrade() -> None:
+    """Удаление секции по умолчанию вместе с ее показаниями"""
+    op.execute("DROP TABLE IF EXISTS vehicle_mileage_readings_default")
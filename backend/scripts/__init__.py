@@ -0,0 +1 @@
+"""Служебные скрипты: наполнение тестовыми данными, проверки планов и бенчмарки"""
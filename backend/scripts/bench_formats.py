@@ -0,0 +1,92 @@
+"""Бенчмарк форматов ответа списка: размер и время кодирования.
+
+Сравнивает JSON, колоночный JSON и MessagePack без сжатия и с gzip/br
+на страницах разного размера из vehicles (из каталога backend):
+
+    python -m scripts.bench_formats --sizes 10 100 1000 10000
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from sqlalchemy import select
+
+from app.core.encoding import COLUMNAR, JSON, MSGPACK, compress, encode_body
+from app.models.vehicle import Vehicle
+from app.schemas.vehicle import VehicleListResponse, VehicleResponse
+from scripts.seed import create_engine, seed_vehicles
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"json": JSON, "columnar": COLUMNAR, "msgpack": MSGPACK}
+ENCODINGS = (None, "gzip", "br")
+
+
+def timed(fn, repeat: int) -> float:
+    """Медиана времени вызова, мс"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def bench_page(payload: VehicleListResponse, repeat: int) -> list:
+    data = payload.model_dump(mode="json")
+    dump_ms = timed(lambda: payload.model_dump(mode="json"), repeat)
+    results = []
+    for name, media_type in FORMATS.items():
+        body = encode_body(data, media_type, "items")
+        encode_ms = timed(lambda: encode_body(data, media_type, "items"), repeat)
+        for encoding in ENCODINGS:
+            if encoding is None:
+                size, compress_ms = len(body), 0.0
+            else:
+                size = len(compress(body, encoding))
+                compress_ms = timed(lambda: compress(body, encoding), repeat)
+            results.append({
+                "format": name + (f"+{encoding}" if encoding else ""),
+                "bytes": size,
+                "encode_ms": dump_ms + encode_ms + compress_ms,
+            })
+    return results
+
+
+async def load_vehicles(rows: int, limit: int) -> list:
+    engine = create_engine()
+    try:
+        async with engine.connect() as conn:
+            await seed_vehicles(conn, rows)
+            result = await conn.execute(select(Vehicle.__table__).order_by(Vehicle.created_at.desc()).limit(limit))
+            return [VehicleResponse.model_validate(dict(row._mapping)) for row in result]
+    finally:
+        await engine.dispose()
+
+
+def main(args: argparse.Namespace) -> None:
+    vehicles = asyncio.run(load_vehicles(args.rows, max(args.sizes)))
+    for size in args.sizes:
+        payload = VehicleListResponse(items=vehicles[:size], page=1, page_size=size, total=args.rows)
+        results = bench_page(payload, args.repeat)
+        baseline = results[0]["bytes"]
+        print(f"\nСтрок: {size}")
+        print(f"{'формат':<18}{'байт':>12}{'от JSON':>10}{'мс':>10}")
+        for item in results:
+            print(
+                f"{item['format']:<18}{item['bytes']:>12}"
+                f"{item['bytes'] / baseline * 100:>9.0f}%{item['encode_ms']:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Размер автопарка")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="Размеры страницы")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов каждого замера")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    main(args)
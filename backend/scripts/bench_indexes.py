@@ -0,0 +1,137 @@
+"""Бенчмарк индексов vehicles: скорость вставки и задержка списка.
+
+Сравнение до/после миграции 0003 (из каталога backend):
+
+    alembic downgrade 0002
+    python -m scripts.bench_indexes --save /tmp/before.json
+    alembic upgrade head
+    python -m scripts.bench_indexes --compare /tmp/before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.models.vehicle import VehicleCity, VehicleStatus
+from app.schemas.vehicle import VehicleFilters
+from app.services.vehicle import VehicleService
+from scripts.seed import COLORS, BRANDS, MODELS, PLATE_LETTERS, SEED_SQL, create_engine, seed_vehicles
+
+logger = logging.getLogger(__name__)
+
+# Диапазон порядковых номеров для вставок, не пересекающийся с seed
+INSERT_OFFSET = 100_000_000
+
+LIST_CASES = {
+    "default": VehicleFilters(),
+    "status": VehicleFilters(status=VehicleStatus.RENTED_TAXI),
+    "city": VehicleFilters(city=VehicleCity.PSKOV),
+    "available+city": VehicleFilters(status=VehicleStatus.AVAILABLE, city=VehicleCity.PSKOV),
+    "status+city": VehicleFilters(status=VehicleStatus.MAINTENANCE, city=VehicleCity.OSTROV),
+    "status page 50": VehicleFilters(status=VehicleStatus.RENTED_TAXI, page=50),
+}
+
+
+async def bench_inserts(conn: AsyncConnection, count: int) -> float:
+    """Вставка по одной строке в отдельной транзакции, как в POST /vehicles"""
+    params = {"letters": PLATE_LETTERS, "brands": BRANDS, "models": MODELS, "colors": COLORS}
+    started = time.perf_counter()
+    for i in range(INSERT_OFFSET, INSERT_OFFSET + count):
+        await conn.execute(SEED_SQL, {**params, "start": i, "stop": i})
+        await conn.commit()
+    elapsed = time.perf_counter() - started
+
+    # Удаляем вставленное, чтобы повторные прогоны были сопоставимы
+    await conn.execute(
+        text("DELETE FROM vehicles WHERE osago_policy_number >= :low"),
+        {"low": "ХХХ" + str(INSERT_OFFSET).rjust(10, "0")},
+    )
+    await conn.commit()
+    return count / elapsed
+
+
+async def bench_list(conn: AsyncConnection, filters: VehicleFilters, repeat: int) -> dict:
+    """Задержка пары запросов страницы и количества"""
+    query, count_query = VehicleService.build_list_queries(filters)
+    page_timings, count_timings = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await conn.execute(query)
+        page_timings.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        await conn.execute(count_query)
+        count_timings.append((time.perf_counter() - started) * 1000)
+    total = sorted(page + count for page, count in zip(page_timings, count_timings))
+    return {
+        "page_p50_ms": statistics.median(page_timings),
+        "count_p50_ms": statistics.median(count_timings),
+        "p50_ms": statistics.median(total),
+        "p95_ms": total[int(len(total) * 0.95) - 1],
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    engine = create_engine()
+    try:
+        async with engine.connect() as conn:
+            await seed_vehicles(conn, args.rows)
+            indexes = (await conn.execute(text(
+                "SELECT indexname FROM pg_indexes WHERE tablename = 'vehicles' ORDER BY 1"
+            ))).scalars().all()
+            results = {
+                "indexes": list(indexes),
+                "inserts_per_sec": await bench_inserts(conn, args.inserts),
+                "list": {},
+            }
+            for name, filters in LIST_CASES.items():
+                results["list"][name] = await bench_list(conn, filters, args.repeat)
+            await conn.rollback()
+    finally:
+        await engine.dispose()
+    return results
+
+
+def report(results: dict, previous: dict = None) -> None:
+    def delta(new: float, old: float) -> str:
+        return f"  (было {old:.2f}, {(new - old) / old * 100:+.0f}%)" if old else ""
+
+    print(f"Индексы: {', '.join(results['indexes'])}")
+    old_rate = previous["inserts_per_sec"] if previous else None
+    print(f"Вставка: {results['inserts_per_sec']:.0f} строк/с"
+          + (delta(results["inserts_per_sec"], old_rate) if previous else ""))
+    for name, timing in results["list"].items():
+        line = (
+            f"Список [{name}]: p50 {timing['p50_ms']:.2f} мс "
+            f"(страница {timing['page_p50_ms']:.2f}, count {timing['count_p50_ms']:.2f}), "
+            f"p95 {timing['p95_ms']:.2f} мс"
+        )
+        if previous and name in previous["list"]:
+            line += delta(timing["p50_ms"], previous["list"][name]["p50_ms"])
+        print(line)
+
+
+async def main(args: argparse.Namespace) -> None:
+    results = await run(args)
+    previous = json.loads(Path(args.compare).read_text()) if args.compare else None
+    report(results, previous)
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Размер автопарка")
+    parser.add_argument("--inserts", type=int, default=2000, help="Число вставок")
+    parser.add_argument("--repeat", type=int, default=50, help="Повторов каждого запроса")
+    parser.add_argument("--save", help="Сохранить результаты в JSON")
+    parser.add_argument("--compare", help="Сравнить с сохраненными результатами")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    asyncio.run(main(args))
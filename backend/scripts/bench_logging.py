@@ -0,0 +1,120 @@
+"""Бенчмарк пропускной способности запросов с логированием и без.
+
+Эндпоинт пишет в лог то же, что создание автомобиля при debug: строку
+о действии, несколько SQL-запросов и строку access-лога. Сравниваются:
+логирование выключено, прежний синхронный StreamHandler и очередь из
+app.core.log. Медленный stdout (полный pipe, сборщик логов не успевает)
+изображает --write-delay:
+
+    python -m scripts.bench_logging --requests 5000 --concurrency 32 --write-delay 0.2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.core import log
+from app.core.config import settings
+
+logger = logging.getLogger("app.api.v1.endpoints.vehicles")
+sql_logger = logging.getLogger("sqlalchemy.engine.Engine")
+access_logger = logging.getLogger("uvicorn.access")
+
+MODES = ("off", "sync", "queue")
+
+
+class Sink:
+    """Поток вывода: /dev/null с необязательной блокирующей задержкой на запись"""
+
+    def __init__(self, delay_ms: float):
+        self.delay = delay_ms / 1000
+        self.file = open(os.devnull, "w")
+        self.writes = 0
+
+    def write(self, data: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        self.writes += 1
+        return self.file.write(data)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+
+def build_app(sql_lines: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/vehicles")
+    async def create(payload: dict):
+        for _ in range(sql_lines):
+            sql_logger.info("INSERT INTO vehicles (plate_number, vin) VALUES ($1::VARCHAR, $2::VARCHAR)")
+            sql_logger.info("[generated in %.5fs] %r", 0.00012, (payload["plate"], payload["vin"]))
+        logger.info("Создан автомобиль: %s (ID: %s)", payload["plate"], payload["vin"])
+        access_logger.info('%s - "%s %s HTTP/%s" %d', "127.0.0.1:50000", "POST", "/vehicles", "1.1", 201)
+        return {"ok": True}
+
+    return app
+
+
+def configure(mode: str, sink: Sink) -> None:
+    log.stop_logging()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.NOTSET)
+
+    if mode == "off":
+        root.setLevel(logging.WARNING)
+    elif mode == "sync":
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+    else:
+        log.setup_logging(sink)
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int) -> None:
+            async with semaphore:
+                response = await client.post("/vehicles", json={"plate": f"А{i:03d}АА77", "vin": f"VIN{i:014d}"})
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return time.perf_counter() - started
+
+
+def main(args: argparse.Namespace) -> None:
+    app = build_app(args.sql_lines)
+    print(f"{'режим':<8}{'запр/с':>10}{'записано':>10}{'отброшено':>11}")
+    for mode in args.modes:
+        sink = Sink(args.write_delay)
+        configure(mode, sink)
+        asyncio.run(run(app, min(200, args.requests), args.concurrency))  # прогрев
+        elapsed = asyncio.run(run(app, args.requests, args.concurrency))
+        stats = log.logging_stats() if mode == "queue" else {}
+        log.stop_logging()
+        dropped = stats.get("queue_dropped", 0) + sum(stats.get("sampled_out", {}).values())
+        print(f"{mode:<8}{args.requests / elapsed:>10.0f}{sink.writes:>10}{dropped:>11}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000, help="Число запросов")
+    parser.add_argument("--concurrency", type=int, default=32, help="Одновременных запросов")
+    parser.add_argument("--sql-lines", type=int, default=3, help="SQL-запросов в логе на запрос")
+    parser.add_argument("--write-delay", type=float, default=0.0, help="Задержка одной записи в stdout, мс")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="Режимы для сравнения")
+    args = parser.parse_args()
+
+    settings.debug = True
+    main(args)
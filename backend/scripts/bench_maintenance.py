@@ -0,0 +1,128 @@
+"""Пересчет графика ТО: векторный расчет против построчного.
+
+Берет первую порцию автопарка тем же запросом, что и задача
+refresh_maintenance_schedule, и считает график двумя способами:
+compute_schedule (NumPy) и построчным циклом на Python с той же
+логикой; результаты сверяются. Затем замеряет полный пересчет
+(из каталога backend):
+
+    python -m scripts.bench_maintenance --rows 500000 --chunk-size 20000
+"""
+import argparse
+import asyncio
+import calendar
+import logging
+import time
+from datetime import date, timedelta
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.services.maintenance import (
+    CHUNK_SQL,
+    MAX_PROJECTION_DAYS,
+    MIN_AGE_DAYS,
+    MaintenanceService,
+    _MIN_ID,
+    _columns,
+    compute_schedule
+)
+from app.services.osago import local_today
+from scripts.seed import seed_vehicles
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    year, month = index // 12, index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def row_schedule(brand, model, year, mileage, in_fleet_on, last_km, last_on, intervals, today: date) -> tuple:
+    """Та же логика, что в compute_schedule, для одной машины"""
+    default = (settings.maintenance_default_interval_km, settings.maintenance_default_interval_months)
+    interval_km, interval_months = (
+        intervals.get((brand.lower(), model.lower())) or intervals.get((brand.lower(), None)) or default
+    )
+    serviced = last_km >= 0
+    next_km = (last_km if serviced else mileage // interval_km * interval_km) + interval_km
+    km_left = next_km - mileage
+
+    base_on = EPOCH + timedelta(days=last_on if serviced else in_fleet_on)
+    if serviced:
+        due_by_time = _add_months(base_on, interval_months)
+    else:
+        elapsed = (today.year - base_on.year) * 12 + today.month - base_on.month
+        periods = max(elapsed // interval_months, 1)
+        due_by_time = _add_months(base_on, periods * interval_months)
+        if due_by_time < today:
+            due_by_time = _add_months(base_on, (periods + 1) * interval_months)
+
+    age_days = max((today - (date(year, 1, 1) + timedelta(days=182))).days, MIN_AGE_DAYS)
+    km_per_day = mileage / age_days
+    days_left = -(-km_left // km_per_day) if km_per_day > 0 else MAX_PROJECTION_DAYS
+    due_by_km = today + timedelta(days=int(min(max(days_left, 0), MAX_PROJECTION_DAYS)))
+    overdue = km_left < 0 or due_by_time < today
+    return interval_km, interval_months, next_km, min(due_by_time, due_by_km), km_left, overdue
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.maintenance_chunk_size = args.chunk_size
+    async with engine.connect() as conn:
+        await seed_vehicles(conn, args.rows)
+        await conn.commit()
+
+    today = local_today()
+    async with AsyncSessionLocal() as session:
+        service = MaintenanceService(session)
+        intervals = await service._load_intervals()
+        chunk = (await session.execute(CHUNK_SQL, {
+            "last_id": _MIN_ID, "limit": args.chunk_size, "tz": settings.timezone
+        })).one()
+        await session.commit()
+
+        started = time.perf_counter()
+        schedule = compute_schedule(_columns(chunk), intervals, today)
+        vectorized = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rows = [
+            row_schedule(*values, intervals, today)
+            for values in zip(
+                chunk.brands, chunk.models, chunk.years, chunk.mileage,
+                chunk.in_fleet_on, chunk.last_service_km, chunk.last_service_on
+            )
+        ]
+        per_row = time.perf_counter() - started
+
+        expected = list(zip(*rows))
+        for i, key in enumerate(schedule):
+            mismatched = sum(a != b for a, b in zip(schedule[key].tolist(), expected[i]))
+            if mismatched:
+                raise SystemExit(f"{key}: расхождений с построчным расчетом {mismatched}")
+        n = len(chunk.ids)
+        print(
+            f"порция {n}: NumPy {vectorized * 1000:.1f} мс ({n / vectorized:,.0f} машин/с), "
+            f"построчно {per_row * 1000:.1f} мс ({n / per_row:,.0f} машин/с), результаты совпадают"
+        )
+
+        started = time.perf_counter()
+        result = await service.refresh(today)
+        elapsed = time.perf_counter() - started
+        print(
+            f"полный пересчет: машин {result['vehicles']} за {elapsed:.1f} с "
+            f"({result['vehicles'] / elapsed:,.0f}/с), изменено строк {result['updated']}"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Размер автопарка")
+    parser.add_argument("--chunk-size", type=int, default=settings.maintenance_chunk_size, help="Машин на порцию")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(message)s")
+    asyncio.run(main(args))
@@ -0,0 +1,120 @@
+"""Бенчмарк поиска ближайших свободных автомобилей по сетке в памяти.
+
+Автомобили сгущаются вокруг городов Псковской области, часть разбросана
+по всей области. Замеряются построение индекса, применение пачек координат
+(как события moved от POST /vehicles/locations) и время запроса k ближайших
+при непрерывном движении; результаты сверяются с полным перебором.
+БД и Redis не нужны (из каталога backend):
+
+    python -m scripts.bench_nearest --vehicles 100000 --ticks 10
+"""
+import argparse
+import heapq
+import math
+import random
+import statistics
+import time
+import uuid
+
+from app.services.events import VEHICLE_MOVED
+from app.services.nearest import KM_PER_DEGREE, NearestVehicleFinder, new_grid
+
+CITIES = [
+    (57.8194, 28.3318),  # Псков
+    (57.8156, 27.6086),  # Печоры
+    (56.2901, 28.4889),  # Себеж
+    (57.3453, 28.3486),  # Остров
+    (56.7106, 28.6717),  # Опочка
+]
+REGION = ((55.9, 59.0), (27.3, 31.5))
+MAX_KM = 50.0
+
+
+def random_point(rng: random.Random) -> tuple:
+    if rng.random() < 0.2:
+        return rng.uniform(*REGION[0]), rng.uniform(*REGION[1])
+    lat, lon = rng.choice(CITIES)
+    return rng.gauss(lat, 0.05), rng.gauss(lon, 0.09)
+
+
+def brute_force(points: dict, lat: float, lon: float, k: int, max_km: float) -> list:
+    kx = KM_PER_DEGREE * math.cos(math.radians(lat))
+    found = []
+    for vehicle_id, (plat, plon) in points.items():
+        d = math.hypot((plon - lon) * kx, (plat - lat) * KM_PER_DEGREE)
+        if d <= max_km:
+            found.append((d, vehicle_id))
+    return heapq.nsmallest(k, found)
+
+
+def percentile(timings: list, share: float) -> float:
+    return sorted(timings)[max(0, int(len(timings) * share) - 1)]
+
+
+def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    points = {uuid.UUID(int=rng.getrandbits(128)): random_point(rng) for _ in range(args.vehicles)}
+
+    finder = NearestVehicleFinder()
+    started = time.perf_counter()
+    index = new_grid()
+    for number, (vehicle_id, (lat, lon)) in enumerate(points.items()):
+        index.upsert(vehicle_id, f"А{number % 1000:03d}АА60", lat, lon)
+    finder.index = index
+    finder.ready = True
+    print(f"Построение: {len(index)} автомобилей за {time.perf_counter() - started:.2f} с")
+
+    ids = list(points)
+    move_timings, query_timings = [], {k: [] for k in args.k}
+    for _ in range(args.ticks):
+        # Каждый автомобиль сдвигается до ~200 м, события пачками по batch
+        started = time.perf_counter()
+        for start in range(0, len(ids), args.batch):
+            locations = []
+            for vehicle_id in ids[start:start + args.batch]:
+                lat, lon = points[vehicle_id]
+                lat, lon = lat + rng.uniform(-0.0018, 0.0018), lon + rng.uniform(-0.003, 0.003)
+                points[vehicle_id] = (lat, lon)
+                locations.append([str(vehicle_id), lat, lon])
+            finder.handle_event({"type": VEHICLE_MOVED, "locations": locations})
+        move_timings.append(time.perf_counter() - started)
+
+        for k in args.k:
+            for _ in range(args.queries):
+                lat, lon = random_point(rng)
+                started = time.perf_counter()
+                finder.nearest(lat, lon, k)
+                query_timings[k].append((time.perf_counter() - started) * 1e6)
+
+    moves = len(ids) * args.ticks / sum(move_timings)
+    print(f"Перемещения: {moves:,.0f} в секунду (пачки по {args.batch})")
+    print(f"{'k':>4}{'p50, мкс':>12}{'p99, мкс':>12}")
+    for k, timings in query_timings.items():
+        print(f"{k:>4}{statistics.median(timings):>12.1f}{percentile(timings, 0.99):>12.1f}")
+
+    # Сверка с перебором и его время для сравнения
+    brute_timings, mismatches = [], 0
+    for _ in range(args.verify):
+        lat, lon = random_point(rng)
+        k = rng.choice(args.k)
+        started = time.perf_counter()
+        expected = brute_force(points, lat, lon, k, MAX_KM)
+        brute_timings.append((time.perf_counter() - started) * 1e6)
+        got = finder.nearest(lat, lon, k, MAX_KM)
+        if [item["id"] for item in got] != [vehicle_id for _, vehicle_id in expected]:
+            # Равные расстояния могут идти в другом порядке
+            if [round(item["distance_km"], 3) for item in got] != [round(d, 3) for d, _ in expected]:
+                mismatches += 1
+    print(f"Полный перебор: p50 {statistics.median(brute_timings):,.0f} мкс; расхождений с сеткой {mismatches} из {args.verify}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=100000, help="Свободных автомобилей в индексе")
+    parser.add_argument("--ticks", type=int, default=10, help="Шагов движения всего автопарка")
+    parser.add_argument("--batch", type=int, default=1000, help="Координат в одном событии moved")
+    parser.add_argument("--queries", type=int, default=1000, help="Запросов на каждый k за шаг")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 20], help="Сколько ближайших искать")
+    parser.add_argument("--verify", type=int, default=50, help="Запросов для сверки с перебором")
+    parser.add_argument("--seed", type=int, default=1, help="Зерно генератора")
+    main(parser.parse_args())
@@ -0,0 +1,94 @@
+"""Импорт штрафов: сопоставление пачкой против запроса на каждый штраф.
+
+Строит CSV из --fines штрафов: большинство номеров из реестра (часть
+записана латиницей и с пробелами, как в выгрузках камер), остальные
+неизвестны. Файл загружается через PenaltyService.import_file, затем
+для сравнения часть тех же номеров сопоставляется по одному через
+VehicleService.get_vehicle_by_plate (из каталога backend):
+
+    python -m scripts.bench_penalties --fines 20000
+"""
+import argparse
+import asyncio
+import io
+import logging
+import random
+import time
+
+from sqlalchemy import delete, select
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.penalty import Penalty
+from app.models.vehicle import Vehicle
+from app.services.penalties import PenaltyService
+from app.services.suggest import PLATE_CYRILLIC, PLATE_LATIN
+from app.services.vehicle import VehicleService
+from scripts.seed import seed_vehicles
+
+logger = logging.getLogger(__name__)
+
+# Префикс УИН тестовых штрафов (удаляются после прогона)
+UIN_PREFIX = "99"
+TO_LATIN = str.maketrans(PLATE_CYRILLIC, PLATE_LATIN)
+
+
+def build_file(plates: list, fines: int, unknown_share: float) -> bytes:
+    out = io.StringIO()
+    out.write("uin;plate_number;violated_at;amount;article;location\n")
+    for i in range(fines):
+        if random.random() < unknown_share:
+            plate = f"Х{random.randint(0, 999):03d}ХХ{random.randint(10, 99)}"
+        else:
+            plate = random.choice(plates)
+            if random.random() < 0.2:
+                plate = f"{plate[:1]} {plate[1:4]} {plate[4:6]} {plate[6:]}".translate(TO_LATIN)
+        out.write(
+            f"{UIN_PREFIX}{i:018d};{plate};{random.randint(1, 28):02d}.09.2026 {random.randint(0, 23):02d}:15;"
+            f"{random.choice(['500', '750', '1000,00', '1500'])};12.9.2;Псков, ул. Рижская\n"
+        )
+    return out.getvalue().encode("utf-8")
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with engine.connect() as conn:
+        await seed_vehicles(conn, args.rows)
+        await conn.commit()
+
+    async with AsyncSessionLocal() as session:
+        plates = (await session.execute(select(Vehicle.plate_number).limit(50000))).scalars().all()
+        data = build_file(plates, args.fines, args.unknown_share)
+        await session.execute(delete(Penalty).where(Penalty.uin.like(f"{UIN_PREFIX}%")))
+        await session.commit()
+
+        result = await PenaltyService(session).import_file(io.BytesIO(data))
+        print(
+            f"пачками: штрафов {result['received']} за {result['seconds']:.2f} с "
+            f"({result['fines_per_second']:,.0f}/с), сопоставлено {result['matched']}, "
+            f"не найдено {result['unmatched']}, ошибок {result['invalid']}"
+        )
+        again = await PenaltyService(session).import_file(io.BytesIO(data))
+        print(f"повторная загрузка: новых {again['inserted']}, дублей {again['duplicates']}, {again['fines_per_second']:,.0f}/с")
+
+        service = VehicleService(session)
+        sample = [line.split(";")[1] for line in data.decode().splitlines()[1:args.sample + 1]]
+        started = time.perf_counter()
+        for plate in sample:
+            await service.get_vehicle_by_plate(plate)
+        elapsed = time.perf_counter() - started
+        print(f"по одному: {len(sample)} номеров за {elapsed:.2f} с ({len(sample) / elapsed:,.0f}/с, только сопоставление)")
+
+        await session.execute(delete(Penalty).where(Penalty.uin.like(f"{UIN_PREFIX}%")))
+        await session.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Размер автопарка")
+    parser.add_argument("--fines", type=int, default=20000, help="Штрафов в файле")
+    parser.add_argument("--unknown-share", type=float, default=0.1, help="Доля номеров не из реестра")
+    parser.add_argument("--sample", type=int, default=2000, help="Номеров для сопоставления по одному")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(message)s")
+    asyncio.run(main(args))
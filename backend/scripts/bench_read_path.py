@@ -0,0 +1,131 @@
+"""Сравнение путей чтения: ORM-сессия против соединения только для чтения.
+
+Для страницы списка и карточки замеряются пропускная способность при
+нескольких одновременных запросах, процессорное время воркера и память,
+выделяемая на один запрос (пик tracemalloc). У списка пропускную
+способность обоих путей ограничивает подсчет total в БД, разницу видно
+по CPU. ORM-путь повторяет прежний GET: AsyncSession, объекты Vehicle
+в identity map, model_validate; новый путь - get_read_db и VehicleReader
+(из каталога backend):
+
+    python -m scripts.bench_read_path --requests 2000 --concurrency 8
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+import tracemalloc
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import text
+
+from app.core.database import AsyncSessionLocal, ReadOnlyConnection, engine
+from app.schemas.vehicle import VehicleFilters, VehicleResponse
+from app.services.vehicle import VehicleReader, VehicleService
+from scripts.seed import seed_vehicles
+
+logger = logging.getLogger(__name__)
+
+# Формы с индексами из 0003: подсчет не заслоняет разницу путей
+FILTERS = [
+    {"status": "AVAILABLE", "city": "Псков"},
+    {"status": "RENTED_TAXI", "city": "Остров"},
+    {"status": "MAINTENANCE", "city": "Печоры"},
+]
+
+
+async def orm_list(filters: VehicleFilters) -> None:
+    async with AsyncSessionLocal() as session:
+        vehicles, _ = await VehicleService(session).get_vehicles(filters)
+        [VehicleResponse.model_validate(vehicle) for vehicle in vehicles]
+
+
+async def read_list(filters: VehicleFilters) -> None:
+    conn = ReadOnlyConnection()
+    try:
+        await VehicleReader(conn).get_vehicles(filters)
+    finally:
+        await conn.close()
+
+
+async def orm_detail(vehicle_id) -> None:
+    async with AsyncSessionLocal() as session:
+        vehicle = await VehicleService(session).get_vehicle_by_id(vehicle_id)
+        VehicleResponse.model_validate(vehicle)
+
+
+async def read_detail(vehicle_id) -> None:
+    conn = ReadOnlyConnection()
+    try:
+        await VehicleReader(conn).get_vehicle_by_id(vehicle_id)
+    finally:
+        await conn.close()
+
+
+async def throughput(call: Callable[..., Awaitable], args: List, requests: int, concurrency: int) -> tuple:
+    """Запросов в секунду и процессорное время воркера на запрос, мкс"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            await call(args[i % len(args)])
+
+    await asyncio.gather(*(one(i) for i in range(min(100, requests))))  # прогрев
+    started, cpu_started = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+    return requests / elapsed, cpu / requests * 1e6
+
+
+async def memory_per_request(call: Callable[..., Awaitable], args: List, samples: int) -> float:
+    """Средний пик выделенной памяти на запрос, КБ"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(samples):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await call(args[i % len(args)])
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks) / 1024
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(1)
+    async with engine.connect() as conn:
+        await seed_vehicles(conn, args.rows)
+        ids = (await conn.execute(text("SELECT id FROM vehicles TABLESAMPLE SYSTEM (1) LIMIT 1000"))).scalars().all()
+        await conn.commit()
+
+    cases = []
+    for page_size in args.page_sizes:
+        filters = [
+            VehicleFilters(**rng.choice(FILTERS), page=rng.randint(1, 5), page_size=page_size)
+            for _ in range(100)
+        ]
+        cases.append((f"список/{page_size}", orm_list, read_list, filters))
+    cases.append(("карточка", orm_detail, read_detail, list(ids)))
+
+    print(f"{'запрос':<14}{'путь':<10}{'запр/с':>10}{'CPU, мкс':>10}{'КБ/запрос':>12}")
+    for name, orm_call, read_call, call_args in cases:
+        for label, call in (("ORM", orm_call), ("чтение", read_call)):
+            rate, cpu = await throughput(call, call_args, args.requests, args.concurrency)
+            memory = await memory_per_request(call, call_args, args.memory_samples)
+            print(f"{name:<14}{label:<10}{rate:>10.0f}{cpu:>10.0f}{memory:>12.1f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Размер автопарка")
+    parser.add_argument("--requests", type=int, default=2000, help="Запросов на замер пропускной способности")
+    parser.add_argument("--concurrency", type=int, default=8, help="Одновременных запросов")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100], help="Размеры страницы списка")
+    parser.add_argument("--memory-samples", type=int, default=200, help="Запросов на замер памяти")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    asyncio.run(main(args))
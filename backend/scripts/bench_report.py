@@ -0,0 +1,64 @@
+"""Бенчмарк построения отчета по автопарку: скорость и пик памяти.
+
+Создает задание через ReportJobService и строит файл так же, как задача
+generate_report. Пиковый RSS процесса зависит от размера порции курсора,
+а не от числа строк; сравните прогоны с разными --chunk-size и --rows
+(из каталога backend):
+
+    python -m scripts.bench_report --format xlsx --chunk-size 5000
+"""
+import argparse
+import asyncio
+import logging
+import resource
+import time
+
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.models.report import ReportJob
+from app.schemas.report import ReportJobCreate
+from app.services.reports import ReportJobService, report_path
+from scripts.seed import seed_vehicles
+
+logger = logging.getLogger(__name__)
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.report_chunk_size = args.chunk_size
+    async with engine.connect() as conn:
+        await seed_vehicles(conn, args.rows)
+        await conn.commit()
+
+    async with AsyncSessionLocal() as session:
+        service = ReportJobService(session)
+        job, created = await service.create(ReportJobCreate(format=args.format))
+        if not created:
+            raise SystemExit(f"Такой отчет уже строится: задание {job.id}")
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        result = await service.run(job.id)
+        elapsed = time.perf_counter() - started
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # КБ в Linux
+        path = report_path(job)
+        print(
+            f"{args.format}: строк {result['rows']} за {elapsed:.1f} с ({result['rows'] / elapsed:,.0f}/с), "
+            f"файл {path.stat().st_size / 2**20:.1f} МБ, порция {args.chunk_size}, "
+            f"пиковый RSS {rss_after / 1024:.0f} МБ (+{(rss_after - rss_before) / 1024:.0f} МБ за построение)"
+        )
+        path.unlink()
+        await session.execute(delete(ReportJob).where(ReportJob.id == job.id))
+        await session.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Размер автопарка")
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv", help="Формат отчета")
+    parser.add_argument("--chunk-size", type=int, default=settings.report_chunk_size, help="Строк на порцию курсора")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    asyncio.run(main(args))
@@ -0,0 +1,138 @@
+"""Микробенчмарк готовых запросов: процессорное время на запрос списка и карточки.
+
+Сравнивает прежнее построение select(Vehicle) на каждый запрос (значения
+внутри выражения) с готовыми запросами VehicleService, каждое - с кэшем
+подготовленных запросов asyncpg и без него. Процессорное время процесса
+(process_time) не включает ожидание БД, поэтому показывает именно то, что
+тратит воркер (из каталога backend):
+
+    python -m scripts.bench_statements --repeat 2000
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+from typing import Callable, List
+
+from sqlalchemy import and_, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.models.vehicle import Vehicle
+from app.schemas.vehicle import VehicleFilters
+from app.services.vehicle import VehicleService
+from scripts.seed import seed_vehicles
+
+logger = logging.getLogger(__name__)
+
+# Формы с индексами из 0003, чтобы время БД не заслоняло разницу
+FILTERS = [
+    {},
+    {"status": "AVAILABLE"},
+    {"city": "Псков"},
+    {"status": "RENTED_TAXI", "city": "Остров", "ordering": "created_at"},
+]
+
+
+def legacy_list_query(filters: VehicleFilters):
+    """Построение запроса страницы, как до готовых запросов"""
+    query = select(Vehicle)
+    conditions = []
+    if filters.q:
+        term = f"%{filters.q}%"
+        conditions.append(or_(
+            Vehicle.plate_number.ilike(term), Vehicle.vin.ilike(term),
+            Vehicle.brand.ilike(term), Vehicle.model.ilike(term)
+        ))
+    if filters.status:
+        conditions.append(Vehicle.status == filters.status)
+    if filters.city:
+        conditions.append(Vehicle.city == filters.city)
+    if conditions:
+        query = query.where(and_(*conditions))
+    field = filters.ordering.lstrip("-")
+    if hasattr(Vehicle, field):
+        column = getattr(Vehicle, field)
+        query = query.order_by(column.desc() if filters.ordering.startswith("-") else column)
+    return query.offset((filters.page - 1) * filters.page_size).limit(filters.page_size)
+
+
+async def legacy_list(session: AsyncSession, filters: VehicleFilters) -> None:
+    query = legacy_list_query(filters)
+    (await session.execute(query)).scalars().all()
+
+
+async def prepared_list(session: AsyncSession, filters: VehicleFilters) -> None:
+    query, _, params = VehicleService.list_statements(filters)
+    (await session.execute(query, params)).scalars().all()
+
+
+async def legacy_detail(session: AsyncSession, vehicle_id) -> None:
+    (await session.execute(select(Vehicle).where(Vehicle.id == vehicle_id))).scalar_one_or_none()
+
+
+async def prepared_detail(session: AsyncSession, vehicle_id) -> None:
+    await VehicleService(session).get_vehicle_by_id(vehicle_id)
+
+
+async def measure(factory: async_sessionmaker, call: Callable, args: List, repeat: int) -> dict:
+    """Процессорное время вызова (среднее) и полное (медиана), мкс"""
+    cpu, wall = [], []
+    async with factory() as session:
+        for i in range(repeat + 50):
+            arg = args[i % len(args)]
+            cpu_started, wall_started = time.process_time(), time.perf_counter()
+            await call(session, arg)
+            if i >= 50:  # прогрев: кэш компиляции и подготовка на соединении
+                cpu.append((time.process_time() - cpu_started) * 1e6)
+                wall.append((time.perf_counter() - wall_started) * 1e6)
+            session.expunge_all()
+    return {"cpu_us": statistics.mean(cpu), "wall_us": statistics.median(wall)}
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(1)
+    engines = {
+        cache: create_async_engine(settings.database_url, connect_args={"prepared_statement_cache_size": cache})
+        for cache in (0, settings.db_prepared_statement_cache_size)
+    }
+    try:
+        async with engines[0].connect() as conn:
+            await seed_vehicles(conn, args.rows)
+            ids = (await conn.execute(text("SELECT id FROM vehicles TABLESAMPLE SYSTEM (1) LIMIT 1000"))).scalars().all()
+            await conn.commit()
+        filters = [
+            VehicleFilters(**FILTERS[i % len(FILTERS)], page=rng.randint(1, 5), page_size=args.page_size)
+            for i in range(200)
+        ]
+
+        cases = [
+            ("список", legacy_list, prepared_list, filters),
+            ("карточка", legacy_detail, prepared_detail, list(ids)),
+        ]
+        print(f"{'запрос':<10}{'построение':<12}{'кэш asyncpg':>12}{'CPU, мкс':>11}{'время, мкс':>12}")
+        for name, legacy, prepared, call_args in cases:
+            for label, call in (("каждый раз", legacy), ("готовый", prepared)):
+                for cache, engine in engines.items():
+                    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+                    result = await measure(factory, call, call_args, args.repeat)
+                    print(
+                        f"{name:<10}{label:<12}{cache:>12}"
+                        f"{result['cpu_us']:>11.0f}{result['wall_us']:>12.0f}"
+                    )
+    finally:
+        for engine in engines.values():
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Размер автопарка")
+    parser.add_argument("--repeat", type=int, default=2000, help="Запросов на замер")
+    parser.add_argument("--page-size", type=int, default=10, help="Размер страницы списка")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    asyncio.run(main(args))
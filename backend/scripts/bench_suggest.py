@@ -0,0 +1,87 @@
+"""Бенчмарк индекса подсказок: память, время построения и поиска.
+
+Запуск из каталога backend (база не нужна):
+
+    python -m scripts.bench_suggest --vehicles 1000000
+"""
+import argparse
+import gc
+import hashlib
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+
+from app.services.suggest import PrefixIndex
+from scripts.seed import PLATE_LETTERS
+
+
+def synthetic_rows(count: int):
+    """Номера и VIN по той же схеме, что и scripts.seed"""
+    for i in range(1, count + 1):
+        plate = (
+            PLATE_LETTERS[i % 12]
+            + str((i // 12) % 1000).zfill(3)
+            + PLATE_LETTERS[(i // 12000) % 12]
+            + PLATE_LETTERS[(i // 144000) % 12]
+            + str(10 + (i // 1728000) % 90)
+        )
+        vin = None if i % 10 == 0 else hashlib.md5(str(i).encode()).hexdigest()[:17].upper()
+        yield uuid.uuid4(), plate, vin
+
+
+def main(args: argparse.Namespace) -> None:
+    rows = list(synthetic_rows(args.vehicles))
+    gc.collect()
+
+    started = time.perf_counter()
+    PrefixIndex().build(rows)
+    build_seconds = time.perf_counter() - started
+    gc.collect()
+
+    # Память меряем отдельным построением: tracemalloc сильно замедляет код
+    tracemalloc.start()
+    index = PrefixIndex()
+    index.build(rows)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"Автомобилей: {len(index)}")
+    print(f"Построение: {build_seconds:.2f} с")
+    print(f"Память индекса: {current / 2**20:.1f} МБ ({current / len(index):.0f} байт на автомобиль)")
+    print(f"Пик при построении: {peak / 2**20:.1f} МБ")
+
+    rng = random.Random(42)
+    prefixes = []
+    for _ in range(args.queries):
+        _, plate, vin = rows[rng.randrange(len(rows))]
+        source = vin if vin and rng.random() < 0.3 else plate
+        prefixes.append(source[:rng.randint(1, 6)])
+
+    timings = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.search(prefix, args.limit)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    print(
+        f"Поиск top-{args.limit}: p50 {statistics.median(timings):.1f} мкс, "
+        f"p99 {timings[int(len(timings) * 0.99) - 1]:.1f} мкс"
+    )
+
+    vehicle_id, plate, vin = rows[0]
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.upsert(vehicle_id, plate, vin)
+        index.remove(vehicle_id)
+    print(f"Удаление + вставка: {(time.perf_counter() - started) * 1000:.1f} мкс")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=1000000, help="Размер индекса")
+    parser.add_argument("--queries", type=int, default=10000, help="Число запросов поиска")
+    parser.add_argument("--limit", type=int, default=10, help="Количество подсказок")
+    main(parser.parse_args())
@@ -0,0 +1,104 @@
+"""Задачи Celery с БД: движок на задачу против пула процесса воркера.
+
+Прежний путь создавал движок без пула и новый event loop на каждую
+задачу (asyncio.run), то есть открывал соединение с PostgreSQL заново;
+новый - run_with_session из app.workers.runtime. Задачи выполняются в
+потоках, как в пуле threads (--concurrency 1 соответствует процессу
+prefork). Задача - свертка статусов без новых данных: короткий запрос,
+на котором стоимость соединения заметнее всего (из каталога backend):
+
+    python -m scripts.bench_worker_db --tasks 500 --concurrency 4
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.services.status_history import StatusHistoryService
+from app.workers import runtime
+
+logger = logging.getLogger(__name__)
+
+connects = 0
+
+
+def _count_connect(*args) -> None:
+    global connects
+    connects += 1
+
+
+def task(session: AsyncSession):
+    return StatusHistoryService(session).rollup()
+
+
+def per_task_engine() -> None:
+    async def run():
+        engine = create_async_engine(settings.database_url, poolclass=NullPool)
+        event.listen(engine.sync_engine, "connect", _count_connect)
+        try:
+            async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+                return await task(session)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def pooled() -> None:
+    runtime.run_with_session(task)
+
+
+def measure(name: str, fn: Callable[[], None], tasks: int, concurrency: int) -> None:
+    global connects
+    connects = 0
+    latencies: List[float] = []
+
+    def timed():
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(timed) for _ in range(tasks)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(
+        f"{name:>16}: {tasks / elapsed:7.0f} задач/с, "
+        f"p50 {statistics.median(latencies) * 1000:6.1f} мс, "
+        f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.1f} мс, "
+        f"новых соединений {connects}"
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    settings.worker_db_pool_size = args.concurrency
+    engine = runtime.get_runtime().engine
+    event.listen(engine.sync_engine, "connect", _count_connect)
+    # Прогрев: импорты и первый вызов не входят в замер
+    per_task_engine()
+    pooled()
+
+    print(f"задач {args.tasks}, одновременно {args.concurrency}")
+    measure("движок на задачу", per_task_engine, args.tasks, args.concurrency)
+    measure("пул процесса", pooled, args.tasks, args.concurrency)
+    runtime.close_runtime()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=500, help="Число задач")
+    parser.add_argument("--concurrency", type=int, default=1, help="Одновременных задач (потоков)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(message)s")
+    main(args)
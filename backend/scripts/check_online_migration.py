@@ -0,0 +1,202 @@
+"""Проверка онлайн-миграции: записи в vehicles не останавливаются.
+
+Пока несколько писателей вставляют и обновляют автомобили, к наполненной
+таблице применяется пробная миграция на помощниках migrations.online:
+новая колонка, заполнение пачками, индекс CONCURRENTLY и CHECK через
+NOT VALID + VALIDATE. Затем миграция откатывается. Скрипт завершается с
+кодом 1, если хоть одна запись упала или ждала дольше --max-stall.
+
+    python -m scripts.check_online_migration --rows 500000
+    python -m scripts.check_online_migration --blocking   # для сравнения: обычные DDL в одной транзакции
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+import sqlalchemy as sa
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from migrations.online import (
+    add_check_constraint_not_valid,
+    backfill,
+    create_index_concurrently,
+    drop_index_concurrently,
+    lock_timeout,
+    validate_constraint
+)
+from scripts.seed import BRANDS, COLORS, MODELS, PLATE_LETTERS, SEED_SQL, create_engine, seed_vehicles
+
+logger = logging.getLogger(__name__)
+
+# Порядковые номера вставок писателей, не пересекаются с seed и bench_indexes
+INSERT_OFFSET = 200_000_000
+
+COLUMN = "online_check_key"
+INDEX = "idx_vehicle_online_check_key"
+CONSTRAINT = "check_vehicle_online_check_key"
+
+
+def online_upgrade(op) -> None:
+    # Колонка без DEFAULT добавляется без перезаписи таблицы
+    with op.get_context().autocommit_block(), lock_timeout():
+        op.add_column("vehicles", sa.Column(COLUMN, sa.String(20), nullable=True))
+    backfill("vehicles", f"{COLUMN} = lower(plate_number)", f"{COLUMN} IS NULL")
+    create_index_concurrently(INDEX, "vehicles", [COLUMN])
+    add_check_constraint_not_valid(CONSTRAINT, "vehicles", f"{COLUMN} IS NULL OR length({COLUMN}) > 0")
+    validate_constraint(CONSTRAINT, "vehicles")
+
+
+def blocking_upgrade(op) -> None:
+    op.add_column("vehicles", sa.Column(COLUMN, sa.String(20), nullable=True))
+    op.execute(f"UPDATE vehicles SET {COLUMN} = lower(plate_number)")
+    op.create_index(INDEX, "vehicles", [COLUMN])
+    op.create_check_constraint(CONSTRAINT, "vehicles", f"{COLUMN} IS NULL OR length({COLUMN}) > 0")
+
+
+def downgrade(op) -> None:
+    drop_index_concurrently(INDEX, "vehicles")
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE vehicles DROP CONSTRAINT IF EXISTS {CONSTRAINT}")
+        op.execute(f"ALTER TABLE vehicles DROP COLUMN IF EXISTS {COLUMN}")
+
+
+def run_migration(steps: Callable) -> float:
+    """Выполнить шаги как миграцию alembic на отдельном соединении (в своем потоке)"""
+
+    def apply(connection) -> None:
+        context = MigrationContext.configure(connection)
+        with Operations.context(context) as op, context.begin_transaction():
+            steps(op)
+
+    async def go() -> None:
+        engine = create_engine()
+        try:
+            async with engine.connect() as conn:
+                await conn.run_sync(apply)
+                await conn.commit()
+        finally:
+            await engine.dispose()
+
+    started = time.perf_counter()
+    asyncio.run(go())
+    return time.perf_counter() - started
+
+
+class Writers:
+    """Писатели: вставка нового автомобиля или обновление пробега существующего"""
+
+    def __init__(self, engine: AsyncEngine, ids: List, count: int):
+        self.engine = engine
+        self.ids = ids
+        self.count = count
+        self.phase = "baseline"
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self._next = INSERT_OFFSET
+        self._stop = asyncio.Event()
+
+    async def _write(self) -> None:
+        async with self.engine.begin() as conn:
+            if random.random() < 0.5:
+                self._next += 1
+                await conn.execute(SEED_SQL, {
+                    "letters": PLATE_LETTERS, "brands": BRANDS, "models": MODELS,
+                    "colors": COLORS, "start": self._next, "stop": self._next,
+                })
+            else:
+                await conn.execute(
+                    text("UPDATE vehicles SET mileage_km = mileage_km + 1 WHERE id = :id"),
+                    {"id": random.choice(self.ids)}
+                )
+
+    async def _worker(self) -> None:
+        while not self._stop.is_set():
+            phase = self.phase
+            started = time.perf_counter()
+            try:
+                await self._write()
+            except Exception as e:
+                self.errors[phase] = self.errors.get(phase, 0) + 1
+                logger.error(f"Запись не удалась: {e}")
+            elapsed = time.perf_counter() - started
+            self.latencies.setdefault(phase, []).append(elapsed)
+            if elapsed > 0.5:
+                logger.warning(f"Запись ждала {elapsed * 1000:.0f} мс")
+
+    async def run(self) -> None:
+        await asyncio.gather(*(self._worker() for _ in range(self.count)))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def report(writers: Writers, max_stall: float) -> bool:
+    ok = True
+    for phase, timings in writers.latencies.items():
+        timings = sorted(timings)
+        errors = writers.errors.get(phase, 0)
+        worst = timings[-1]
+        print(
+            f"{phase:<10} записей {len(timings):>6}, ошибок {errors}, "
+            f"p50 {statistics.median(timings) * 1000:.1f} мс, "
+            f"p99 {timings[int(len(timings) * 0.99) - 1] * 1000:.1f} мс, "
+            f"макс {worst * 1000:.0f} мс"
+        )
+        if errors or worst > max_stall:
+            ok = False
+    return ok
+
+
+async def main(args: argparse.Namespace) -> bool:
+    engine = create_engine()
+    try:
+        async with engine.connect() as conn:
+            await seed_vehicles(conn, args.rows)
+            ids = (await conn.execute(text("SELECT id FROM vehicles TABLESAMPLE SYSTEM (1) LIMIT 10000"))).scalars().all()
+            await conn.commit()
+
+        writers = Writers(engine, list(ids), args.writers)
+        task = asyncio.create_task(writers.run())
+        await asyncio.sleep(args.warmup)
+
+        writers.phase = "migration"
+        steps = blocking_upgrade if args.blocking else online_upgrade
+        elapsed = await asyncio.to_thread(run_migration, steps)
+        print(f"Миграция ({'blocking' if args.blocking else 'online'}) заняла {elapsed:.1f} с")
+
+        writers.phase = "after"
+        await asyncio.sleep(args.warmup)
+        writers.stop()
+        await task
+
+        ok = report(writers, args.max_stall)
+    finally:
+        await asyncio.to_thread(run_migration, downgrade)
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("DELETE FROM vehicles WHERE osago_policy_number >= :low"),
+                {"low": "ХХХ" + str(INSERT_OFFSET).rjust(10, "0")}
+            )
+        await engine.dispose()
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Размер автопарка")
+    parser.add_argument("--writers", type=int, default=8, help="Число одновременных писателей")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Секунд записи до и после миграции")
+    parser.add_argument("--max-stall", type=float, default=1.0, help="Допустимая задержка одной записи, с")
+    parser.add_argument("--blocking", action="store_true", help="Обычные DDL в одной транзакции (для сравнения)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(message)s")
+    sys.exit(0 if asyncio.run(main(args)) else 1)
@@ -0,0 +1,281 @@
+"""Регрессионная проверка планов запросов списка автомобилей.
+
+Для каждой комбинации фильтров и сортировки, которую может построить
+эндпоинт GET /api/v1/vehicles, запросы VehicleService.build_list_queries
+прогоняются через EXPLAIN (FORMAT JSON) на наполненной базе и сверяются:
+
+* с обязательными правилами (использование нужных индексов, отсутствие
+  сортировок со сбросом на диск);
+* с сохраненным эталоном формы плана и его стоимости (query_plans.json).
+
+Запуск из каталога backend:
+
+    python -m scripts.check_query_plans --rows 500000            # проверка
+    python -m scripts.check_query_plans --rows 500000 --update   # новый эталон
+
+Скрипт завершается с кодом 1 и печатает diff планов, если что-то ухудшилось.
+"""
+import argparse
+import asyncio
+import difflib
+import itertools
+import json
+import logging
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from sqlalchemy import Select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.database import init_db
+from app.models.vehicle import Vehicle, VehicleCity, VehicleStatus
+from app.schemas.vehicle import VehicleFilters
+from app.services.vehicle import VehicleService
+from scripts.seed import create_engine, seed_vehicles
+
+logger = logging.getLogger(__name__)
+
+BASELINE_PATH = Path(__file__).with_name("query_plans.json")
+
+# Значения фильтров: план зависит от наличия фильтра, а не от конкретного значения
+Q_VALUES = [None, "А1"]
+STATUS_VALUES = [None, VehicleStatus.AVAILABLE]
+CITY_VALUES = [None, VehicleCity.PSKOV]
+
+# Во сколько раз стоимость плана может превысить эталонную
+DEFAULT_COST_TOLERANCE = 1.5
+
+
+@dataclass(frozen=True)
+class PlanCase:
+    """Одна комбинация параметров эндпоинта списка"""
+    q: Optional[str]
+    status: Optional[VehicleStatus]
+    city: Optional[VehicleCity]
+    ordering: str
+
+    @property
+    def filters(self) -> VehicleFilters:
+        return VehicleFilters(
+            q=self.q, status=self.status, city=self.city, ordering=self.ordering
+        )
+
+    @property
+    def name(self) -> str:
+        params = {"q": self.q, "status": self.status, "city": self.city}
+        params = {
+            key: value.name if isinstance(value, (VehicleStatus, VehicleCity)) else value
+            for key, value in params.items()
+            if value is not None
+        }
+        if self.ordering:
+            params["ordering"] = self.ordering
+        return urlencode(params)
+
+
+@dataclass(frozen=True)
+class IndexRule:
+    """Комбинация фильтров и сортировки, обязанная использовать один из индексов"""
+    index_names: Tuple[str, ...]
+    ordering: str
+    q: bool = False
+    status: bool = False
+    city: bool = False
+
+    def matches(self, case: PlanCase) -> bool:
+        return (
+            case.ordering == self.ordering
+            and bool(case.q) == self.q
+            and bool(case.status) == self.status
+            and bool(case.city) == self.city
+        )
+
+
+# Запросы, которые не должны деградировать до последовательного чтения таблицы
+PLATE_INDEXES = ("idx_vehicle_plate_unique",)
+INDEX_RULES = [
+    IndexRule(PLATE_INDEXES, "plate_number"),
+    IndexRule(PLATE_INDEXES, "-plate_number"),
+    IndexRule(("vehicles_pkey",), "id"),
+    IndexRule(("vehicles_pkey",), "-id"),
+]
+# Фильтры списка + сортировка по дате создания (миграция 0003)
+for ordering in ("created_at", "-created_at"):
+    INDEX_RULES += [
+        IndexRule(("idx_vehicle_created_at",), ordering),
+        IndexRule(("idx_vehicle_status_created_at",), ordering, status=True),
+        IndexRule(("idx_vehicle_city_created_at",), ordering, city=True),
+        IndexRule(
+            ("idx_vehicle_available_city_created_at", "idx_vehicle_status_created_at"),
+            ordering,
+            status=True,
+            city=True,
+        ),
+    ]
+
+
+def build_cases() -> List[PlanCase]:
+    """Все комбинации фильтров и допустимых полей сортировки"""
+    columns = [column.key for column in Vehicle.__table__.columns]
+    orderings = [prefix + column for column in columns for prefix in ("", "-")]
+    return [
+        PlanCase(q, status, city, ordering)
+        for q, status, city, ordering in itertools.product(
+            Q_VALUES, STATUS_VALUES, CITY_VALUES, orderings
+        )
+    ]
+
+
+def render_sql(query: Select) -> str:
+    return str(
+        query.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+async def explain(conn: AsyncConnection, query: Select, analyze: bool) -> dict:
+    """Получить корневой узел плана запроса"""
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    result = await conn.exec_driver_sql(f"EXPLAIN ({options}) {render_sql(query)}")
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def plan_shape(node: dict, depth: int = 0) -> List[str]:
+    """Форма плана без стоимостей: типы узлов, индексы и способ сортировки"""
+    line = node["Node Type"]
+    if node.get("Index Name"):
+        line += f" using {node['Index Name']}"
+    if node.get("Relation Name"):
+        line += f" on {node['Relation Name']}"
+    if node.get("Sort Key"):
+        line += f" by {', '.join(node['Sort Key'])}"
+    lines = ["  " * depth + line]
+    for child in node.get("Plans", []):
+        lines.extend(plan_shape(child, depth + 1))
+    return lines
+
+
+def check_case(
+    case: PlanCase,
+    kind: str,
+    plan: dict,
+    baseline: Optional[dict],
+    tolerance: float,
+) -> List[str]:
+    """Проверить план и вернуть список найденных проблем"""
+    problems = []
+    shape = plan_shape(plan)
+    cost = plan["Total Cost"]
+
+    for node in walk(plan):
+        if node.get("Sort Space Type") == "Disk" or "external" in node.get("Sort Method", ""):
+            problems.append(f"сортировка со сбросом на диск: {node.get('Sort Method')}")
+
+    if kind == "list":
+        used = {node["Index Name"] for node in walk(plan) if node.get("Index Name")}
+        for rule in INDEX_RULES:
+            if rule.matches(case) and not used.intersection(rule.index_names):
+                expected = " или ".join(rule.index_names)
+                problems.append(f"ожидалось использование индекса {expected}")
+
+    if baseline is not None:
+        if baseline["shape"] != shape:
+            diff = difflib.unified_diff(
+                baseline["shape"], shape, "эталон", "сейчас", lineterm=""
+            )
+            problems.append("форма плана изменилась:\n" + "\n".join(diff))
+        ceiling = baseline["cost"] * tolerance
+        if cost > ceiling:
+            problems.append(
+                f"стоимость {cost:.1f} превышает потолок {ceiling:.1f} "
+                f"(эталон {baseline['cost']:.1f})"
+            )
+
+    if problems:
+        problems.append("текущий план:\n" + "\n".join(shape))
+    return problems
+
+
+async def collect_plans(conn: AsyncConnection, analyze: bool) -> Dict[str, tuple]:
+    """Планы запросов страницы и количества для всех комбинаций"""
+    plans = {}
+    for case in build_cases():
+        query, count_query = VehicleService.build_list_queries(case.filters)
+        plans[f"list?{case.name}"] = (case, "list", await explain(conn, query, analyze))
+        # Запрос количества не зависит от сортировки
+        count_key = f"count?{PlanCase(case.q, case.status, case.city, '').name}"
+        if count_key not in plans:
+            plans[count_key] = (case, "count", await explain(conn, count_query, analyze))
+    return plans
+
+
+async def main(args: argparse.Namespace) -> int:
+    await init_db()
+    engine = create_engine()
+    try:
+        async with engine.connect() as conn:
+            await seed_vehicles(conn, args.rows)
+            plans = await collect_plans(conn, analyze=not args.no_analyze)
+    finally:
+        await engine.dispose()
+
+    if args.update:
+        snapshot = {
+            key: {"shape": plan_shape(plan), "cost": plan["Total Cost"]}
+            for key, (_, _, plan) in plans.items()
+        }
+        BASELINE_PATH.write_text(
+            json.dumps(snapshot, ensure_ascii=False, indent=2, sort_keys=True) + "\n"
+        )
+        logger.info(f"Эталон записан в {BASELINE_PATH} ({len(snapshot)} планов)")
+
+    baseline = {}
+    if BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text())
+    else:
+        logger.warning("Эталон планов не найден, проверяются только обязательные правила")
+
+    failed = 0
+    for key, (case, kind, plan) in plans.items():
+        problems = check_case(case, kind, plan, baseline.get(key), args.tolerance)
+        if problems:
+            failed += 1
+            print(f"\nFAIL {key}")
+            for problem in problems:
+                print("  " + problem.replace("\n", "\n    "))
+
+    print(f"\nПроверено планов: {len(plans)}, с проблемами: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Размер автопарка")
+    parser.add_argument("--update", action="store_true", help="Перезаписать эталон")
+    parser.add_argument(
+        "--no-analyze", action="store_true", help="EXPLAIN без выполнения запросов"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_COST_TOLERANCE,
+        help="Допустимый рост стоимости относительно эталона",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    sys.exit(asyncio.run(main(args)))
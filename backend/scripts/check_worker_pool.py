@@ -0,0 +1,52 @@
+"""Проверка размера пула БД процесса воркера для каждого пула Celery.
+
+Для каждого пула создается WorkController (как при запуске celery
+worker -P <пул> --concurrency N, без подключения к брокеру), и после
+сигнала worker_init сверяется pool_size() из app.workers.runtime: N для
+threads, gevent и eventlet (но не больше WORKER_DB_POOL_MAX), 1 для
+prefork и solo. Пул задается и
+именем, и классом - celery worker передает класс. Пулы, библиотеки
+которых не установлены, проверяются только по классу. Код выхода 1
+при расхождении (из каталога backend):
+
+    python -m scripts.check_worker_pool --concurrency 8
+"""
+import argparse
+import sys
+
+from celery.concurrency import get_implementation
+
+from app.core.config import settings
+from app.workers import runtime
+from app.workers.celery import celery_app
+
+POOLS = {"prefork": False, "solo": False, "threads": True, "gevent": True, "eventlet": True}
+
+
+def main(args: argparse.Namespace) -> int:
+    settings.worker_db_pool_size = None
+    celery_app.conf.broker_url = "memory://"
+    failed = 0
+    for name, shared in POOLS.items():
+        expected = min(args.concurrency, settings.worker_db_pool_max) if shared else 1
+        for pool in (name, get_implementation(name)):
+            label = f"{name} ({'имя' if isinstance(pool, str) else 'класс'})"
+            # Значение прошлой проверки не должно остаться
+            runtime._tasks_per_process = 0
+            try:
+                celery_app.WorkController(pool_cls=pool, concurrency=args.concurrency)
+                size = runtime.pool_size()
+            except ImportError:
+                runtime._tasks_per_process = runtime.tasks_per_process(pool, args.concurrency)
+                size = runtime.pool_size()
+                label += ", без воркера: библиотека пула не установлена"
+            ok = size == expected
+            failed += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {label}: пул {size}, ожидается {expected}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=4, help="--concurrency воркера")
+    sys.exit(main(parser.parse_args()))
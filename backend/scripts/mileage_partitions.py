@@ -0,0 +1,43 @@
+"""Разовая подготовка месячных секций показаний одометра.
+
+Задача ensure_mileage_partitions создает секции на ближайшие месяцы;
+этот скрипт - для прошлых месяцев (загрузка старой истории) или если
+задача долго не работала. Показания этих месяцев из секции по
+умолчанию переносятся в новые секции (из каталога backend):
+
+    python -m scripts.mileage_partitions --from 2025-01 --to 2026-12
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime
+
+from app.core.database import AsyncSessionLocal, engine
+from app.services.mileage import MileageService, next_month
+
+
+def parse_month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+async def main(args: argparse.Namespace) -> None:
+    months = []
+    month = args.month_from
+    while month <= args.month_to:
+        months.append(month)
+        month = next_month(month)
+
+    async with AsyncSessionLocal() as session:
+        await MileageService(session).ensure_partitions(months)
+    await engine.dispose()
+    print(f"месяцев проверено: {len(months)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--from", dest="month_from", type=parse_month, required=True, help="Первый месяц, ГГГГ-ММ")
+    parser.add_argument("--to", dest="month_to", type=parse_month, required=True, help="Последний месяц, ГГГГ-ММ")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    asyncio.run(main(args))
@@ -0,0 +1,128 @@
+"""Наполнение локальной базы синтетическим автопарком.
+
+Запуск из каталога backend:
+
+    python -m scripts.seed --rows 500000
+
+Используйте отдельную базу (например, POSTGRES_DB=drivecore_perf),
+чтобы не смешивать синтетические данные с рабочими.
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Буквы, допустимые в российских номерах
+PLATE_LETTERS = ["А", "В", "Е", "К", "М", "Н", "О", "Р", "С", "Т", "У", "Х"]
+
+BRANDS = ["Toyota", "Hyundai", "Kia", "Skoda", "Volkswagen", "Renault", "Lada", "Nissan"]
+MODELS = ["Camry", "Solaris", "Rio", "Octavia", "Polo", "Logan", "Vesta", "Almera"]
+COLORS = ["Белый", "Черный", "Серый", "Синий", "Красный"]
+
+# Номер строится детерминированно из порядкового номера i, поэтому повторный
+# запуск с тем же диапазоном не создает дубликатов
+SEED_SQL = text(
+    """
+    INSERT INTO vehicles (
+        id, plate_number, vin, brand, model, year, color, status,
+        mileage_km, city, owner_name, osago_policy_number, created_at, updated_at
+    )
+    SELECT
+        gen_random_uuid(),
+        l[1 + i % 12]
+            || lpad(((i / 12) % 1000)::text, 3, '0')
+            || l[1 + (i / 12000) % 12]
+            || l[1 + (i / 144000) % 12]
+            || (10 + (i / 1728000) % 90)::text,
+        CASE WHEN i % 10 = 0 THEN NULL ELSE upper(substr(md5(i::text), 1, 17)) END,
+        b[1 + i % array_length(b, 1)],
+        m[1 + (i / 7) % array_length(m, 1)],
+        2005 + i % 20,
+        c[1 + i % array_length(c, 1)],
+        s[1 + (i * 7919) % array_length(s, 1)]::vehiclestatus,
+        (random() * 300000)::int,
+        CASE WHEN i % 20 = 0 THEN NULL
+             ELSE ct[1 + (i * 104729) % array_length(ct, 1)]::vehiclecity END,
+        'Владелец ' || (i % 1000),
+        'ХХХ' || lpad(i::text, 10, '0'),
+        ts,
+        ts
+    FROM (
+        SELECT
+            i,
+            now() - random() * interval '3 years' AS ts,
+            CAST(:letters AS text[]) AS l,
+            CAST(:brands AS text[]) AS b,
+            CAST(:models AS text[]) AS m,
+            CAST(:colors AS text[]) AS c,
+            enum_range(NULL::vehiclestatus)::text[] AS s,
+            enum_range(NULL::vehiclecity)::text[] AS ct
+        FROM generate_series(CAST(:start AS bigint), CAST(:stop AS bigint)) AS i
+    ) AS src
+    ON CONFLICT DO NOTHING
+    """
+)
+
+
+def create_engine() -> AsyncEngine:
+    """Движок для служебных скриптов без логирования SQL"""
+    return create_async_engine(settings.database_url, echo=False)
+
+
+async def seed_vehicles(conn: AsyncConnection, rows: int, batch_size: int = 50000) -> int:
+    """Дополнить таблицу vehicles синтетическими строками до rows штук"""
+    existing = (await conn.execute(text("SELECT count(*) FROM vehicles"))).scalar()
+    if existing >= rows:
+        logger.info(f"В таблице уже {existing} строк, наполнение не требуется")
+        return 0
+
+    inserted = 0
+    start = existing + 1
+    while existing + inserted < rows:
+        stop = start + min(batch_size, rows - existing - inserted) - 1
+        result = await conn.execute(
+            SEED_SQL,
+            {
+                "letters": PLATE_LETTERS,
+                "brands": BRANDS,
+                "models": MODELS,
+                "colors": COLORS,
+                "start": start,
+                "stop": stop,
+            },
+        )
+        await conn.commit()
+        inserted += result.rowcount
+        start = stop + 1
+        logger.info(f"Добавлено {inserted} из {rows - existing} строк")
+
+    await conn.execute(text("ANALYZE vehicles"))
+    await conn.commit()
+    return inserted
+
+
+async def main(rows: int) -> None:
+    engine = create_engine()
+    try:
+        async with engine.connect() as conn:
+            started = time.perf_counter()
+            inserted = await seed_vehicles(conn, rows)
+            logger.info(f"Готово: {inserted} строк за {time.perf_counter() - started:.1f} с")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Целевое число строк")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    asyncio.run(main(args.rows))
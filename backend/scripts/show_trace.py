@@ -0,0 +1,77 @@
+"""Трассы из файла спанов: список долгих запросов и дерево одной трассы.
+
+Читает settings.tracing_file (и .1 после переименования), общий для
+API и воркеров Celery, поэтому в дереве есть и выполнение задач
+(из каталога backend):
+
+    python -m scripts.show_trace --name "POST /api/v1/vehicles/" --slowest 10
+    python -m scripts.show_trace 4bf92f3577b34da6a3ce929d0e0e4736
+"""
+import argparse
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+
+def read_spans(path: str) -> Iterator[dict]:
+    for name in (path + ".1", path):
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Недописанная строка при падении процесса
+                    continue
+
+
+def print_tree(spans: List[dict]) -> None:
+    ids = {span["span_id"] for span in spans}
+    children: Dict[Optional[str], List[dict]] = defaultdict(list)
+    for span in spans:
+        # Родитель не записан (другой сервис или спан еще пишется) - в корень
+        children[span["parent_id"] if span["parent_id"] in ids else None].append(span)
+
+    def walk(parent_id: Optional[str], depth: int) -> None:
+        for span in sorted(children[parent_id], key=lambda s: s["start"]):
+            attributes = span["attributes"]
+            detail = attributes.get("db.statement") or attributes.get("http.status_code") or ""
+            detail = " ".join(str(detail).split())[:100]
+            marker = " !" if span["status"] == "error" else ""
+            print(
+                f"{span['start'][11:23]} {span['duration_ms']:>9.2f} мс  {'  ' * depth}"
+                f"{span['name']} [{span['role']}]{marker}  {detail}"
+            )
+            walk(span["span_id"], depth + 1)
+
+    walk(None, 0)
+
+
+def main(args: argparse.Namespace) -> None:
+    if args.trace_id:
+        spans = [span for span in read_spans(args.file) if span["trace_id"] == args.trace_id.lower()]
+        if not spans:
+            raise SystemExit(f"Трасса {args.trace_id} не найдена в {args.file}")
+        print_tree(spans)
+        return
+
+    roots = [
+        span for span in read_spans(args.file)
+        if span["parent_id"] is None and (not args.name or span["name"] == args.name)
+    ]
+    roots.sort(key=lambda s: s["duration_ms"], reverse=True)
+    for span in roots[:args.slowest]:
+        print(f"{span['trace_id']}  {span['duration_ms']:>9.2f} мс  {span['start'][:23]}  {span['name']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace_id", nargs="?", help="Показать дерево спанов трассы")
+    parser.add_argument("--file", default=settings.tracing_file, help="Файл спанов")
+    parser.add_argument("--name", help="Только корневые спаны с этим именем")
+    parser.add_argument("--slowest", type=int, default=20, help="Сколько самых долгих трасс показать")
+    main(parser.parse_args())
@@ -1,13 +1,14 @@
 import { useState } from 'react'
 import { Search, Filter, X } from 'lucide-react'
-import { VehicleStatus, VehicleCity, VehicleFilters } from '../types/vehicle'
+import { VehicleStatus, VehicleCity, VehicleFilters, VehicleFacets } from '../types/vehicle'
 
 interface VehicleFiltersProps {
   filters: VehicleFilters
+  facets?: VehicleFacets
   onFiltersChange: (filters: VehicleFilters) => void
 }
 
-export default function VehicleFiltersComponent({ filters, onFiltersChange }: VehicleFiltersProps) {
+export default function VehicleFiltersComponent({ filters, facets, onFiltersChange }: VehicleFiltersProps) {
   const [showFilters, setShowFilters] = useState(false)
 
   const handleSearchChange = (value: string) => {
@@ -100,7 +101,7 @@ export default function VehicleFiltersComponent({ filters, onFiltersChange }: Ve
                 <option value="">Все статусы</option>
                 {Object.entries(VehicleStatus).map(([key, value]) => (
                   <option key={key} value={value}>
-                    {getStatusLabel(value)}
+                    {getStatusLabel(value)}{formatCount(facets?.status, value)}
                   </option>
                 ))}
               </select>
@@ -119,7 +120,7 @@ export default function VehicleFiltersComponent({ filters, onFiltersChange }: Ve
                 <option value="">Все города</option>
                 {Object.values(VehicleCity).map((city) => (
                   <option key={city} value={city}>
-                    {city}
+                    {city}{formatCount(facets?.city, city)}
                   </option>
                 ))}
               </select>
@@ -131,6 +132,11 @@ export default function VehicleFiltersComponent({ filters, onFiltersChange }: Ve
   )
 }
 
+// Количество автомобилей рядом с вариантом фильтра
+function formatCount<K extends string>(counts: Partial<Record<K, number>> | undefined, key: K): string {
+  return counts ? ` (${counts[key] ?? 0})` : ''
+}
+
 // Вспомогательная функция для получения метки статуса
 function getStatusLabel(status: VehicleStatus): string {
   const labels: Record<VehicleStatus, string> = {
@@ -24,6 +24,7 @@ export function useVehicles(filters: VehicleFilters) {
       if (filters.page) params.append('page', filters.page.toString())
       if (filters.page_size) params.append('page_size', filters.page_size.toString())
       if (filters.ordering) params.append('ordering', filters.ordering)
+      if (filters.facets) params.append('facets', filters.facets)
       
       const response = await apiClient.get(`/api/v1/vehicles?${params.toString()}`)
       return response.data
@@ -17,7 +17,8 @@ export default function Fleet() {
     ordering: '-created_at'
   })
 
-  const { data, isLoading, error } = useVehicles(filters)
+  // Счетчики по статусам и городам приходят вместе со страницей
+  const { data, isLoading, error } = useVehicles({ ...filters, facets: 'status,city' })
 
   const handleFiltersChange = (newFilters: VehicleFilters) => {
     setFilters(newFilters)
@@ -69,6 +70,7 @@ export default function Fleet() {
       {/* Filters */}
       <VehicleFiltersComponent
         filters={filters}
+        facets={data?.facets}
         onFiltersChange={handleFiltersChange}
       />
 
@@ -61,11 +61,17 @@ export interface VehicleUpdate {
   osago_policy_number?: string
 }
 
+export interface VehicleFacets {
+  status?: Partial<Record<VehicleStatus, number>>
+  city?: Partial<Record<VehicleCity, number>>
+}
+
 export interface VehicleListResponse {
   items: Vehicle[]
   page: number
   page_size: number
   total: number
+  facets?: VehicleFacets
 }
 
 export interface VehicleFilters {
@@ -75,6 +81,7 @@ export interface VehicleFilters {
   page?: number
   page_size?: number
   ordering?: string
+  facets?: string
 }
 
 // Статусы для отображения